@@ -0,0 +1,248 @@
+"""Benchmark suite on a synthetic, reproducible workload.
+
+The generator produces working days of 5-second tracker samples (titles
+drawn from a Zipf-like distribution over `titles` distinct titles, dwelling
+for a random number of samples) with bursts of tab pings, all from a seeded
+RNG. The suite loads it into a fresh database in a temporary directory,
+month by month, and measures:
+
+- insert: write throughput of insert_block/insert_tab_block (until flushed)
+- day_query: get_blocks_for_day latency after each month, i.e. against history size
+- timeline / positions: /timeline and /admin/positions response times, cold
+  (day cache cleared) and warm, through the ASGI app
+- export: CSV streaming and columnar (.npz) export throughput over all history
+
+Results are written as JSON (`--out`). With `--check` the flat metrics are
+compared against absolute limits from a thresholds file (bench_thresholds.json)
+and, with `--baseline`, against an earlier result with a relative tolerance;
+any regression makes the exit status 1.
+
+    python bench.py --months 2 --out bench.json --check
+    python bench.py --out new.json --baseline bench.json --tolerance 0.25
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_thresholds.json")
+
+
+# --- Workload -----------------------------------------------------------------
+
+def generate(start_day, days, sample_seconds=5, titles=200, mean_dwell=24, work_hours=(8, 18),
+             burst_every_minutes=20, burst_size=30, seed=0):
+    """Yield ("block", start, end, title) samples and ("tab", ts, title, url) pings in time order.
+
+    Weekdays from `start_day` on are worked from work_hours[0] to work_hours[1];
+    each sample lasts `sample_seconds`. A title stays for a geometric number of
+    samples (mean `mean_dwell`), then another one is drawn with weight 1/rank.
+    About every `burst_every_minutes` a burst of `burst_size` tab pings (one per
+    second, e.g. tab cycling) is interleaved.
+    """
+    rng = random.Random(seed)
+    names = [f"App {i} - Dokument {i * 7 % 97}" for i in range(titles)]
+    weights = [1 / (rank + 1) for rank in range(titles)]
+    urls = [f"https://example.org/page/{i}" for i in range(titles * 5)]
+    step = timedelta(seconds=sample_seconds)
+    burst_p = sample_seconds / (burst_every_minutes * 60)
+    title = names[0]
+    for d in range(days):
+        day = start_day + timedelta(days=d)
+        if day.weekday() >= 5:
+            continue
+        t = day.replace(hour=work_hours[0], minute=0, second=0, microsecond=0)
+        end = day.replace(hour=work_hours[1], minute=0, second=0, microsecond=0)
+        while t < end:
+            if rng.random() < 1 / mean_dwell:
+                title = rng.choices(names, weights)[0]
+            if rng.random() < burst_p:
+                for i in range(burst_size):
+                    url = rng.choice(urls)
+                    yield ("tab", t + timedelta(seconds=i), f"Seite {url.rsplit('/', 1)[1]}", url)
+                t += timedelta(seconds=burst_size)
+                continue
+            yield ("block", t, t + step, title)
+            t += step
+
+
+# --- Measurements ---------------------------------------------------------------
+
+def _ms_stats(samples):
+    s = sorted(samples)
+    return {"p50_ms": round(s[len(s) // 2], 3), "p95_ms": round(s[min(len(s) - 1, int(len(s) * 0.95))], 3),
+            "n": len(s)}
+
+
+def _timed(fn):
+    t = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t) * 1000
+
+
+def _months(first, last):
+    month = first.replace(day=1)
+    while month <= last:
+        nxt = (month + timedelta(days=32)).replace(day=1)
+        yield max(month, first), min(nxt, last + timedelta(days=1))
+        month = nxt
+
+
+def run(months=1, titles=200, burst_size=30, queries=30, seed=0, workdir=None):
+    """Run the suite; returns {"meta", "metrics", "series"}."""
+    import config
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        # database opens config.DB_PATH on import
+        config.DB_PATH = os.path.join(tmp, "bench.db")
+        import importlib
+        import database
+        if database.DB_PATH != config.DB_PATH:
+            importlib.reload(database)
+        import bulk
+        import server
+        import webui
+        from fastapi.testclient import TestClient
+
+        rng = random.Random(seed)
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        first = (today - timedelta(days=30 * months)).replace(day=1)
+        last = today - timedelta(days=1)
+        metrics, series = {}, {"day_query": []}
+        days_loaded = []
+        writes = 0
+        insert_seconds = 0.0
+
+        for m_start, m_end in _months(first, last):
+            n_days = (m_end - m_start).days
+            work = list(generate(m_start, n_days, titles=titles, burst_size=burst_size,
+                                 seed=rng.randrange(1 << 30)))
+            t = time.perf_counter()
+            for kind, a, b, c in work:
+                if kind == "block":
+                    database.insert_block(a, b, c)
+                else:
+                    database.insert_tab_block(a, b, c)
+            database.flush()
+            insert_seconds += time.perf_counter() - t
+            writes += len(work)
+            days_loaded += [m_start + timedelta(days=i) for i in range(n_days) if (m_start + timedelta(days=i)).weekday() < 5]
+
+            sample = [rng.choice(days_loaded).date().isoformat() for _ in range(queries)]
+            lat = [_timed(lambda d=d: database.get_blocks_for_day(d)) for d in sample]
+            blocks = database.reader().execute("SELECT COUNT(*) FROM block_data").fetchone()[0]
+            series["day_query"].append(dict(_ms_stats(lat), month=f"{m_start:%Y-%m}", blocks=blocks))
+
+        metrics["insert.writes"] = writes
+        metrics["insert.writes_per_s"] = round(writes / insert_seconds, 1)
+        metrics["history.blocks"] = series["day_query"][-1]["blocks"]
+        metrics["day_query.p50_ms"] = series["day_query"][-1]["p50_ms"]
+        metrics["day_query.p95_ms"] = series["day_query"][-1]["p95_ms"]
+
+        client = TestClient(server.create_app(background=False))
+        sample = [rng.choice(days_loaded).date().isoformat() for _ in range(queries)]
+        for name, path in (("timeline", "/timeline"), ("positions", "/admin/positions")):
+            cold, warm = [], []
+            for d in sample:
+                with webui._day_cache_lock:
+                    webui._day_cache.clear()
+                cold.append(_timed(lambda: client.get(path, params={"day": d}).raise_for_status()))
+                warm.append(_timed(lambda: client.get(path, params={"day": d}).raise_for_status()))
+            for label, lat in (("cold", cold), ("warm", warm)):
+                stats = _ms_stats(lat)
+                metrics[f"{name}.{label}_p50_ms"] = stats["p50_ms"]
+                metrics[f"{name}.{label}_p95_ms"] = stats["p95_ms"]
+
+        rows = metrics["history.blocks"]
+        params = {"from": first.date().isoformat(), "to": last.date().isoformat()}
+        t = time.perf_counter()
+        size = 0
+        with client.stream("GET", "/export/csv", params=params) as res:
+            for chunk in res.iter_bytes():
+                size += len(chunk)
+        seconds = time.perf_counter() - t
+        metrics["export.csv_rows_per_s"] = round(rows / seconds, 1)
+        metrics["export.csv_mb_per_s"] = round(size / seconds / 1e6, 2)
+        t = time.perf_counter()
+        bulk.write(bulk.columns(first, last + timedelta(days=1)), "npz", io.BytesIO())
+        metrics["export.npz_rows_per_s"] = round(rows / (time.perf_counter() - t), 1)
+
+        database.close()
+
+    return {
+        "meta": {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "platform": platform.platform(),
+                 "params": {"months": months, "titles": titles, "burst_size": burst_size, "queries": queries,
+                            "seed": seed}},
+        "metrics": metrics,
+        "series": series,
+    }
+
+
+# --- Regression checks -----------------------------------------------------------
+
+def check(metrics, thresholds=None, baseline=None, tolerance=0.2):
+    """List of regressions: absolute limits ({metric: {"max"|"min": x}}) and, against a
+    baseline's metrics, `*_ms` more than `tolerance` slower or `*_per_s` more than that lower."""
+    failures = []
+    for name, limit in (thresholds or {}).items():
+        value = metrics.get(name)
+        if value is None:
+            continue
+        if "max" in limit and value > limit["max"]:
+            failures.append(f"{name} = {value} > max {limit['max']}")
+        if "min" in limit and value < limit["min"]:
+            failures.append(f"{name} = {value} < min {limit['min']}")
+    for name, old in (baseline or {}).items():
+        value = metrics.get(name)
+        if value is None or not old:
+            continue
+        if name.endswith("_ms") and value > old * (1 + tolerance):
+            failures.append(f"{name} = {value} vs baseline {old} (+{value / old - 1:.0%})")
+        elif name.endswith("_per_s") and value < old * (1 - tolerance):
+            failures.append(f"{name} = {value} vs baseline {old} ({value / old - 1:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--months", type=int, default=1, help="history to generate (default 1)")
+    parser.add_argument("--titles", type=int, default=200, help="distinct window titles")
+    parser.add_argument("--burst-size", type=int, default=30, help="tab pings per burst")
+    parser.add_argument("--queries", type=int, default=30, help="sampled days per latency measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results JSON here (default: stdout)")
+    parser.add_argument("--check", action="store_true", help=f"apply {os.path.basename(THRESHOLDS_PATH)}")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    parser.add_argument("--baseline", help="earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative slowdown vs baseline")
+    args = parser.parse_args(argv)
+
+    result = run(args.months, args.titles, args.burst_size, args.queries, args.seed)
+    thresholds = baseline = None
+    if args.check:
+        with open(args.thresholds, encoding="utf-8") as f:
+            thresholds = json.load(f)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["metrics"]
+    result["regressions"] = check(result["metrics"], thresholds, baseline, args.tolerance)
+
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    for failure in result["regressions"]:
+        print("REGRESSION:", failure, file=sys.stderr)
+    return 1 if result["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,102 @@
 from datetime import datetime, timedelta
-from config import BUCKET_MINUTES
+from config import BUCKET_MINUTES, BUCKET_RESOLUTIONS
 
 class Bucket:
-    def __init__(self, start: datetime):
+    """Accumulates weighted samples per title for one time bucket.
+
+    The winner is tracked incrementally on every add, so `winner()` is O(1).
+    Weights are dwell seconds (the time a sample stands for); the default
+    weight of 1 keeps plain hit counting working. A bucket never holds more
+    seconds than it spans: weight beyond that is dropped.
+    """
+
+    def __init__(self, start: datetime, minutes: int = BUCKET_MINUTES):
         self.start = start
+        self.minutes = minutes
         self.counts = {}
+        self._winner = None
+        self._winner_weight = 0
+        self._total = 0
 
-    def add(self, title: str):
+    @property
+    def end(self):
+        return self.start + timedelta(minutes=self.minutes)
+
+    def add(self, title: str, weight: float = 1):
         if not title:
             return
-        self.counts[title] = self.counts.get(title, 0) + 1
+        weight = min(weight, self.minutes * 60 - self._total)
+        if weight <= 0:
+            return
+        self._total += weight
+        w = self.counts.get(title, 0) + weight
+        self.counts[title] = w
+        if w > self._winner_weight:
+            self._winner = title
+            self._winner_weight = w
 
     def winner(self):
-        if not self.counts:
-            return None
-        return max(self.counts.items(), key=lambda x: x[1])[0]
+        return self._winner
 
+    def total(self):
+        return self._total
 
-def bucket_start(now: datetime):
+
+def bucket_start(now: datetime, minutes: int = BUCKET_MINUTES):
     """Return the start time of the bucket containing `now`.
 
-    The bucket size is configurable via `config.BUCKET_MINUTES`.
+    The bucket size defaults to `config.BUCKET_MINUTES`; sizes must divide an hour.
     """
-    minute = (now.minute // BUCKET_MINUTES) * BUCKET_MINUTES
+    minute = (now.minute // minutes) * minutes
     return datetime(now.year, now.month, now.day, now.hour, minute)
+
+
+class BucketEngine:
+    """Keeps buckets of several sizes (e.g. 1/5/15/60 minutes) fed from one sample stream.
+
+    Each sample is added once per resolution; when time moves past a bucket,
+    `on_close(bucket)` is called with the finished bucket so it can be
+    persisted right away.
+    """
+
+    def __init__(self, resolutions=BUCKET_RESOLUTIONS, on_close=None):
+        self.resolutions = sorted(set(resolutions) | {BUCKET_MINUTES})
+        self.on_close = on_close
+        self.current = {}
+
+    def advance(self, now: datetime):
+        """Close every bucket that ended before `now` and open the ones containing it."""
+        for minutes in self.resolutions:
+            start = bucket_start(now, minutes)
+            cur = self.current.get(minutes)
+            if cur is not None and cur.start == start:
+                continue
+            if cur is not None:
+                self._close(cur)
+            self.current[minutes] = Bucket(start, minutes)
+
+    def add(self, title: str, weight: float = 1):
+        for b in self.current.values():
+            b.add(title, weight)
+
+    def add_span(self, title: str, start: datetime, end: datetime):
+        """Credit `title` with the seconds of [start, end) inside each open bucket.
+
+        For time known only after the fact (tab events arrive in batches): the
+        part of the span outside the open buckets is dropped, since those
+        buckets are already persisted.
+        """
+        for b in self.current.values():
+            seconds = (min(end, b.end) - max(start, b.start)).total_seconds()
+            if seconds > 0:
+                b.add(title, seconds)
+
+    def close_all(self):
+        """Close the open buckets (e.g. on shutdown)."""
+        for b in self.current.values():
+            self._close(b)
+        self.current = {}
+
+    def _close(self, bucket):
+        if self.on_close and bucket.winner():
+            self.on_close(bucket)
@@ -0,0 +1,305 @@
+"""Columnar bulk export/import of blocks for offline analysis and backfills.
+
+Export: any range as NumPy `.npz` or (with pyarrow) Parquet. Columns are
+`id`, `start`/`end` (epoch milliseconds, typed as datetime64[ms] / UTC
+timestamps) and dictionary-encoded `title` and `url` (NULL/-1 for
+non-tab blocks). In the .npz file the codes are `title`/`url` and the
+dictionaries `title_dict`/`url_dict`:
+
+    f = np.load("activity.npz")
+    titles = f["title_dict"][f["title"]]
+    df = pd.read_parquet("activity.parquet")  # title/url as categoricals
+
+Import: such files, and CSV/ICS/NDJSON files from exporter.py (including the
+unquoted CSV of older versions), are written with database.import_blocks,
+one transaction per file. Rows already stored (same start, end, title and
+URL) are skipped, so importing the same file twice changes nothing.
+
+    python bulk.py export 2024-01-01 2024-12-31 activity-2024.parquet
+    python bulk.py import activity-2024.npz old-export.csv
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import re
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import database
+
+logger = logging.getLogger(__name__)
+
+# Parquet is optional; .npz needs only NumPy
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = pq = None
+
+# format -> media type
+FORMATS = {
+    "npz": "application/octet-stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Parquet support needs pyarrow (pip install pyarrow)")
+
+
+# --- Export -------------------------------------------------------------------
+
+def columns(start, end):
+    """Blocks with start in [start, end) as columns ({name: ndarray}, dictionaries as lists).
+
+    Rows are read in keyset pages (database.iter_blocks); only the growing
+    columns and the distinct titles/URLs are held in memory.
+    """
+    ids, starts, ends = array("q"), array("q"), array("q")
+    title_codes, url_codes = array("i"), array("i")
+    titles, urls = {}, {}
+    for r in database.iter_blocks(start, end, parts=True):
+        if r[4] is None or r[5] is None:
+            continue
+        ids.append(r[0])
+        starts.append(r[4])
+        ends.append(r[5])
+        title_codes.append(titles.setdefault(r[6] or "", len(titles)))
+        url_codes.append(-1 if r[7] is None else urls.setdefault(r[7], len(urls)))
+    return {
+        "id": np.frombuffer(ids, dtype=np.int64),
+        "start": np.frombuffer(starts, dtype=np.int64),
+        "end": np.frombuffer(ends, dtype=np.int64),
+        "title": np.frombuffer(title_codes, dtype=np.int32),
+        "url": np.frombuffer(url_codes, dtype=np.int32),
+        "title_dict": list(titles),
+        "url_dict": list(urls),
+    }
+
+
+def write(cols, fmt, file):
+    """Write `columns()` output as "npz" or "parquet" to a path or binary file object."""
+    if fmt == "npz":
+        np.savez_compressed(
+            file, id=cols["id"],
+            start=cols["start"].astype("datetime64[ms]"), end=cols["end"].astype("datetime64[ms]"),
+            title=cols["title"], url=cols["url"],
+            title_dict=np.array(cols["title_dict"], dtype=str), url_dict=np.array(cols["url_dict"], dtype=str))
+    elif fmt == "parquet":
+        _require_pyarrow()
+        ts = pa.timestamp("ms", tz="UTC")
+        table = pa.table({
+            "id": pa.array(cols["id"], pa.int64()),
+            "start": pa.array(cols["start"], pa.int64()).cast(ts),
+            "end": pa.array(cols["end"], pa.int64()).cast(ts),
+            "title": pa.DictionaryArray.from_arrays(
+                pa.array(cols["title"], pa.int32()), pa.array(cols["title_dict"], pa.string())),
+            "url": pa.DictionaryArray.from_arrays(
+                pa.array(cols["url"], pa.int32(), mask=cols["url"] < 0), pa.array(cols["url_dict"], pa.string())),
+        })
+        pq.write_table(table, file)
+    else:
+        raise ValueError(f"unknown format {fmt!r}, expected one of {sorted(FORMATS)}")
+
+
+def export_file(start, end, path):
+    """Export a range to `path`; the format follows the extension (.npz or .parquet)."""
+    fmt = path.rsplit(".", 1)[-1].lower()
+    cols = columns(start, end)
+    write(cols, fmt, path)
+    return len(cols["id"])
+
+
+# --- Import -------------------------------------------------------------------
+# Readers return (start_ms, end_ms, title, url) tuples.
+
+def read_npz(path):
+    with np.load(path, allow_pickle=False) as f:
+        starts = f["start"].astype("datetime64[ms]").astype(np.int64).tolist()
+        ends = f["end"].astype("datetime64[ms]").astype(np.int64).tolist()
+        titles = f["title_dict"][f["title"]].tolist() if len(f["title"]) else []
+        url_dict = f["url_dict"].tolist()
+        urls = [url_dict[u] if u >= 0 else None for u in f["url"].tolist()]
+    return list(zip(starts, ends, titles, urls))
+
+
+def read_parquet(path):
+    _require_pyarrow()
+    table = pq.read_table(path)
+
+    def epoch_ms(name):
+        col = table.column(name)
+        if pa.types.is_timestamp(col.type):
+            col = col.cast(pa.timestamp("ms", tz=col.type.tz))
+        return col.cast(pa.int64()).to_pylist()
+
+    n = table.num_rows
+    urls = table.column("url").to_pylist() if "url" in table.column_names else [None] * n
+    return list(zip(epoch_ms("start"), epoch_ms("end"), table.column("title").to_pylist(), urls))
+
+
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _local_ms(value):
+    return int(datetime.fromisoformat(value.strip()).timestamp() * 1000)
+
+
+def _joined(start_ms, end_ms, title):
+    # CSV/ICS/NDJSON carry tab blocks as "{title} - {url}"
+    t, u = database.split_tab_title(title or "")
+    return start_ms, max(start_ms, end_ms), t, u
+
+
+def read_csv(path):
+    """start,end,title CSV as written by exporter.stream_csv or the older unquoted export."""
+    rows = []
+    with _open_text(path) as f:
+        for rec in csv.reader(f):
+            if len(rec) < 3 or rec[:3] == ["start", "end", "title"]:
+                continue
+            # Older exports did not quote titles, so commas split them into more fields
+            title = ",".join(rec[2:])
+            if title[:1] == "'" and title[1:2] in ("=", "+", "-", "@", "\t", "\r"):
+                title = title[1:]
+            try:
+                rows.append(_joined(_local_ms(rec[0]), _local_ms(rec[1]), title))
+            except ValueError:
+                logger.warning("Skipping CSV row with unparseable times: %r", rec)
+    return rows
+
+
+_ICS_ESCAPE = re.compile(r"\\(.)")
+
+
+def _ics_value_ms(params, value):
+    value = value.strip()
+    if len(value) == 8:
+        # VALUE=DATE: whole (local) day
+        return int(datetime.strptime(value, "%Y%m%d").timestamp() * 1000)
+    if value.endswith("Z"):
+        dt = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+    else:
+        dt = datetime.strptime(value, "%Y%m%dT%H%M%S")
+        tzid = params.get("TZID")
+        if tzid:
+            from zoneinfo import ZoneInfo
+            dt = dt.replace(tzinfo=ZoneInfo(tzid))
+    return int(dt.timestamp() * 1000)
+
+
+def read_ics(path):
+    """VEVENTs of an iCalendar file (DTSTART/DTEND/SUMMARY), folded lines and escapes undone."""
+    with _open_text(path) as f:
+        text = f.read()
+    text = re.sub(r"\r?\n[ \t]", "", text)
+    rows, event = [], None
+    for line in text.splitlines():
+        name, _, value = line.partition(":")
+        name, *param_list = name.split(";")
+        name = name.upper()
+        if name == "BEGIN" and value.strip().upper() == "VEVENT":
+            event = {}
+        elif name == "END" and value.strip().upper() == "VEVENT" and event is not None:
+            if "DTSTART" in event:
+                start_ms = event["DTSTART"]
+                rows.append(_joined(start_ms, event.get("DTEND", start_ms), event.get("SUMMARY", "")))
+            event = None
+        elif event is not None and name in ("DTSTART", "DTEND"):
+            params = dict(p.split("=", 1) for p in param_list if "=" in p)
+            try:
+                event[name] = _ics_value_ms(params, value)
+            except Exception:
+                logger.warning("Skipping unparseable %s: %r", name, value)
+        elif event is not None and name == "SUMMARY":
+            event[name] = _ICS_ESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+    return rows
+
+
+def read_ndjson(path):
+    """Lines as written by exporter.stream_ndjson (/api/events)."""
+    rows = []
+    with _open_text(path) as f:
+        for line in f:
+            if line.strip():
+                ev = json.loads(line)
+                rows.append(_joined(ev["start"], ev["end"], ev["title"]))
+    return rows
+
+
+READERS = {
+    "npz": read_npz,
+    "parquet": read_parquet,
+    "csv": read_csv,
+    "ics": read_ics,
+    "ndjson": read_ndjson,
+}
+
+
+def _new_rows(rows):
+    """Drop rows that are already stored, or repeated within `rows`."""
+    if not rows:
+        return rows
+    lo = min(r[0] for r in rows)
+    hi = max(r[0] for r in rows) + 1
+    seen = {(r[4], r[5], r[6] or "", r[7]) for r in database.iter_blocks(lo, hi, parts=True)}
+    out = []
+    for r in rows:
+        key = (r[0], r[1], r[2] or "", r[3])
+        if key not in seen:
+            seen.add(key)
+            out.append(r)
+    return out
+
+
+def import_file(path):
+    """Import one file (format by extension, optionally .gz for text formats); returns rows added."""
+    base = path[:-3] if path.endswith(".gz") else path
+    fmt = base.rsplit(".", 1)[-1].lower()
+    if fmt not in READERS:
+        raise ValueError(f"cannot import {path!r}: unknown format, expected one of {sorted(READERS)}")
+    rows = _new_rows(READERS[fmt](path))
+    added = database.import_blocks(rows) if rows else 0
+    logger.info("Imported %d new blocks from %s", added, path)
+    return added
+
+
+def _date_arg(value, is_end):
+    d = datetime.fromisoformat(value)
+    # Plain dates are whole days, `to` inclusive (as in the web API)
+    return d + timedelta(days=1) if is_end and len(value) == 10 else d
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    exp = sub.add_parser("export", help="write a range to .npz or .parquet")
+    exp.add_argument("start")
+    exp.add_argument("end")
+    exp.add_argument("path")
+    imp = sub.add_parser("import", help="import .npz/.parquet/.csv/.ics/.ndjson files")
+    imp.add_argument("paths", nargs="+")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        if args.command == "export":
+            n = export_file(_date_arg(args.start, False), _date_arg(args.end, True), args.path)
+            print(f"{n} blocks written to {args.path}")
+        else:
+            for path in args.paths:
+                print(f"{path}: {import_file(path)} blocks imported")
+    finally:
+        database.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
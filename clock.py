@@ -0,0 +1,80 @@
+"""Process-wide clock of the tracking pipeline, replaceable for tests and replays.
+
+The tracker, the tab endpoints, the input sampler and the window cache read
+the time through this module instead of `datetime.now()`/`time.time()`.
+`set_clock(ManualClock(...))` puts them all on virtual time that only moves
+when advanced, so a recorded or synthetic day can be pushed through the real
+pipeline as fast as the CPU allows (see replay.py).
+"""
+import time as _time
+from datetime import datetime
+
+
+class SystemClock:
+    """Real time (the default)."""
+
+    def now(self):
+        return datetime.now()
+
+    def time(self):
+        return _time.time()
+
+    def monotonic(self):
+        return _time.monotonic()
+
+
+class ManualClock:
+    """Virtual time in epoch seconds that moves only via `set`, `advance` or `sleep`."""
+
+    def __init__(self, start=None):
+        self.t = 0.0 if start is None else _seconds(start)
+
+    def now(self):
+        return datetime.fromtimestamp(self.t)
+
+    def time(self):
+        return self.t
+
+    def monotonic(self):
+        return self.t
+
+    def sleep(self, seconds):
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.t += max(0.0, seconds)
+
+    def set(self, when):
+        self.t = _seconds(when)
+
+
+def _seconds(when):
+    return when.timestamp() if isinstance(when, datetime) else float(when)
+
+
+_clock = SystemClock()
+
+
+def get():
+    return _clock
+
+
+def set_clock(clock):
+    """Install `clock` for the whole process; returns the previous one."""
+    global _clock
+    previous, _clock = _clock, clock
+    return previous
+
+
+def now():
+    """Local naive datetime, like datetime.now()."""
+    return _clock.now()
+
+
+def time():
+    """Epoch seconds, like time.time()."""
+    return _clock.time()
+
+
+def monotonic():
+    return _clock.monotonic()
@@ -1,14 +1,50 @@
 # Configuration for activity tracker
 # Intervall in Sekunden in dem die Tabs / aktive Fenster abgefragt werden
 TRACK_INTERVAL_SECONDS = 5
+# Solange keine Eingabe erfolgt, verdoppelt sich das Intervall bis zu diesem Wert;
+# die nächste Eingabe schaltet sofort zurück auf TRACK_INTERVAL_SECONDS.
+IDLE_MAX_INTERVAL_SECONDS = 60
 
 # Größe eines Buckets in Minuten (z.B. 5 für 5-Minuten-Buckets)
 BUCKET_MINUTES = 5
+# Auflösungen (Minuten, Teiler von 60), die parallel aus denselben Samples gebildet
+# und beim Schließen gespeichert werden (BUCKET_MINUTES ist immer dabei).
+BUCKET_RESOLUTIONS = (1, 5, 15, 60)
 # Merge gap in seconds: if two blocks with the same title are closer than or equal
 # to this gap, they will be merged into a single block (default: 5 seconds).
 MERGE_GAP_SECONDS = 5
-# Interval für das Browser-Plugin (ms)
+# Write-behind: der Writer-Thread committet spätestens nach so vielen Operationen
+# bzw. wenn die älteste wartende Operation so viele Sekunden alt ist.
+WRITE_BATCH_SIZE = 200
+WRITE_FLUSH_SECONDS = 1.0
+# Der jeweils letzte (offene) Block wird im Speicher verlängert und spätestens
+# nach so vielen Sekunden in die DB geschrieben (sonst beim Schließen / flush()).
+CHECKPOINT_SECONDS = 30
+# Anzahl Titel/URLs, deren ID prozesslokal (LRU) gecacht wird
+TITLE_CACHE_SIZE = 4096
+# Retention: Rohdaten werden so viele Tage vollständig behalten, ältere Blöcke
+# werden auf BUCKET_MINUTES-Auflösung verdichtet und abgeschlossene Monate in
+# eigene SQLite-Dateien (ARCHIVE_DIR, Standard: "<DB-Name>-archive/") verschoben.
+RAW_RETENTION_DAYS = 30
+ARCHIVE_DIR = None
+# Aktives Fenster: so lange (s) teilen sich alle Aufrufer einen gecachten Wert,
+# bevor das Backend erneut gefragt wird. Der macOS-Helper prüft in diesem Takt.
+WINDOW_CACHE_TTL_SECONDS = 1.0
+WINDOW_HELPER_POLL_SECONDS = 0.5
+# So viele Sekunden Eingabe-Intensität (Tasten/Klicks/Mausweg pro Sekunde) bleiben im Speicher
+ACTIVITY_HISTORY_SECONDS = 2 * 3600
+# Heartbeat-Intervall des Browser-Plugins (ms, HEARTBEAT_MS in friefoxPlugin/background.js)
 TAB_SEND_INTERVAL_MS = 10000
+# Maximale Anzahl Tab-Events pro POST /tabs/batch
+TAB_BATCH_MAX_EVENTS = 500
+# Puffer zwischen Tab-Empfang und Tracker: höchstens so viele Events (wie MAX_BACKLOG der Extension).
+# Ist er voll: "reject" (503, die Extension versucht es später erneut) oder "drop_oldest"
+TAB_BUFFER_CAPACITY = 5000
+TAB_BUFFER_POLICY = "reject"
+# Live-Updates (/api/live): so viele Nachrichten darf ein Client im Rückstand sein,
+# danach bekommt er ein "reset" und lädt neu; Keepalive-Intervall in Sekunden
+LIVE_QUEUE_SIZE = 100
+LIVE_HEARTBEAT_SECONDS = 15
 
 # Pfad zur SQLite Datenbank (optional)
 DB_PATH = "activity.db"
\ No newline at end of file
@@ -1,42 +1,780 @@
 import sqlite3
+import atexit
+import os
+import queue
+import threading
+import time
+import heapq
+import re
+from collections import OrderedDict
+from concurrent.futures import Future
+from urllib.request import pathname2url
 from datetime import datetime, timedelta
 import logging
-from config import DB_PATH, MERGE_GAP_SECONDS
+from config import DB_PATH, MERGE_GAP_SECONDS, WRITE_BATCH_SIZE, WRITE_FLUSH_SECONDS, CHECKPOINT_SECONDS, TITLE_CACHE_SIZE, ARCHIVE_DIR
 
 # Logging
 logger = logging.getLogger(__name__)
 if not logging.getLogger().handlers:
     logging.basicConfig(level=logging.INFO)
 
-# DB connection (initialised via DB_PATH or set_db_path)
-conn = None
-cur = None
+# DB connections (initialised via DB_PATH or set_db_path): all writes go through
+# `_writer`, which owns the only write connection; reads use `reader()`.
+_writer = None
+_readers = None
+_db_path = None
+# Cached list of (month_start_ms, month_end_ms, path) archive files, see archived_months()
+_archives = None
+# Bumped by the writer after each commit that changed block rows; the past
+# version only when the change reached before the current local day. See blocks_version()
+_data_version = 0
+_past_version = 0
+# Callbacks for committed block changes, see subscribe()
+_listeners = []
 
-def _init_db(path=None):
-    global conn, cur
-    if conn:
+def _to_ms(v):
+    """Convert a datetime or ISO string to epoch milliseconds (local time), or None."""
+    if isinstance(v, datetime):
+        dt = v
+    else:
         try:
-            conn.close()
+            dt = datetime.fromisoformat(str(v).strip())
         except Exception:
-            pass
-    dbp = path or DB_PATH
-    conn = sqlite3.connect(dbp, check_same_thread=False)
-    cur = conn.cursor()
-    # Tabelle für Blöcke, falls noch nicht vorhanden
-    cur.execute("""
-    CREATE TABLE IF NOT EXISTS blocks (
-        id INTEGER PRIMARY KEY,
-        start TEXT,
-        end TEXT,
-        title TEXT
+            return None
+    return int(dt.timestamp() * 1000)
+
+
+def _day_bounds(date):
+    """Return [start_ms, end_ms) for the local calendar day `date` (YYYY-MM-DD or date)."""
+    d = datetime.fromisoformat(str(date)[:10])
+    return _to_ms(d), _to_ms(d + timedelta(days=1))
+
+
+def _migrate_epoch_columns(c):
+    # Schema v1: integer epoch (ms) columns with a B-tree index so day and range
+    # lookups are index range scans instead of LIKE scans over the TEXT column.
+    cols = {r[1] for r in c.execute("PRAGMA table_info(blocks)")}
+    if "start_ms" not in cols:
+        c.execute("ALTER TABLE blocks ADD COLUMN start_ms INTEGER")
+    if "end_ms" not in cols:
+        c.execute("ALTER TABLE blocks ADD COLUMN end_ms INTEGER")
+    rows = c.execute("SELECT id, start, end FROM blocks WHERE start_ms IS NULL OR end_ms IS NULL").fetchall()
+    c.executemany(
+        "UPDATE blocks SET start_ms = ?, end_ms = ? WHERE id = ?",
+        [(_to_ms(s), _to_ms(e), i) for i, s, e in rows],
+    )
+    c.execute("CREATE INDEX IF NOT EXISTS idx_blocks_start_ms ON blocks(start_ms)")
+    if rows:
+        logger.info("Backfilled epoch columns for %d blocks", len(rows))
+
+
+def split_tab_title(title):
+    """Split a legacy "{title} - {url}" tab title into (title, url); url is None otherwise."""
+    head, sep, tail = title.rpartition(" - ")
+    if sep and "://" in tail:
+        return head, tail
+    return title, None
+
+
+def _migrate_title_dictionary(c):
+    # Schema v2: titles and URLs are interned into lookup tables; rows live in
+    # `block_data` with integer keys and `blocks` becomes a view that joins the
+    # strings back, so readers keep seeing (id, start, end, title, ...).
+    c.execute("CREATE TABLE IF NOT EXISTS titles (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)")
+    c.execute("CREATE TABLE IF NOT EXISTS urls (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE)")
+    c.execute(BLOCK_DATA_SCHEMA)
+    mapping = {}
+    for (title,) in c.execute("SELECT DISTINCT title FROM blocks WHERE title IS NOT NULL").fetchall():
+        t, u = split_tab_title(title)
+        c.execute("INSERT OR IGNORE INTO titles (text) VALUES (?)", (t,))
+        title_id = c.execute("SELECT id FROM titles WHERE text = ?", (t,)).fetchone()[0]
+        url_id = None
+        if u is not None:
+            c.execute("INSERT OR IGNORE INTO urls (text) VALUES (?)", (u,))
+            url_id = c.execute("SELECT id FROM urls WHERE text = ?", (u,)).fetchone()[0]
+        mapping[title] = (title_id, url_id)
+    rows = c.execute("SELECT id, start, end, start_ms, end_ms, title FROM blocks").fetchall()
+    c.executemany(
+        "INSERT INTO block_data (id, start, end, start_ms, end_ms, title_id, url_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(i, s, e, s_ms, e_ms) + mapping.get(t, (None, None)) for i, s, e, s_ms, e_ms, t in rows],
+    )
+    c.execute("DROP TABLE blocks")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_blocks_start_ms ON block_data(start_ms)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_block_data_title ON block_data(title_id)")
+    c.execute("""
+    CREATE VIEW IF NOT EXISTS blocks AS
+    SELECT b.id AS id, b.start AS start, b.end AS end,
+           CASE WHEN u.text IS NULL THEN t.text ELSE t.text || ' - ' || u.text END AS title,
+           b.start_ms AS start_ms, b.end_ms AS end_ms, b.title_id AS title_id, b.url_id AS url_id
+    FROM block_data b
+    LEFT JOIN titles t ON t.id = b.title_id
+    LEFT JOIN urls u ON u.id = b.url_id
+    """)
+    if rows:
+        logger.info("Moved %d blocks onto %d interned titles", len(rows), len(mapping))
+
+
+def _rollup_add(c, spans, sign=1):
+    """Add (or with sign=-1 subtract) block durations to the hourly/daily rollups.
+
+    `spans` is an iterable of (title_id, start_ms, end_ms). Durations are split
+    at local hour and day boundaries and stored in milliseconds.
+    """
+    hourly = {}
+    daily = {}
+    for title_id, start_ms, end_ms in spans:
+        t = start_ms
+        while t < end_ms:
+            dt = datetime.fromtimestamp(t / 1000)
+            hour = dt.replace(minute=0, second=0, microsecond=0)
+            hour_ms = _to_ms(hour)
+            # Guard against DST folds where the next local hour maps back in time
+            seg_end = min(end_ms, max(_to_ms(hour + timedelta(hours=1)), t + 1))
+            day_ms = _to_ms(hour.replace(hour=0))
+            hourly[(hour_ms, title_id)] = hourly.get((hour_ms, title_id), 0) + seg_end - t
+            daily[(day_ms, title_id)] = daily.get((day_ms, title_id), 0) + seg_end - t
+            t = seg_end
+    c.executemany(
+        "INSERT INTO rollup_hourly (hour_ms, title_id, ms) VALUES (?, ?, ?) "
+        "ON CONFLICT(hour_ms, title_id) DO UPDATE SET ms = ms + excluded.ms",
+        [(h, tid, sign * ms) for (h, tid), ms in hourly.items()],
+    )
+    c.executemany(
+        "INSERT INTO rollup_daily (day_ms, title_id, ms) VALUES (?, ?, ?) "
+        "ON CONFLICT(day_ms, title_id) DO UPDATE SET ms = ms + excluded.ms",
+        [(d, tid, sign * ms) for (d, tid), ms in daily.items()],
+    )
+
+
+def _migrate_rollups(c):
+    # Schema v3: per-title hourly and daily totals, maintained on insert/merge
+    # so summaries over weeks or years never touch the raw blocks.
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_hourly (
+        hour_ms INTEGER NOT NULL,
+        title_id INTEGER NOT NULL,
+        ms INTEGER NOT NULL,
+        PRIMARY KEY (hour_ms, title_id)
+    ) WITHOUT ROWID
+    """)
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS rollup_daily (
+        day_ms INTEGER NOT NULL,
+        title_id INTEGER NOT NULL,
+        ms INTEGER NOT NULL,
+        PRIMARY KEY (day_ms, title_id)
+    ) WITHOUT ROWID
+    """)
+    _rollup_add(c, c.execute(
+        "SELECT title_id, start_ms, end_ms FROM block_data WHERE end_ms > start_ms AND title_id IS NOT NULL"
+    ).fetchall())
+
+
+def _migrate_meta(c):
+    # Schema v4: key/value state for maintenance jobs (e.g. the downsampling watermark)
+    c.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value)")
+
+
+def _migrate_fts(c):
+    # Schema v5: trigram FTS5 index over the title and URL dictionaries, kept in
+    # sync by triggers. Trigram phrases match arbitrary substrings, so the index
+    # serves both ranked search and the trim helper's "title contains" lookup.
+    c.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS text_fts USING fts5(text, kind UNINDEXED, ref_id UNINDEXED, tokenize='trigram')"
     )
+    for table, kind in (("titles", "t"), ("urls", "u")):
+        c.execute(f"INSERT INTO text_fts (text, kind, ref_id) SELECT text, '{kind}', id FROM {table}")
+        c.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO text_fts (text, kind, ref_id) VALUES (new.text, '{kind}', new.id);
+        END
+        """)
+    # Block lookups by matched title/URL within a time range
+    c.execute("DROP INDEX IF EXISTS idx_block_data_title")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_block_data_title ON block_data(title_id, start_ms)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_block_data_url ON block_data(url_id, start_ms)")
+
+
+def _migrate_buckets(c):
+    # Schema v6: closed tracker buckets per resolution (winner and dwell seconds),
+    # so zoomed-out views read precomputed winners instead of re-aggregating.
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS bucket_winners (
+        minutes INTEGER NOT NULL,
+        start_ms INTEGER NOT NULL,
+        title_id INTEGER NOT NULL,
+        seconds REAL NOT NULL,
+        total_seconds REAL NOT NULL,
+        PRIMARY KEY (minutes, start_ms)
+    ) WITHOUT ROWID
     """)
-    conn.commit()
+
+
+def _migrate_bucket_activity(c):
+    # Schema v7: input intensity (keystrokes, clicks, pointer movement) per closed bucket
+    for col in ("keys", "clicks", "movement"):
+        c.execute(f"ALTER TABLE bucket_winners ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+
+
+# Ordered schema migrations; PRAGMA user_version records how many have been applied.
+MIGRATIONS = [
+    _migrate_epoch_columns,
+    _migrate_title_dictionary,
+    _migrate_rollups,
+    _migrate_meta,
+    _migrate_fts,
+    _migrate_buckets,
+    _migrate_bucket_activity,
+]
+
+# Schema of a block_data table, shared by the hot database and monthly archives
+BLOCK_DATA_SCHEMA = """
+CREATE TABLE IF NOT EXISTS block_data (
+    id INTEGER PRIMARY KEY,
+    start TEXT,
+    end TEXT,
+    start_ms INTEGER,
+    end_ms INTEGER,
+    title_id INTEGER,
+    url_id INTEGER
+)
+"""
+
+
+class _Interner:
+    """Maps strings to ids in a lookup table, with a process-local LRU cache.
+
+    Only used from the writer thread; `clear()` must be called when a
+    transaction that may have created ids is rolled back.
+    """
+
+    def __init__(self, table, maxsize=TITLE_CACHE_SIZE):
+        self.table = table
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    def id_for(self, c, text):
+        if text is None:
+            return None
+        try:
+            self.cache.move_to_end(text)
+            return self.cache[text]
+        except KeyError:
+            pass
+        row = c.execute(f"SELECT id FROM {self.table} WHERE text = ?", (text,)).fetchone()
+        if row:
+            ident = row[0]
+        else:
+            c.execute(f"INSERT INTO {self.table} (text) VALUES (?)", (text,))
+            ident = c.lastrowid
+        self.cache[text] = ident
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return ident
+
+    def clear(self):
+        self.cache.clear()
+
+
+def _to_dt(v):
+    if isinstance(v, datetime):
+        return v
+    try:
+        return datetime.fromisoformat(str(v))
+    except Exception:
+        return None
+
+
+class _OpenBlock:
+    __slots__ = ("id", "title_id", "url_id", "title", "start", "start_ms", "end", "end_ms", "persisted_end_ms")
+
+    def __init__(self, id, title_id, url_id, title, start, start_ms, end, end_ms):
+        self.id = id
+        # Title as readers see it (see the blocks view), for change notifications
+        self.title = title
+        self.title_id = title_id
+        self.url_id = url_id
+        self.start = start
+        self.start_ms = start_ms
+        self.end = end
+        self.end_ms = end_ms
+        self.persisted_end_ms = end_ms if id is not None else None
+
+
+class _Coalescer:
+    """Keeps the most recent block in memory and extends it while the title repeats.
+
+    Merging is O(1) and touches SQLite only when the open block closes, at a
+    checkpoint (every CHECKPOINT_SECONDS) or on flush. Only used from the
+    writer thread.
+    """
+
+    def __init__(self):
+        self.open = None
+        self.titles = _Interner("titles")
+        self.urls = _Interner("urls")
+        self._last_checkpoint = time.monotonic()
+        # Smallest start_ms of block rows written since the last take_touched()
+        self.touched = None
+        # Block inserts/extensions since the last take_changes(), see subscribe()
+        self.changes = []
+
+    def _changed(self, op, id, start_ms, end_ms, title):
+        self.changes.append({"op": op, "id": id, "start": start_ms, "end": end_ms, "title": title})
+
+    def take_changes(self):
+        changes, self.changes = self.changes, []
+        return changes
+
+    def touch(self, start_ms):
+        """Record that block rows starting at `start_ms` (0: anywhere) were written."""
+        if self.touched is None or start_ms < self.touched:
+            self.touched = start_ms
+
+    def take_touched(self):
+        touched, self.touched = self.touched, None
+        return touched
+
+    def load(self, c):
+        """Seed the open block from the latest persisted row by time (one read at startup).
+
+        Not by id: downsampled and imported rows get new ids for old times.
+        """
+        self.open = None
+        last = c.execute(
+            "SELECT b.id, b.start, b.end, b.start_ms, b.end_ms, b.title_id, b.url_id, "
+            "CASE WHEN u.text IS NULL THEN t.text ELSE t.text || ' - ' || u.text END "
+            "FROM block_data b LEFT JOIN titles t ON t.id = b.title_id LEFT JOIN urls u ON u.id = b.url_id "
+            "ORDER BY b.start_ms DESC, b.id DESC LIMIT 1"
+        ).fetchone()
+        if last and last[4] is not None:
+            last_id, last_s, last_e, last_s_ms, last_e_ms, title_id, url_id, title = last
+            self.open = _OpenBlock(last_id, title_id, url_id, title, last_s, last_s_ms, _to_dt(last_e), last_e_ms)
+
+    def reset_cache(self):
+        self.titles.clear()
+        self.urls.clear()
+
+    @property
+    def dirty(self):
+        o = self.open
+        return o is not None and (o.id is None or o.end_ms != o.persisted_end_ms)
+
+    def due(self):
+        return self.dirty and time.monotonic() - self._last_checkpoint >= CHECKPOINT_SECONDS
+
+    def add(self, c, start, end, title, url=None):
+        """Merge the block into the open one or close it and open a new one.
+
+        Merge rule: same title (and URL) and `start` overlaps or is within
+        MERGE_GAP_SECONDS of the open block's end; the end becomes the max of both ends.
+        """
+        s_dt = _to_dt(start)
+        e_dt = _to_dt(end)
+        t = str(title)
+        title_id = self.titles.id_for(c, t)
+        url_id = self.urls.id_for(c, url)
+        o = self.open
+        if s_dt and e_dt:
+            s_ms = int(s_dt.timestamp() * 1000)
+            e_ms = int(e_dt.timestamp() * 1000)
+            # Merge when same title and windows overlap or are within MERGE_GAP_SECONDS
+            if (o is not None and o.title_id == title_id and o.url_id == url_id
+                    and s_ms - o.end_ms <= MERGE_GAP_SECONDS * 1000):
+                if e_ms > o.end_ms:
+                    o.end, o.end_ms = e_dt, e_ms
+                logger.debug("Merged block title=%s new_end=%s", t, o.end)
+                return
+            self.checkpoint(c)
+            display = t if url is None else f"{t} - {url}"
+            self.open = _OpenBlock(None, title_id, url_id, display, s_dt.isoformat(), s_ms, e_dt, e_ms)
+            return
+
+        # Unparseable timestamps can't be merged: persist as-is and start fresh
+        self.checkpoint(c)
+        self.open = None
+        s = start.isoformat() if hasattr(start, "isoformat") else str(start)
+        e = end.isoformat() if hasattr(end, "isoformat") else str(end)
+        s_ms, e_ms = _to_ms(s), _to_ms(e)
+        c.execute(
+            "INSERT INTO block_data (start, end, start_ms, end_ms, title_id, url_id) VALUES (?, ?, ?, ?, ?, ?)",
+            (s, e, s_ms, e_ms, title_id, url_id),
+        )
+        if s_ms is not None and e_ms is not None:
+            _rollup_add(c, [(title_id, s_ms, e_ms)])
+        self.touch(s_ms or 0)
+        if s_ms is not None and e_ms is not None:
+            self._changed("insert", c.lastrowid, s_ms, e_ms, t if url is None else f"{t} - {url}")
+        logger.info("Inserted block id=%s title=%s start=%s end=%s", c.lastrowid, t, s, e)
+
+    def checkpoint(self, c):
+        """Persist the open block if it changed since the last write."""
+        self._last_checkpoint = time.monotonic()
+        o = self.open
+        if o is None:
+            return
+        if o.id is None:
+            c.execute(
+                "INSERT INTO block_data (start, end, start_ms, end_ms, title_id, url_id) VALUES (?, ?, ?, ?, ?, ?)",
+                (o.start, o.end.isoformat(), o.start_ms, o.end_ms, o.title_id, o.url_id),
+            )
+            o.id = c.lastrowid
+            _rollup_add(c, [(o.title_id, o.start_ms, o.end_ms)])
+            logger.info("Inserted block id=%s title_id=%s start=%s end=%s", o.id, o.title_id, o.start, o.end.isoformat())
+        elif o.end_ms != o.persisted_end_ms:
+            c.execute("UPDATE block_data SET end = ?, end_ms = ? WHERE id = ?", (o.end.isoformat(), o.end_ms, o.id))
+            _rollup_add(c, [(o.title_id, o.persisted_end_ms, o.end_ms)])
+            logger.info("Extended block id=%s title_id=%s new_end=%s", o.id, o.title_id, o.end.isoformat())
+        else:
+            return
+        self.touch(o.start_ms)
+        self._changed("insert" if o.persisted_end_ms is None else "extend", o.id, o.start_ms, o.end_ms, o.title)
+        o.persisted_end_ms = o.end_ms
+
+
+class _Writer:
+    """Single write-behind thread that applies queued operations in batched transactions.
+
+    Operations are `fn(cursor, *args)` callables. The thread groups whatever is
+    pending and commits once per batch; a batch is closed when it holds
+    WRITE_BATCH_SIZE operations, when its oldest operation is WRITE_FLUSH_SECONDS
+    old, or when `flush()` or a caller waiting in `call()` asks for it. The open block held by the coalescer is
+    written at flush and checkpoint time.
+    """
+
+    _FLUSH = object()
+
+    def __init__(self, path):
+        # Autocommit mode: the writer issues BEGIN/COMMIT itself, one pair per batch
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.queue = queue.Queue()
+        self.coalescer = _Coalescer()
+        self.coalescer.load(self.conn.cursor())
+        self.commits = 0
+        self._stopped = False
+        # Orders submit() against stop(), so nothing is queued behind the final None
+        self._lock = threading.Lock()
+        self.thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, *args, urgent=False) -> Future:
+        """Queue `fn(cursor, *args)`; `urgent` closes the batch right after it.
+
+        Raises RuntimeError once the writer is stopped.
+        """
+        fut = Future()
+        with self._lock:
+            if self._stopped:
+                raise RuntimeError("database writer is stopped")
+            self.queue.put((fn, args, fut, urgent))
+        return fut
+
+    def call(self, fn, *args):
+        """Run `fn(cursor, *args)` on the writer thread and wait for the committed result."""
+        return self.submit(fn, *args, urgent=True).result()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been committed."""
+        fut = Future()
+        with self._lock:
+            if self._stopped:
+                return
+            self.queue.put((self._FLUSH, (), fut, True))
+        fut.result(timeout)
+
+    def stop(self):
+        if self._stopped:
+            return
+        self.flush()
+        with self._lock:
+            self._stopped = True
+            self.queue.put(None)
+        self.thread.join(timeout=5)
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+    def _run(self):
+        while True:
+            try:
+                item = self.queue.get(timeout=CHECKPOINT_SECONDS)
+            except queue.Empty:
+                # Idle: make sure a long-running open block reaches disk
+                if self.coalescer.dirty:
+                    self._apply([])
+                continue
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + WRITE_FLUSH_SECONDS
+            while not batch[-1][3] and len(batch) < WRITE_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    nxt = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self.queue.put(None)
+                    break
+                batch.append(nxt)
+            self._apply(batch)
+
+    def _apply(self, batch):
+        c = self.conn.cursor()
+        c.execute("BEGIN")
+        results = []
+        checkpoint = not batch
+        for fn, args, fut, _ in batch:
+            if fn is self._FLUSH:
+                checkpoint = True
+                results.append((fut, None, None))
+                continue
+            # Savepoint per operation so one failing write doesn't take the batch down
+            c.execute("SAVEPOINT op")
+            try:
+                res = fn(c, *args)
+                c.execute("RELEASE op")
+                results.append((fut, res, None))
+            except Exception as e:
+                c.execute("ROLLBACK TO op")
+                c.execute("RELEASE op")
+                # ids handed out inside the rolled back savepoint are gone
+                self.coalescer.reset_cache()
+                logger.exception("Write operation %s failed", getattr(fn, "__name__", fn))
+                results.append((fut, None, e))
+        if checkpoint or self.coalescer.due():
+            self.coalescer.checkpoint(c)
+        try:
+            c.execute("COMMIT")
+            self.commits += 1
+            touched = self.coalescer.take_touched()
+            if touched is not None:
+                _blocks_changed(touched)
+            changes = self.coalescer.take_changes()
+            if changes:
+                _publish(changes)
+        except Exception as e:
+            logger.exception("Commit of %d queued writes failed", len(batch))
+            try:
+                c.execute("ROLLBACK")
+            except Exception:
+                pass
+            self.coalescer.reset_cache()
+            self.coalescer.take_touched()
+            self.coalescer.take_changes()
+            results = [(fut, None, e) for fut, _, _ in results]
+        for fut, res, err in results:
+            if err is not None:
+                fut.set_exception(err)
+            else:
+                fut.set_result(res)
+
+
+def _blocks_changed(start_ms):
+    global _data_version, _past_version
+    _data_version += 1
+    if start_ms < _day_bounds(datetime.now())[0]:
+        _past_version += 1
+
+
+def _publish(changes):
+    for fn in list(_listeners):
+        try:
+            fn(changes)
+        except Exception:
+            logger.exception("Block change listener failed")
+
+
+def _ro_uri(path):
+    return "file:" + pathname2url(os.path.abspath(path)) + "?mode=ro"
+
+
+class _Readers:
+    """Hands out one read-only connection per thread (uvicorn workers, tracker, ...).
+
+    Readers never share a cursor and, with WAL, neither block nor get blocked
+    by the writer thread. Monthly archive files are attached on demand.
+    """
+
+    # SQLite allows 10 attached databases by default; keep some headroom
+    MAX_ATTACHED = 8
+
+    def __init__(self, path):
+        self.uri = _ro_uri(path)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.conns = []
+
+    def get(self):
+        c = getattr(self.local, "conn", None)
+        if c is None:
+            c = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            self.local.conn = c
+            with self.lock:
+                self.conns.append(c)
+        return c
+
+    def attach(self, path):
+        """Attach `path` read-only to this thread's connection and return its schema name."""
+        c = self.get()
+        attached = getattr(self.local, "attached", None)
+        if attached is None:
+            attached = self.local.attached = OrderedDict()
+        if path in attached:
+            attached.move_to_end(path)
+            return attached[path]
+        if len(attached) >= self.MAX_ATTACHED:
+            _, old = attached.popitem(last=False)
+            c.execute(f"DETACH DATABASE {old}")
+            name = old
+        else:
+            name = f"arch{len(attached)}"
+        c.execute(f"ATTACH DATABASE ? AS {name}", (_ro_uri(path),))
+        attached[path] = name
+        return name
+
+    def close(self):
+        with self.lock:
+            conns, self.conns = self.conns, []
+        for c in conns:
+            try:
+                c.close()
+            except Exception:
+                pass
+
+
+def _migrate(path):
+    c = sqlite3.connect(path)
+    try:
+        c.execute("PRAGMA journal_mode=WAL")
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version == 0:
+            # Tabelle für Blöcke (Ausgangsschema), falls noch nicht vorhanden
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS blocks (
+                id INTEGER PRIMARY KEY,
+                start TEXT,
+                end TEXT,
+                title TEXT
+            )
+            """)
+        for i, migrate in enumerate(MIGRATIONS[version:], start=version + 1):
+            migrate(c)
+            c.execute(f"PRAGMA user_version = {i}")
+            logger.info("Migrated database schema to version %d", i)
+        c.commit()
+    finally:
+        c.close()
+
+
+def _init_db(path=None):
+    global _writer, _readers, _db_path
+    close()
+    dbp = path or DB_PATH
+    _db_path = dbp
+    refresh_archives()
+    _migrate(dbp)
+    _writer = _Writer(dbp)
+    _readers = _Readers(dbp)
+    # Anything derived from the previous database is stale
+    _blocks_changed(0)
+
+
+def blocks_version():
+    """(data_version, past_version) of the committed block rows.
+
+    `data_version` changes with every commit that wrote blocks; `past_version`
+    only when one of them started before today. Results computed from the
+    blocks of a finished day stay valid while `past_version` is unchanged.
+    """
+    return _data_version, _past_version
+
+
+def subscribe(fn):
+    """Call `fn(changes)` on the writer thread after each commit that wrote blocks.
+
+    `changes` is a list of {"op": "insert" | "extend", "id", "start", "end"
+    (epoch ms), "title"} dicts, or contains {"op": "reset"} after maintenance
+    jobs that may have rewritten anything. Keep `fn` short; it delays the writer.
+    """
+    _listeners.append(fn)
+
+
+def unsubscribe(fn):
+    try:
+        _listeners.remove(fn)
+    except ValueError:
+        pass
+
+
+def reader():
+    """Return the calling thread's read-only connection."""
+    return _readers.get()
+
+
+def archive_dir():
+    """Directory holding the monthly archive files of the current database."""
+    return ARCHIVE_DIR or os.path.splitext(os.path.abspath(_db_path))[0] + "-archive"
+
+
+def archive_path(month_start):
+    """Archive file for the month starting at `month_start` (datetime)."""
+    return os.path.join(archive_dir(), f"activity-{month_start:%Y-%m}.db")
+
+
+_ARCHIVE_RE = re.compile(r"^activity-(\d{4})-(\d{2})\.db$")
+
+
+def refresh_archives():
+    """Forget the cached archive listing (after archive files were added)."""
+    global _archives
+    _archives = None
+
+
+def archived_months():
+    """Return [(month_start_ms, month_end_ms, path)] for all archive files, oldest first."""
+    global _archives
+    if _archives is None:
+        found = []
+        try:
+            names = os.listdir(archive_dir())
+        except OSError:
+            names = []
+        for name in names:
+            m = _ARCHIVE_RE.match(name)
+            if m:
+                start = datetime(int(m.group(1)), int(m.group(2)), 1)
+                end = next_month(start)
+                found.append((_to_ms(start), _to_ms(end), os.path.join(archive_dir(), name)))
+        _archives = sorted(found)
+    return _archives
+
+
+def next_month(d):
+    return datetime(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def flush(timeout=None):
+    """Wait until all queued writes are committed (for shutdown and tests)."""
+    if _writer:
+        _writer.flush(timeout)
+
+
+def close():
+    """Flush pending writes, stop the writer thread and close all read connections."""
+    if _writer:
+        _writer.stop()
+    if _readers:
+        _readers.close()
 
 # initialize at import time with config DB_PATH
 _init_db(DB_PATH)
-
-from datetime import datetime, timedelta
+atexit.register(close)
 
 # Funktion, um Block-Daten zu speichern
 def set_db_path(path: str):
@@ -49,109 +787,325 @@ def insert_block(start, end, title):
     """Insert a block or merge with the latest block if titles match and windows touch/overlap.
 
     Behavior:
-    - If the latest block in DB has the same title and its end time overlaps or is within MERGE_GAP_SECONDS seconds
-      of `start` (i.e., gap <= MERGE_GAP_SECONDS), update that block's end to the max of the two ends instead of inserting a new row.
-    - Otherwise, insert a new block row.
-    Logging: emits INFO when merging or inserting.
-    """
-    # Normalize to datetime objects for comparison
-    def to_dt(v):
-        if isinstance(v, datetime):
-            return v
-        try:
-            return datetime.fromisoformat(str(v))
-        except Exception:
-            return None
-
-    s_dt = to_dt(start)
-    e_dt = to_dt(end)
-    t = str(title)
-
-    # Get latest block
-    last = cur.execute("SELECT id, start, end, title FROM blocks ORDER BY id DESC LIMIT 1").fetchone()
-    if last and s_dt and e_dt:
-        last_id, last_s, last_e, last_t = last
-        try:
-            last_end_dt = datetime.fromisoformat(last_e)
-        except Exception:
-            last_end_dt = None
-
-        # Merge when same title and windows overlap or are within MERGE_GAP_SECONDS
-        if last_t == t and last_end_dt is not None:
-            gap = (s_dt - last_end_dt).total_seconds()
-            if gap <= MERGE_GAP_SECONDS:
-                new_end = max(last_end_dt, e_dt)
-                cur.execute("UPDATE blocks SET end = ? WHERE id = ?", (new_end.isoformat(), last_id))
-                conn.commit()
-                logger.info("Merged block id=%s title=%s new_end=%s (gap=%.2fs, threshold=%ss)", last_id, t, new_end.isoformat(), gap, MERGE_GAP_SECONDS)
-                return
-
-    # Fallback: insert a new row
-    s = start.isoformat() if hasattr(start, "isoformat") else str(start)
-    e = end.isoformat() if hasattr(end, "isoformat") else str(end)
-    cur.execute("""
-    INSERT INTO blocks (start, end, title)
-    VALUES (?, ?, ?)
-    """, (s, e, t))
-    conn.commit()
-    last_id = cur.lastrowid
-    logger.info("Inserted block id=%s title=%s start=%s end=%s", last_id, t, s, e)
+    - If the latest block has the same title and its end time overlaps or is within MERGE_GAP_SECONDS seconds
+      of `start` (i.e., gap <= MERGE_GAP_SECONDS), its end is extended to the max of the two ends instead of adding a new row.
+    - Otherwise, a new block is started.
+    The latest block is kept in memory by the writer's coalescer; this call only
+    queues the sample and returns. Call `flush()` to wait until it is committed.
+    """
+    _writer.submit(_writer.coalescer.add, start, end, title)
 
 # Funktion, um Tab-Daten zu speichern (neue Funktion)
 def insert_tab_block(ts, title, url):
+    """Store a tab ping as a very short block (start == end == ts).
+
+    Title and URL are interned separately; readers see them joined as
+    "{title} - {url}". Uses insert_block's merge logic.
+    """
     # Coerce ts to datetime if possible
     s_dt = ts if isinstance(ts, datetime) else None
+    _writer.submit(_writer.coalescer.add, s_dt or str(ts), s_dt or str(ts), title, url)
 
-    # Build the title we store for tabs
-    t = f"{title} - {url}"
+def insert_bucket(minutes, start, title, seconds, total_seconds, activity=(0, 0, 0)):
+    """Queue a closed bucket's winner for the `minutes` resolution (replaces an existing row).
 
-    # Treat tab events as a very short block (start == end == ts). Use insert_block's merge logic
-    insert_block(s_dt or str(ts), s_dt or str(ts), t)
+    `activity` is the (keys, clicks, movement_px) input intensity inside the bucket.
+    """
+    _writer.submit(_insert_bucket, minutes, _to_ms(start), str(title), seconds, total_seconds, tuple(activity))
+
+
+def _insert_bucket(c, minutes, start_ms, title, seconds, total_seconds, activity):
+    c.execute(
+        "INSERT OR REPLACE INTO bucket_winners (minutes, start_ms, title_id, seconds, total_seconds, keys, clicks, movement) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (minutes, start_ms, _writer.coalescer.titles.id_for(c, title), seconds, total_seconds) + activity,
+    )
+
+
+def get_buckets(minutes, start, end):
+    """Return (start_ms, title, seconds, total_seconds, keys, clicks, movement) winners
+    of `minutes`-buckets starting in [start, end)."""
+    s_ms = start if isinstance(start, int) else _to_ms(start)
+    e_ms = end if isinstance(end, int) else _to_ms(end)
+    return reader().execute(
+        "SELECT b.start_ms, t.text, b.seconds, b.total_seconds, b.keys, b.clicks, b.movement FROM bucket_winners b "
+        "JOIN titles t ON t.id = b.title_id WHERE b.minutes = ? AND b.start_ms >= ? AND b.start_ms < ? "
+        "ORDER BY b.start_ms",
+        (minutes, s_ms, e_ms)
+    ).fetchall()
 
 # Funktion, um Blöcke für einen bestimmten Tag zu holen
 def get_blocks_for_day(date):
-    """Return rows for the given date in chronological order.
+    """Return (id, start, end, title) rows for the given date in chronological order.
 
-    Uses ISO-like start prefix matching and orders by start time ascending so
-    callers receive blocks in time order.
+    Served from the `start_ms` index as a range scan over the local day.
     """
-    return cur.execute(
-        "SELECT * FROM blocks WHERE start LIKE ? ORDER BY start ASC",
-        (f"{date}%",)
+    return get_blocks_between(*_day_bounds(date))
+
+
+def _select_blocks(c, schema, s_ms, e_ms, after=None, limit=-1, parts=False):
+    # `after` = (start_ms, id) keyset: only rows ordered after it. The range
+    # bound is raised to a_ms too, so the index scan starts at the keyset.
+    a_ms, a_id = after or (s_ms - 1, 0)
+    return c.execute(
+        "SELECT b.id, b.start, b.end, "
+        "CASE WHEN u.text IS NULL THEN t.text ELSE t.text || ' - ' || u.text END, b.start_ms, b.end_ms"
+        + (", t.text, u.text " if parts else " ") +
+        f"FROM {schema}.block_data b "
+        "LEFT JOIN main.titles t ON t.id = b.title_id LEFT JOIN main.urls u ON u.id = b.url_id "
+        "WHERE b.start_ms >= ? AND b.start_ms < ? AND (b.start_ms, b.id) > (?, ?) "
+        "ORDER BY b.start_ms ASC, b.id ASC LIMIT ?",
+        (max(s_ms, a_ms), e_ms, a_ms, a_id, limit)
     ).fetchall()
 
 
+def get_blocks_between(start, end):
+    """Return (id, start, end, title) rows with start in [start, end), ordered by start.
+
+    `start`/`end` may be epoch milliseconds, datetimes or ISO strings. Archived
+    months overlapping the range are attached and merged in transparently.
+    """
+    s_ms = start if isinstance(start, int) else _to_ms(start)
+    e_ms = end if isinstance(end, int) else _to_ms(end)
+    c = reader()
+    parts = [_select_blocks(c, "main", s_ms, e_ms)]
+    for m_start, m_end, path in archived_months():
+        if m_start < e_ms and m_end > s_ms:
+            parts.append(_select_blocks(c, _readers.attach(path), s_ms, e_ms))
+    if len(parts) == 1:
+        rows = parts[0]
+    else:
+        rows = heapq.merge(*parts, key=lambda r: (r[4], r[0]))
+    return [r[:4] for r in rows]
+
+
+def _iter_source(source, s_ms, e_ms, after, chunk_size, parts):
+    while True:
+        # Looked up per chunk: a streaming consumer may resume us on another thread
+        c = reader()
+        schema = "main" if source is None else _readers.attach(source)
+        rows = _select_blocks(c, schema, s_ms, e_ms, after, chunk_size, parts)
+        yield from rows
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1][4], rows[-1][0])
+
+
+def iter_blocks(start, end, after=None, chunk_size=1000, parts=False):
+    """Yield (id, start, end, title, start_ms, end_ms) rows with start in [start, end).
+
+    Rows come ordered by (start_ms, id), strictly after the keyset `after`
+    (a (start_ms, id) pair, e.g. from the last row of a previous page). Each
+    source (hot database and overlapping archives) is read in keyset pages of
+    `chunk_size` rows, so memory stays constant and no read transaction is held
+    open between pages. With `parts=True` every row also carries the interned
+    title and URL (None for non-tab blocks) as two more columns.
+    """
+    s_ms = start if isinstance(start, int) else _to_ms(start)
+    e_ms = end if isinstance(end, int) else _to_ms(end)
+    sources = [None] + [path for m_start, m_end, path in archived_months() if m_start < e_ms and m_end > s_ms]
+    streams = [_iter_source(src, s_ms, e_ms, after, chunk_size, parts) for src in sources]
+    if len(streams) == 1:
+        yield from streams[0]
+    else:
+        yield from heapq.merge(*streams, key=lambda r: (r[4], r[0]))
+
+
+def run_maintenance(fn, *args):
+    """Run `fn(cursor, *args)` on the writer thread and return its result.
+
+    For jobs that rewrite or delete rows: the open block is persisted first and
+    reloaded afterwards if the job changed it, and everything commits with the
+    surrounding batch.
+    """
+    return _writer.call(_maintenance, fn, args)
+
+
+def _maintenance(c, fn, args):
+    _writer.coalescer.checkpoint(c)
+    # Maintenance jobs may rewrite any day; subscribers have to reload
+    _writer.coalescer.touch(0)
+    _writer.coalescer.changes.append({"op": "reset"})
+    try:
+        return fn(c, *args)
+    finally:
+        # Keep the open block unless the job deleted or rewrote its row
+        o = _writer.coalescer.open
+        if o is None or not c.execute(
+                "SELECT 1 FROM block_data WHERE id = ? AND start_ms = ? AND end_ms = ?",
+                (o.id, o.start_ms, o.end_ms)).fetchone():
+            _writer.coalescer.load(c)
+
+
+def import_blocks(rows):
+    """Bulk-insert (start_ms, end_ms, title, url) rows in one transaction; returns the count.
+
+    For backfills and migrations: titles and URLs are interned and the rows
+    inserted with one executemany each, and the rollups are updated for all
+    of them at once. Unlike insert_block, rows are stored as given (no merging).
+    """
+    return run_maintenance(_import_blocks, list(rows))
+
+
+def _intern_many(c, table, texts):
+    """Ids for a set of strings in a lookup table, inserting the missing ones."""
+    c.executemany(f"INSERT OR IGNORE INTO {table} (text) VALUES (?)", [(t,) for t in texts])
+    ids = {}
+    texts = list(texts)
+    for i in range(0, len(texts), 500):
+        chunk = texts[i:i + 500]
+        ids.update((t, ident) for ident, t in c.execute(
+            f"SELECT id, text FROM {table} WHERE text IN ({','.join('?' * len(chunk))})", chunk))
+    return ids
+
+
+def _import_blocks(c, rows):
+    title_ids = _intern_many(c, "titles", {r[2] or "" for r in rows})
+    url_ids = _intern_many(c, "urls", {r[3] for r in rows if r[3] is not None})
+    iso = lambda ms: datetime.fromtimestamp(ms / 1000).isoformat()
+    data = [(iso(s), iso(e), s, e, title_ids[t or ""], url_ids.get(u)) for s, e, t, u in rows]
+    c.executemany(
+        "INSERT INTO block_data (start, end, start_ms, end_ms, title_id, url_id) VALUES (?, ?, ?, ?, ?, ?)", data)
+    _rollup_add(c, [(tid, s, e) for _, _, s, e, tid, _ in data if e > s])
+    logger.info("Imported %d blocks (%d titles, %d URLs)", len(data), len(title_ids), len(url_ids))
+    return len(data)
+
+
 def delete_until_first_title_contains(date: str, substring: str) -> int:
     """Delete all blocks for `date` that occur before the first block whose
     title contains `substring` (case-insensitive).
 
     Returns the number of deleted rows. If no matching block is found, does nothing
-    and returns 0.
+    and returns 0. Runs on the writer thread, ordered after any queued inserts.
+    Only the hot database is searched; archived months are left alone.
     """
-    rows = cur.execute(
-        "SELECT id, start, end, title FROM blocks WHERE start LIKE ? ORDER BY start ASC",
-        (f"{date}%",)
-    ).fetchall()
+    return run_maintenance(_delete_until_first_title_contains, date, substring)
 
-    substring_lower = substring.lower()
-    cutoff_start = None
-    for r in rows:
-        if r[3] and substring_lower in r[3].lower():
-            cutoff_start = r[1]
-            break
 
-    if not cutoff_start:
+def _delete_until_first_title_contains(c, date, substring):
+    day_start, day_end = _day_bounds(date)
+    hits_sql, params = _hits_sql(substring, ["main"], day_start, day_end)
+    cutoff_ms = c.execute(f"{hits_sql} SELECT MIN(start_ms) FROM hits", params).fetchone()[0]
+
+    if cutoff_ms is None:
         return 0
 
-    # Delete rows with start strictly before the cutoff_start
-    res = cur.execute(
-        "DELETE FROM blocks WHERE start LIKE ? AND start < ?",
-        (f"{date}%", cutoff_start)
+    # Delete rows with start strictly before the cutoff
+    _rollup_add(c, c.execute(
+        "SELECT title_id, start_ms, end_ms FROM block_data WHERE start_ms >= ? AND start_ms < ? AND end_ms > start_ms",
+        (day_start, cutoff_ms)
+    ).fetchall(), sign=-1)
+    res = c.execute(
+        "DELETE FROM block_data WHERE start_ms >= ? AND start_ms < ?",
+        (day_start, cutoff_ms)
     )
-    conn.commit()
-    deleted = res.rowcount if hasattr(res, 'rowcount') else None
-    # SQLite in the python sqlite3 module sets rowcount to -1 for DELETE; compute count instead
-    if deleted is None or deleted == -1:
-        deleted = cur.execute("SELECT COUNT(*) FROM blocks WHERE start LIKE ? AND start < ?", (f"{date}%", cutoff_start)).fetchone()[0]
+    deleted = res.rowcount
     logger.info("Deleted %d rows before first match '%s' on %s", deleted, substring, date)
     return deleted
+
+
+def _match_cte(query):
+    """SQL (and params) for a CTE `m(kind, ref_id, score)` of titles/URLs containing `query`."""
+    if len(query) >= 3:
+        # A quoted trigram phrase is a case-insensitive substring match
+        phrase = '"' + query.replace('"', '""') + '"'
+        return "m(kind, ref_id, score) AS (SELECT kind, ref_id, bm25(text_fts) FROM text_fts WHERE text_fts MATCH ?)", [phrase]
+    # Too short for trigrams: scan the (small) dictionaries instead
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return (
+        "m(kind, ref_id, score) AS ("
+        "SELECT 't', id, 0.0 FROM titles WHERE text LIKE ? ESCAPE '\\' "
+        "UNION ALL SELECT 'u', id, 0.0 FROM urls WHERE text LIKE ? ESCAPE '\\')"
+    ), [pattern, pattern]
+
+
+def _hits_sql(query, schemas, s_ms, e_ms):
+    """WITH clause defining `hits(id, start, end, start_ms, title_id, url_id, score)`:
+    blocks in [s_ms, e_ms) whose title or URL contains `query`, across `schemas`."""
+    match_sql, params = _match_cte(query)
+    parts = []
+    for schema in schemas:
+        for kind, col in (("t", "title_id"), ("u", "url_id")):
+            parts.append(
+                f"SELECT b.id, b.start, b.end, b.start_ms, b.title_id, b.url_id, m.score "
+                f"FROM m JOIN {schema}.block_data b ON b.{col} = m.ref_id "
+                f"WHERE m.kind = '{kind}' AND b.start_ms >= ? AND b.start_ms < ?"
+            )
+            params += [s_ms, e_ms]
+    return f"WITH {match_sql}, hits AS ({' UNION ALL '.join(parts)})", params
+
+
+def search_blocks(query, start=None, end=None, limit=50, offset=0):
+    """Full-text search over block titles and URLs (case-insensitive substring).
+
+    Returns (id, start, end, title, score) rows, best match first (lower bm25
+    score is better), then most recent first. `start`/`end` bound the block
+    start (epoch ms, datetime or ISO; default: all history, including archives).
+    """
+    s_ms = (start if isinstance(start, int) else _to_ms(start)) if start is not None else 0
+    e_ms = (end if isinstance(end, int) else _to_ms(end)) if end is not None else 2 ** 62
+    paths = [path for m_start, m_end, path in archived_months() if m_start < e_ms and m_end > s_ms]
+    # Only MAX_ATTACHED archives fit on a connection at once, so archives are
+    # searched in groups; each group returns its best limit + offset hits and
+    # the groups are ranked together here.
+    c = reader()
+    wanted = limit + offset
+    hits = []
+    for i in range(0, max(len(paths), 1), _readers.MAX_ATTACHED):
+        schemas = [_readers.attach(path) for path in paths[i:i + _readers.MAX_ATTACHED]]
+        if i == 0:
+            schemas.insert(0, "main")
+        hits_sql, params = _hits_sql(query, schemas, s_ms, e_ms)
+        hits += c.execute(
+            f"{hits_sql} "
+            "SELECT h.id, h.start, h.end, "
+            "CASE WHEN u.text IS NULL THEN t.text ELSE t.text || ' - ' || u.text END, MIN(h.score) AS score, "
+            "h.start_ms FROM hits h LEFT JOIN titles t ON t.id = h.title_id LEFT JOIN urls u ON u.id = h.url_id "
+            "GROUP BY h.start_ms, h.id ORDER BY score ASC, h.start_ms DESC, h.id DESC LIMIT ?",
+            params + [wanted]
+        ).fetchall()
+    hits.sort(key=lambda r: (r[4], -r[5], -r[0]))
+    return [r[:5] for r in hits[offset:wanted]]
+
+
+def _is_local_midnight(ms):
+    return datetime.fromtimestamp(ms / 1000).time() == datetime.min.time()
+
+
+def get_summary(start, end, group="title"):
+    """Return [(key, ms)] totals for [start, end) from the rollup tables.
+
+    `start`/`end` may be epoch milliseconds, datetimes or ISO strings. Ranges on
+    local midnight boundaries are answered from the daily rollup, anything else
+    from the hourly one (hour granularity). `group` is "title" (key: title text,
+    largest first), "day" or "hour" (key: epoch ms of the period start,
+    chronological).
+    """
+    if group not in ("title", "day", "hour"):
+        raise ValueError(f"unknown summary group: {group}")
+    s_ms = start if isinstance(start, int) else _to_ms(start)
+    e_ms = end if isinstance(end, int) else _to_ms(end)
+    if group != "hour" and _is_local_midnight(s_ms) and _is_local_midnight(e_ms):
+        table, period = "rollup_daily", "day_ms"
+    else:
+        table, period = "rollup_hourly", "hour_ms"
+
+    if group == "title":
+        return reader().execute(
+            f"SELECT t.text, SUM(r.ms) AS total FROM {table} r JOIN titles t ON t.id = r.title_id "
+            f"WHERE r.{period} >= ? AND r.{period} < ? GROUP BY r.title_id HAVING total > 0 ORDER BY total DESC",
+            (s_ms, e_ms),
+        ).fetchall()
+
+    rows = reader().execute(
+        f"SELECT {period}, SUM(ms) FROM {table} WHERE {period} >= ? AND {period} < ? GROUP BY {period} ORDER BY {period}",
+        (s_ms, e_ms),
+    ).fetchall()
+    if group == "day" and table == "rollup_hourly":
+        # Partial-day range: fold the hours onto their local day
+        days = {}
+        for hour_ms, ms in rows:
+            d = _day_bounds(datetime.fromtimestamp(hour_ms / 1000).date())[0]
+            days[d] = days.get(d, 0) + ms
+        rows = sorted(days.items())
+    return [(k, ms) for k, ms in rows if ms > 0]
@@ -1,26 +1,121 @@
-from ics import Calendar, Event
-from database import get_blocks_for_day
-from datetime import date
-
-def export_ical():
-    cal = Calendar()
-    today = date.today().isoformat()
-
-    for _, start, end, title in get_blocks_for_day(today):
-        e = Event()
-        e.name = title
-        e.begin = start
-        e.end = end
-        cal.events.add(e)
-
-    with open(f"activity-{today}.ics", "w") as f:
-        f.writelines(cal)
-
-def export_csv():
-    today = date.today().isoformat()
-    rows = get_blocks_for_day(today)
-
-    with open(f"activity-{today}.csv", "w") as f:
-        f.write("start,end,title\n")
-        for _, start, end, title in rows:
-            f.write(f"{start},{end},{title}\n")
\ No newline at end of file
+"""Streaming exports of block rows (database.iter_blocks) as CSV, iCalendar or NDJSON.
+
+Every exporter is a generator of text chunks of up to LINES_PER_CHUNK
+records, so a response can be sent while the rows are still being read and
+memory use does not depend on the size of the range. `gzipped()` compresses
+such a stream on the fly.
+"""
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+
+LINES_PER_CHUNK = 500
+# Leading characters that make spreadsheets evaluate a cell as a formula
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    # Titles come from arbitrary windows and web pages; never let them run as formulas
+    value = "" if value is None else str(value)
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def stream_csv(rows):
+    """CSV with a start,end,title header; fields quoted as needed (RFC 4180)."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(("start", "end", "title"))
+    n = 0
+    for r in rows:
+        writer.writerow((r[1], r[2], _csv_cell(r[3])))
+        n += 1
+        if n >= LINES_PER_CHUNK:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            n = 0
+    yield buf.getvalue()
+
+
+def _ics_text(value):
+    """Escape a TEXT value (RFC 5545 3.3.11)."""
+    return (value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def _ics_line(line):
+    """Fold a content line to at most 75 octets per line, never inside a UTF-8 sequence."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, limit = [], 75
+    while len(data) > limit:
+        cut = limit
+        # step back to the first byte of a multi-byte character
+        while data[cut] & 0xC0 == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode("utf-8"))
+        data = data[cut:]
+        limit = 74  # continuation lines start with a space
+    parts.append(data.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_time(ms):
+    return datetime.fromtimestamp(ms / 1000, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def stream_ics(rows):
+    """iCalendar with one VEVENT per block (times in UTC); rows without epoch times are skipped."""
+    stamp = _ics_time(datetime.now(timezone.utc).timestamp() * 1000)
+    yield "BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//activity-tracker//export//DE\r\nCALSCALE:GREGORIAN\r\n"
+    events = []
+    for r in rows:
+        if r[4] is None or r[5] is None:
+            continue
+        events.append(
+            "BEGIN:VEVENT\r\n"
+            f"UID:{r[0]}-{r[4]}@activity-tracker\r\n"
+            f"DTSTAMP:{stamp}\r\n"
+            f"DTSTART:{_ics_time(r[4])}\r\n"
+            f"DTEND:{_ics_time(r[5])}\r\n"
+            + _ics_line("SUMMARY:" + _ics_text(r[3] or ""))
+            + "END:VEVENT\r\n")
+        if len(events) >= LINES_PER_CHUNK:
+            yield "".join(events)
+            events = []
+    yield "".join(events) + "END:VCALENDAR\r\n"
+
+
+def stream_ndjson(rows):
+    """One {"id", "start", "end" (epoch ms), "title", "cursor"} object per line."""
+    lines = []
+    for r in rows:
+        lines.append(json.dumps({'id': r[0], 'start': r[4], 'end': r[5], 'title': r[3],
+                                 'cursor': f'{r[4]}:{r[0]}'}))
+        if len(lines) >= LINES_PER_CHUNK:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+
+def gzipped(chunks, level=6):
+    """Compress a stream of text chunks into a gzip stream of bytes chunks."""
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = comp.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield comp.flush()
+
+
+# format -> (writer, media type, file extension)
+FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8", "csv"),
+    "ics": (stream_ics, "text/calendar; charset=utf-8", "ics"),
+    "ical": (stream_ics, "text/calendar; charset=utf-8", "ics"),
+    "ndjson": (stream_ndjson, "application/x-ndjson", "ndjson"),
+}
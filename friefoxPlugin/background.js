@@ -1,20 +1,122 @@
-function sendActiveTab() {
-    browser.tabs.query({ active: true, currentWindow: true }).then(tabs => {
-        if (tabs.length === 0) return;
-        const tab = tabs[0];
-        const title = tab.title;
-        const url = tab.url;
-
-        // Send to local server
-        fetch("http://127.0.0.1:5000/tab", {
-            method: "POST",
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ title: title, url: url })
-        }).catch(err => console.log("Cannot reach local server:", err));
+// Records tab switches as they happen and delivers them in batches.
+//
+// Every activation, navigation/title change of the active tab and window
+// focus change becomes an event with its own timestamp in a local buffer.
+// While a Firefox window has focus the current tab is re-recorded every
+// HEARTBEAT_MS so the tracker keeps attributing time to it. The buffer is
+// sent to POST /tabs/batch every FLUSH_MS (or as soon as BATCH_SIZE events are
+// waiting); if the listener is down, delivery is retried with exponential
+// backoff and the buffer keeps at most MAX_BACKLOG events (oldest dropped).
+// When Firefox loses focus a `focused: false` marker for the current tab is
+// recorded, so the server knows where that tab's time ends.
+
+const LISTENER_URL = "http://127.0.0.1:9432/tabs/batch";
+const HEARTBEAT_MS = 10000;
+const FLUSH_MS = 15000;
+const BATCH_SIZE = 500;          // server limit: TAB_BATCH_MAX_EVENTS
+const MAX_BACKLOG = 5000;
+const MIN_BACKOFF_MS = 5000;
+const MAX_BACKOFF_MS = 5 * 60 * 1000;
+
+const buffer = [];
+let seq = 0;
+let lastTab = null;
+let dropped = 0;
+let windowFocused = true;
+let inFlight = false;
+let backoffMs = 0;
+let nextAttempt = 0;
+
+function record(tab) {
+    if (!tab || !tab.url) return;
+    const now = Date.now();
+    const last = buffer[buffer.length - 1];
+    // Same tab still in front: only the heartbeat may repeat it
+    if (last && last.url === tab.url && last.title === tab.title
+        && last.focused === windowFocused && now - last.ts < HEARTBEAT_MS) {
+        return;
+    }
+    lastTab = tab;
+    push({ title: tab.title || "", url: tab.url, ts: now, focused: windowFocused });
+}
+
+function push(event) {
+    // Sequence numbers identify delivered events even if the head was trimmed meanwhile
+    event.seq = ++seq;
+    buffer.push(event);
+    if (buffer.length > MAX_BACKLOG) {
+        dropped += buffer.length - MAX_BACKLOG;
+        buffer.splice(0, buffer.length - MAX_BACKLOG);
+    }
+    if (buffer.length >= BATCH_SIZE) {
+        flush();
+    }
+}
+
+function recordActiveTab(windowId) {
+    const query = windowId === undefined
+        ? { active: true, lastFocusedWindow: true }
+        : { active: true, windowId: windowId };
+    return browser.tabs.query(query).then(tabs => {
+        if (tabs.length > 0) record(tabs[0]);
+    }).catch(err => console.log("Cannot query active tab:", err));
+}
+
+function flush() {
+    if (inFlight || buffer.length === 0 || Date.now() < nextAttempt) return;
+    inFlight = true;
+    const batch = buffer.slice(0, BATCH_SIZE);
+    const lastSeq = batch[batch.length - 1].seq;
+    fetch(LISTENER_URL, {
+        method: "POST",
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ events: batch.map(({ seq, ...event }) => event) })
+    }).then(res => {
+        if (!res.ok) throw new Error("HTTP " + res.status);
+        // Remove what was delivered; record() may have trimmed the head meanwhile,
+        // and events recorded since stay queued
+        let delivered = 0;
+        while (delivered < buffer.length && buffer[delivered].seq <= lastSeq) delivered++;
+        buffer.splice(0, delivered);
+        backoffMs = 0;
+        nextAttempt = 0;
+    }).catch(err => {
+        backoffMs = Math.min(MAX_BACKOFF_MS, backoffMs ? backoffMs * 2 : MIN_BACKOFF_MS);
+        nextAttempt = Date.now() + backoffMs;
+        console.log("Cannot reach local server (" + buffer.length + " queued, "
+            + dropped + " dropped), retrying in " + backoffMs + " ms:", err);
+    }).finally(() => {
+        inFlight = false;
+        if (buffer.length >= BATCH_SIZE) flush();
     });
 }
 
-const SEND_INTERVAL_MS = 10000;
+browser.tabs.onActivated.addListener(info => {
+    browser.tabs.get(info.tabId).then(record).catch(() => {});
+});
+
+browser.tabs.onUpdated.addListener((tabId, changeInfo, tab) => {
+    if (tab.active && (changeInfo.url || changeInfo.title)) record(tab);
+});
+
+browser.windows.onFocusChanged.addListener(windowId => {
+    if (windowId === browser.windows.WINDOW_ID_NONE) {
+        // Another application is in front: end the current tab's time; the next
+        // events arrive on refocus
+        if (windowFocused && lastTab) {
+            push({ title: lastTab.title || "", url: lastTab.url, ts: Date.now(), focused: false });
+        }
+        windowFocused = false;
+        return;
+    }
+    windowFocused = true;
+    recordActiveTab(windowId);
+});
+
+setInterval(() => {
+    if (windowFocused) recordActiveTab();
+}, HEARTBEAT_MS);
+
+setInterval(flush, FLUSH_MS);
 
-// Send active tab data every 10 seconds
-setInterval(sendActiveTab, SEND_INTERVAL_MS);
+recordActiveTab();
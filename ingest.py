@@ -0,0 +1,79 @@
+"""Bounded, thread-safe event queue between tab ingestion and the tracker.
+
+The HTTP handlers `put` tab events, the tracker `drain`s them once per tick.
+Every event is kept, in arrival order, so repeated visits to a URL and A->B->A
+switches reach the tracker; the queue holds at most `capacity` events.
+`drain()` swaps the whole deque under the lock, so nothing written
+concurrently can fall between the snapshot and the clear.
+
+When the queue is full (the tracker stalls), the policy decides:
+- "reject": the put fails as a whole and is counted in `rejected`; the
+  endpoint answers 503 and the extension keeps the events and retries later.
+- "drop_oldest": the oldest events are evicted and counted in `dropped`.
+"""
+import threading
+from collections import deque
+
+from config import TAB_BUFFER_CAPACITY, TAB_BUFFER_POLICY
+
+POLICIES = ("reject", "drop_oldest")
+
+
+class BufferFull(Exception):
+    """Raised by `put_many` under the "reject" policy when the events do not fit."""
+
+
+class TabBuffer:
+    def __init__(self, capacity=TAB_BUFFER_CAPACITY, policy=TAB_BUFFER_POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"unknown buffer policy {policy!r}, expected one of {POLICIES}")
+        self.capacity = capacity
+        self.policy = policy
+        self._lock = threading.Lock()
+        self._events = deque()
+        self.accepted = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def put(self, url, title, ts):
+        """Queue one event; returns False if it was rejected because the buffer is full."""
+        try:
+            self.put_many([{"title": title, "url": url, "ts": ts}])
+        except BufferFull:
+            return False
+        return True
+
+    def put_many(self, events):
+        """Queue events ({"title", "url", "ts"}, optionally "focused") atomically, in order:
+        all of them or (reject policy) none."""
+        with self._lock:
+            overflow = len(self._events) + len(events) - self.capacity
+            if overflow > 0 and self.policy == "reject":
+                self.rejected += len(events)
+                raise BufferFull(f"tab buffer full ({len(self._events)}/{self.capacity})")
+            self._events.extend(events)
+            while len(self._events) > self.capacity:
+                self._events.popleft()
+                self.dropped += 1
+            self.accepted += len(events)
+
+    def drain(self):
+        """Take all queued events (in arrival order) and leave the buffer empty."""
+        with self._lock:
+            events, self._events = self._events, deque()
+        return list(events)
+
+    def snapshot(self):
+        """Copy of the queued events without removing them."""
+        with self._lock:
+            return list(self._events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def stats(self):
+        return {"size": len(self._events), "capacity": self.capacity, "policy": self.policy,
+                "accepted": self.accepted, "rejected": self.rejected, "dropped": self.dropped}
+
+
+tab_buffer = TabBuffer()
@@ -1,14 +1,159 @@
-import time
-from pynput import mouse, keyboard
+"""Keyboard/mouse activity sampler.
 
-last_input = time.time()
+Listener callbacks only bump a counter (no clock reads, no locks). Mouse
+movement is not subscribed to at all: the sampler thread reads the pointer
+position once per second and records the distance, so a high-frequency mouse
+costs nothing per pixel. Once per second the counters are folded into a
+(second, keys, clicks, movement_px) series that backs `is_active()` and the
+per-bucket intensity metrics.
 
-def _update(*args):
-    global last_input
-    last_input = time.time()
+Nothing is started on import; call `start()` (main.py does) and `stop()`.
+"""
+import math
+import threading
+import logging
+from collections import deque
 
-mouse.Listener(on_move=_update, on_click=_update).start()
-keyboard.Listener(on_press=_update).start()
+import clock
 
-def is_active(threshold=60):
-    return (time.time() - last_input) < threshold
+from config import ACTIVITY_HISTORY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Input within this many seconds counts as "user is active"
+ACTIVE_THRESHOLD_SECONDS = 60
+
+# pynput needs a display/input backend; without one the sampler just stays idle
+try:
+    from pynput import mouse, keyboard
+except Exception:
+    mouse = keyboard = None
+
+
+class ActivitySampler:
+    def __init__(self, history_seconds=ACTIVITY_HISTORY_SECONDS, sample_seconds=1.0):
+        self.sample_seconds = sample_seconds
+        self.last_input = clock.time()
+        # Set on input; the tracker scheduler waits on it to leave its idle backoff
+        self.activity_event = threading.Event()
+        self.series = deque(maxlen=history_seconds)
+        # Cumulative counters, each written by exactly one listener thread
+        self._keys = 0
+        self._clicks = 0
+        self._seen = (0, 0)
+        self._pos = None
+        self._pointer = None
+        self._listeners = []
+        self._thread = None
+        self._stopped = threading.Event()
+
+    # --- listener callbacks: keep these trivial ---
+    def _on_press(self, key):
+        self._keys += 1
+
+    def _on_click(self, x, y, button, pressed):
+        if pressed:
+            self._clicks += 1
+
+    # --- lifecycle ---
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        if mouse is not None and keyboard is not None:
+            try:
+                self._listeners = [
+                    mouse.Listener(on_click=self._on_click),
+                    keyboard.Listener(on_press=self._on_press),
+                ]
+                for listener in self._listeners:
+                    listener.start()
+                self._pointer = mouse.Controller()
+            except Exception:
+                logger.exception("Could not start input listeners")
+        else:
+            logger.warning("pynput not available, input activity is not tracked")
+        self._thread = threading.Thread(target=self._run, name="activity-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        for listener in self._listeners:
+            try:
+                listener.stop()
+            except Exception:
+                pass
+        self._listeners = []
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _run(self):
+        while not self._stopped.wait(self.sample_seconds):
+            pos = None
+            if self._pointer is not None:
+                try:
+                    pos = self._pointer.position
+                except Exception:
+                    pos = None
+            self.sample(pos)
+
+    def sample(self, position=None, now=None):
+        """Fold the counters since the previous sample into one series entry."""
+        now = clock.time() if now is None else now
+        keys, clicks = self._keys, self._clicks
+        d_keys, d_clicks = keys - self._seen[0], clicks - self._seen[1]
+        self._seen = (keys, clicks)
+        moved = 0
+        if position is not None:
+            if self._pos is not None:
+                moved = int(math.hypot(position[0] - self._pos[0], position[1] - self._pos[1]))
+            self._pos = position
+        self.feed(now, d_keys, d_clicks, moved)
+
+    def feed(self, now, keys=0, clicks=0, moved=0):
+        """Append one second of input (also used to replay recorded activity)."""
+        self.series.append((int(now), keys, clicks, moved))
+        if keys or clicks or moved:
+            self.last_input = now
+            if not self.activity_event.is_set():
+                self.activity_event.set()
+
+    # --- queries ---
+    def is_active(self, threshold=ACTIVE_THRESHOLD_SECONDS):
+        return (clock.time() - self.last_input) < threshold
+
+    def intensity(self, start=None, end=None):
+        """Per-second (epoch_second, keys, clicks, movement_px) entries in [start, end)."""
+        return [e for e in list(self.series)
+                if (start is None or e[0] >= start) and (end is None or e[0] < end)]
+
+    def totals(self, start, end):
+        """Summed (keys, clicks, movement_px) for epoch seconds in [start, end)."""
+        keys = clicks = moved = 0
+        # The series is in time order and buckets close shortly after they end,
+        # so scan from the newest entry back only as far as the bucket reaches
+        for second, k, c, m in reversed(self.series):
+            if second < start:
+                break
+            if second < end:
+                keys += k
+                clicks += c
+                moved += m
+        return keys, clicks, moved
+
+
+sampler = ActivitySampler()
+activity_event = sampler.activity_event
+
+
+def start():
+    sampler.start()
+
+
+def stop():
+    sampler.stop()
+
+
+def is_active(threshold=ACTIVE_THRESHOLD_SECONDS):
+    return sampler.is_active(threshold)
@@ -0,0 +1,167 @@
+"""Vectorized timeline layout.
+
+A day's (or range's) events are converted to NumPy arrays once
+(`EventArrays`); the visible window, per-event positions and the
+level-of-detail segments for a given pixel height are then computed in bulk.
+
+Level of detail: events at least `min_px` tall stay separate segments.
+Consecutive events below that size are merged per pixel row into one segment,
+titled after the title with the most time in it and flagged `mixed` when
+several titles were merged. The number of segments is therefore bounded by
+the pixel height (plus the events that are big enough to see), not by the
+number of events.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+
+FOCUS_PAD_MS = 5 * 60 * 1000
+MIN_FOCUS_SPAN_MS = 15 * 60 * 1000
+# The timeline's base height corresponds to 12 hours (see timeline.js)
+BASE_SPAN_MS = 12 * 60 * 60 * 1000
+MIN_HEIGHT_PX = 300
+MAX_HEIGHT_PX = 3000
+# Multi-day ranges keep the per-hour scale much longer; the client draws them virtualized
+MAX_RANGE_HEIGHT_PX = 20000
+
+
+def _ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+class EventArrays:
+    """Events as parallel arrays sorted by start: block ids, epoch ms and title codes.
+
+    Events whose start/end are not epoch milliseconds (unparseable rows) are left out.
+    """
+
+    __slots__ = ("ids", "start", "end", "codes", "names")
+
+    def __init__(self, ids, starts, ends, titles):
+        starts = np.asarray(starts, dtype=np.int64)
+        order = np.argsort(starts, kind="stable")
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.start = starts[order]
+        self.end = np.asarray(ends, dtype=np.int64)[order]
+        titles = np.array([t or "" for t in titles], dtype=object)
+        if len(titles):
+            self.names, codes = np.unique(titles, return_inverse=True)
+            self.codes = codes.reshape(-1)[order]
+        else:
+            self.names = np.array([], dtype=object)
+            self.codes = np.array([], dtype=np.int64)
+
+    @classmethod
+    def from_events(cls, events):
+        """From {"id", "start", "end", "title"} dicts as served by /admin/events."""
+        ok = [ev for ev in events if isinstance(ev["start"], int) and isinstance(ev["end"], int)]
+        return cls([ev.get("id") or 0 for ev in ok], [ev["start"] for ev in ok], [ev["end"] for ev in ok],
+                   [ev["title"] for ev in ok])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From (id, start, end, title, start_ms, end_ms) rows (database.iter_blocks)."""
+        ids, starts, ends, titles = [], [], [], []
+        for r in rows:
+            if r[4] is not None and r[5] is not None:
+                ids.append(r[0])
+                starts.append(r[4])
+                ends.append(r[5])
+                titles.append(r[3])
+        return cls(ids, starts, ends, titles)
+
+    def __len__(self):
+        return len(self.start)
+
+
+def day_window(arrays, day_str, focus):
+    """Visible [start, end) in epoch ms for a day, mirroring the client's focus logic.
+
+    Focus on a day with events: the events' extent plus 5 minutes padding
+    (at least 15 minutes); focus without events: 08:00-20:00; otherwise the whole day.
+    """
+    day = datetime.fromisoformat(day_str[:10])
+    full_start, full_end = _ms(day), _ms(day + timedelta(hours=23, minutes=59, seconds=59))
+    if focus and len(arrays):
+        win_start = max(full_start, int(arrays.start.min()) - FOCUS_PAD_MS)
+        win_end = min(full_end, int(arrays.end.max()) + FOCUS_PAD_MS)
+        if win_end - win_start < MIN_FOCUS_SPAN_MS:
+            mid = (win_start + win_end) // 2
+            win_start, win_end = mid - MIN_FOCUS_SPAN_MS // 2, mid + MIN_FOCUS_SPAN_MS // 2
+        return win_start, win_end
+    if focus:
+        return _ms(day + timedelta(hours=8)), _ms(day + timedelta(hours=20))
+    return full_start, full_end
+
+
+def timeline_height(win_start, win_end, base_height, max_px=MAX_HEIGHT_PX):
+    """Pixel height of the timeline for a window (base height per 12 hours, clamped)."""
+    px = round((win_end - win_start) / BASE_SPAN_MS * base_height)
+    return max(MIN_HEIGHT_PX, min(max_px, px))
+
+
+def positions(arrays, win_start, win_end):
+    """Clipped start/end plus top/height in percent for every event overlapping the window."""
+    visible = (arrays.end > win_start) & (arrays.start < win_end)
+    s = np.maximum(arrays.start[visible], win_start)
+    e = np.minimum(arrays.end[visible], win_end)
+    span = win_end - win_start
+    return {
+        "title": arrays.names[arrays.codes[visible]] if len(arrays.names) else arrays.names,
+        "start": s,
+        "end": e,
+        "topPct": (s - win_start) / span * 100,
+        "heightPct": (e - s) / span * 100,
+    }
+
+
+def segments(arrays, win_start, win_end, height_px, min_px=1.0):
+    """Level-of-detail segments for a timeline `height_px` pixels tall.
+
+    Returns a list of {"id", "title", "start", "end", "topPct", "heightPct",
+    "count", "mixed"} dicts ordered by start; `id` is the block id for
+    segments made of a single event, else None.
+    """
+    visible = (arrays.end > win_start) & (arrays.start < win_end)
+    s = np.maximum(arrays.start[visible], win_start)
+    e = np.minimum(arrays.end[visible], win_end)
+    codes = arrays.codes[visible]
+    ids = arrays.ids[visible]
+    n = len(s)
+    if n == 0:
+        return []
+    span = win_end - win_start
+    px_per_ms = height_px / span
+    small = (e - s) * px_per_ms < min_px
+    row = np.floor((s - win_start) * px_per_ms / min_px).astype(np.int64)
+
+    # A segment starts at every big event, after a big event and where a run
+    # of small events moves to the next pixel row
+    brk = np.ones(n, dtype=bool)
+    brk[1:] = ~small[1:] | ~small[:-1] | (row[1:] != row[:-1])
+    first = np.flatnonzero(brk)
+    group = np.cumsum(brk) - 1
+    seg_start = np.minimum.reduceat(s, first)
+    seg_end = np.maximum.reduceat(e, first)
+    count = np.diff(np.append(first, n))
+
+    # Per segment: title with the most time (pings count 1 ms), number of distinct titles
+    n_titles = len(arrays.names)
+    pair, pair_idx = np.unique(group * n_titles + codes, return_inverse=True)
+    weight = np.bincount(pair_idx.reshape(-1), weights=np.maximum(e - s, 1))
+    pair_group = pair // n_titles
+    order = np.lexsort((-weight, pair_group))
+    lead = order[np.r_[True, pair_group[order][1:] != pair_group[order][:-1]]]
+    dominant = pair[lead] % n_titles
+    distinct = np.bincount(pair_group, minlength=len(first))
+
+    top = (seg_start - win_start) / span * 100
+    height = (seg_end - seg_start) / span * 100
+    titles = arrays.names[dominant]
+    return [
+        {"id": i if c == 1 else None, "title": t, "start": a, "end": b, "topPct": tp, "heightPct": hp,
+         "count": c, "mixed": d > 1}
+        for i, t, a, b, tp, hp, c, d in zip(ids[first].tolist(), titles.tolist(), seg_start.tolist(),
+                                             seg_end.tolist(), top.tolist(), height.tolist(), count.tolist(),
+                                             distinct.tolist())
+    ]
@@ -0,0 +1,92 @@
+"""Server-Sent Events fan-out of committed block changes.
+
+The database writer reports each commit's inserted/extended blocks
+(`database.subscribe`). The broadcaster serializes them once into an SSE
+message and hands that same string to every connected client, one
+`call_soon_threadsafe` per event loop. A client that falls more than
+LIVE_QUEUE_SIZE messages behind gets a single `reset` instead of its
+backlog and reloads.
+"""
+import asyncio
+import json
+import threading
+
+from config import LIVE_QUEUE_SIZE, LIVE_HEARTBEAT_SECONDS
+
+RESET = "event: reset\ndata: {}\n\n"
+_CLOSE = object()
+
+
+class Broadcaster:
+    def __init__(self, queue_size=LIVE_QUEUE_SIZE, heartbeat=LIVE_HEARTBEAT_SECONDS):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.messages = 0
+        self._lock = threading.Lock()
+        # event loop -> queues of the clients served on it
+        self._clients = {}
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(qs) for qs in self._clients.values())
+
+    def publish(self, changes):
+        """database.subscribe callback (writer thread): broadcast one commit's changes."""
+        if any(ch["op"] == "reset" for ch in changes):
+            msg = RESET
+        else:
+            msg = "event: blocks\ndata: " + json.dumps(changes) + "\n\n"
+        self._send(msg)
+
+    def close(self):
+        """End all streams (e.g. before server shutdown, which waits for open responses)."""
+        self._send(_CLOSE)
+
+    def _send(self, msg):
+        self.messages += 1
+        with self._lock:
+            targets = [(loop, list(qs)) for loop, qs in self._clients.items()]
+        for loop, queues in targets:
+            try:
+                loop.call_soon_threadsafe(self._fanout, queues, msg)
+            except RuntimeError:
+                # loop already closed
+                pass
+
+    @staticmethod
+    def _fanout(queues, msg):
+        for q in queues:
+            try:
+                q.put_nowait(msg)
+            except asyncio.QueueFull:
+                # Too slow: drop the backlog, the client reloads instead
+                while not q.empty():
+                    q.get_nowait()
+                q.put_nowait(msg if msg is _CLOSE else RESET)
+
+    async def stream(self):
+        """Async generator of SSE text for one client, until `close()` or disconnect."""
+        loop = asyncio.get_running_loop()
+        q = asyncio.Queue(self.queue_size)
+        with self._lock:
+            self._clients.setdefault(loop, set()).add(q)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    msg = await asyncio.wait_for(q.get(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    msg = ": keepalive\n\n"
+                if msg is _CLOSE:
+                    return
+                yield msg
+        finally:
+            with self._lock:
+                queues = self._clients.get(loop)
+                if queues is not None:
+                    queues.discard(q)
+                    if not queues:
+                        del self._clients[loop]
+
+
+broadcaster = Broadcaster()
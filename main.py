@@ -1,22 +1,22 @@
-import threading
 import uvicorn
-from tabListener import run_listener
-from tracker import run_periodic
-from config import TRACK_INTERVAL_SECONDS
 
+import live
 
-def main():
-    # Start tab listener in background thread
-    t1 = threading.Thread(target=run_listener, daemon=True)
-    t1.start()
 
-    # Start tracker loop in background thread
-    t2 = threading.Thread(target=lambda: run_periodic(TRACK_INTERVAL_SECONDS), daemon=True)
-    t2.start()
+class _Server(uvicorn.Server):
+    def handle_exit(self, sig, frame):
+        # uvicorn waits for open responses before shutting down; end the
+        # never-ending live streams first (clients reconnect on restart)
+        live.broadcaster.close()
+        super().handle_exit(sig, frame)
+
 
-    # Run web UI (blocking)
-    uvicorn.run("webui:app", host="127.0.0.1", port=9432)
+def main():
+    # One process, one event loop: UI, API and tab ingestion share the app in
+    # server.py, whose lifespan runs input sampling, the tracker and retention
+    # and flushes the database on shutdown.
+    _Server(uvicorn.Config("server:app", host="127.0.0.1", port=9432)).run()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,199 @@
+"""Push a recorded or synthetic activity stream through the real tracker pipeline.
+
+Events are (datetime, kind, data) tuples in time order:
+
+- ("window", title): the active window changes
+- ("tab", {"title", "url"}): the browser extension reports a tab
+- ("input", (keys, clicks, moved)): input seen by the sampler
+
+`replay()` puts the process on a clock.ManualClock and a FakeBackend window
+backend, then runs tracker.process_tab_activity once per tracker interval
+of virtual time, handing each event to the window backend, the tab buffer or
+the input sampler just before the tick that would have seen it. Buckets,
+blocks and activity totals are written exactly as live tracking would write
+them, so the same events always give the same database.
+
+Ticks that cannot record anything (no recent input, no buffered tabs, e.g.
+nights) are skipped up to the last one before the next event, which keeps
+the dwell times identical; a month of working days replays in seconds.
+
+Recorded streams are NDJSON files with one event per line, `t` as ISO time
+or epoch seconds:
+
+    {"t": "2024-03-04T09:00:00", "window": "Editor - notes.txt"}
+    {"t": "2024-03-04T09:00:02", "tab": {"title": "Docs", "url": "https://example.org"}}
+    {"t": 1709539205, "input": [12, 1, 300]}
+
+    python replay.py --db /tmp/replay.db synthetic --days 30
+    python replay.py --db /tmp/replay.db file events.ndjson
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+import clock
+from config import TRACK_INTERVAL_SECONDS
+
+# Window title while a synthetic tab is in front (tracker.py checks for "firefox")
+BROWSER_TITLE = "Mozilla Firefox"
+# Input reported with every synthetic sample
+SYNTHETIC_INPUT = (3, 0, 40)
+
+
+def _time_arg(value):
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value)
+    return datetime.fromisoformat(value)
+
+
+def read_events(path):
+    """Events from an NDJSON recording (see module docstring)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            t = _time_arg(rec["t"])
+            if "window" in rec:
+                yield t, "window", rec["window"]
+            elif "tab" in rec:
+                yield t, "tab", {"title": rec["tab"].get("title"), "url": rec["tab"]["url"]}
+            elif "input" in rec:
+                yield t, "input", tuple(rec["input"])
+            else:
+                raise ValueError(f"unknown event in {path}: {line.strip()!r}")
+
+
+def synthetic(start_day, days, seed=0, **workload):
+    """Events for bench.generate's workload: its samples become window switches
+    plus input, its tab bursts browser tabs in front of a browser window."""
+    import bench
+    window = None
+    for kind, a, b, c in bench.generate(start_day, days, seed=seed, **workload):
+        title = c if kind == "block" else BROWSER_TITLE
+        if title != window:
+            window = title
+            yield a, "window", title
+        if kind == "tab":
+            yield a, "tab", {"title": b, "url": c}
+        yield a, "input", SYNTHETIC_INPUT
+
+
+def _ceil_ticks(delta, step):
+    return -(-delta // step)
+
+
+def replay(events, interval=TRACK_INTERVAL_SECONDS):
+    """Run `events` through the tracker on virtual time; returns run statistics.
+
+    The tracker writes to the database configured at import time
+    (config.DB_PATH); everything is flushed before returning.
+    """
+    # database opens config.DB_PATH on import
+    import database
+    import input_tracker
+    import tracker
+    import window_tracker
+
+    stats = {"events": 0, "ticks": 0, "skipped_ticks": 0, "rejected_tabs": 0}
+    events = iter(events)
+    pending = next(events, None)
+    if pending is None:
+        return stats
+
+    sampler = tracker.sampler
+    tab_buffer = tracker.tab_buffer
+    backend = window_tracker.FakeBackend()
+    virtual = clock.ManualClock(pending[0])
+    step = timedelta(seconds=interval)
+    quiet_after = input_tracker.ACTIVE_THRESHOLD_SECONDS
+
+    previous_clock = clock.set_clock(virtual)
+    previous_backend = window_tracker.service.backend
+    previous_input = sampler.last_input, sampler.series
+    window_tracker.set_backend(backend)
+    # Start without input history, and keep live samples out of the replay's totals
+    sampler.last_input = float("-inf")
+    sampler.series = deque(maxlen=previous_input[1].maxlen)
+    tracker.last_sample = None
+    tracker.current_tab = None
+    tracker.window_credited_until = None
+    first = t = pending[0]
+    started = time.perf_counter()
+    try:
+        while pending is not None:
+            while pending is not None and pending[0] <= t:
+                when, kind, data = pending
+                if kind == "window":
+                    backend.set(data)
+                elif kind == "tab":
+                    if not tab_buffer.put(data["url"], data.get("title"), when):
+                        stats["rejected_tabs"] += 1
+                elif kind == "input":
+                    sampler.feed(when.timestamp(), *data)
+                stats["events"] += 1
+                pending = next(events, None)
+            virtual.set(t)
+            tracker.process_tab_activity()
+            stats["ticks"] += 1
+            t += step
+            if pending is None or len(tab_buffer) or t.timestamp() - sampler.last_input < quiet_after:
+                continue
+            # is_active() stays False until the next event, so the ticks before it
+            # record nothing; only the last one matters (it closes buckets and
+            # resets the dwell)
+            skip = _ceil_ticks(pending[0] - t, step) - 1
+            if skip > 0:
+                t += skip * step
+                stats["skipped_ticks"] += skip
+        virtual.set(t)
+        tracker.buckets.close_all()
+        database.flush()
+    finally:
+        sampler.last_input, sampler.series = previous_input
+        window_tracker.set_backend(previous_backend)
+        clock.set_clock(previous_clock)
+
+    wall = time.perf_counter() - started
+    stats["simulated_seconds"] = (t - first).total_seconds()
+    stats["wall_seconds"] = round(wall, 3)
+    stats["speedup"] = round(stats["simulated_seconds"] / wall, 1) if wall else None
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", required=True, help="database to replay into (required, so the live one is never touched)")
+    parser.add_argument("--interval", type=float, default=TRACK_INTERVAL_SECONDS, help="tracker interval in seconds")
+    sub = parser.add_subparsers(dest="source", required=True)
+    syn = sub.add_parser("synthetic", help="generated workload (bench.generate)")
+    syn.add_argument("--start", default=None, help="first day (default: --days before today)")
+    syn.add_argument("--days", type=int, default=7)
+    syn.add_argument("--seed", type=int, default=0)
+    rec = sub.add_parser("file", help="NDJSON recording")
+    rec.add_argument("path")
+    args = parser.parse_args(argv)
+
+    import config
+    config.DB_PATH = args.db
+    import database
+    # One line per inserted block is too much at replay speed
+    logging.getLogger(database.__name__).setLevel(logging.WARNING)
+    if args.source == "synthetic":
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        start = datetime.fromisoformat(args.start) if args.start else today - timedelta(days=args.days)
+        events = synthetic(start, args.days, seed=args.seed)
+    else:
+        events = read_events(args.path)
+    stats = replay(events, args.interval)
+    database.close()
+    print(json.dumps(stats, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
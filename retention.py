@@ -0,0 +1,147 @@
+"""Retention job: keep raw blocks for RAW_RETENTION_DAYS, then downsample them
+to BUCKET_MINUTES and move finished months into per-month archive files.
+
+Rollups are left untouched, so summaries keep the exact raw totals. Archived
+months stay readable through `database.get_blocks_between` and friends.
+"""
+import os
+import sqlite3
+import threading
+import logging
+from datetime import datetime, timedelta
+
+import database
+from config import RAW_RETENTION_DAYS, BUCKET_MINUTES, MERGE_GAP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+WATERMARK_KEY = "downsampled_until_ms"
+
+
+def _ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+def _bucket_floor(ms):
+    dt = datetime.fromtimestamp(ms / 1000)
+    minute = (dt.minute // BUCKET_MINUTES) * BUCKET_MINUTES
+    return _ms(dt.replace(minute=minute, second=0, microsecond=0))
+
+
+def _downsample(c, cutoff_ms):
+    """Replace raw blocks that lie entirely before `cutoff_ms` by one block per bucket.
+
+    Each bucket becomes one bucket-aligned block for its winner (the title with
+    the most time), like the tracker's own bucket blocks; consecutive buckets
+    with the same winner are merged again. Zero-length blocks (tab pings) carry
+    no time and disappear. Returns (removed, inserted).
+    """
+    row = c.execute("SELECT value FROM meta WHERE key = ?", (WATERMARK_KEY,)).fetchone()
+    lo = row[0] if row else c.execute("SELECT MIN(start_ms) FROM block_data").fetchone()[0]
+    if lo is None or lo >= cutoff_ms:
+        return 0, 0
+    where = "start_ms >= ? AND start_ms < ? AND end_ms <= ?"
+    rows = c.execute(
+        f"SELECT start_ms, end_ms, title_id FROM block_data WHERE {where} ORDER BY start_ms, id",
+        (lo, cutoff_ms, cutoff_ms),
+    ).fetchall()
+
+    buckets = {}
+    bucket_ms = BUCKET_MINUTES * 60 * 1000
+    for start_ms, end_ms, title_id in rows:
+        t = start_ms
+        while t < end_ms:
+            b = _bucket_floor(t)
+            seg_end = min(end_ms, max(b + bucket_ms, t + 1))
+            totals = buckets.setdefault(b, {})
+            totals[title_id] = totals.get(title_id, 0) + seg_end - t
+            t = seg_end
+
+    out = []
+    for b in sorted(buckets):
+        totals = buckets[b]
+        winner = max(totals.items(), key=lambda x: x[1])[0]
+        if out and out[-1][2] == winner and b - out[-1][1] <= MERGE_GAP_SECONDS * 1000:
+            out[-1][1] = b + bucket_ms
+        else:
+            out.append([b, b + bucket_ms, winner])
+
+    c.execute(f"DELETE FROM block_data WHERE {where}", (lo, cutoff_ms, cutoff_ms))
+    iso = lambda ms: datetime.fromtimestamp(ms / 1000).isoformat()
+    c.executemany(
+        "INSERT INTO block_data (start, end, start_ms, end_ms, title_id) VALUES (?, ?, ?, ?, ?)",
+        [(iso(s), iso(e), s, e, t) for s, e, t in out],
+    )
+    c.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (WATERMARK_KEY, cutoff_ms),
+    )
+    logger.info("Downsampled %d raw blocks into %d %d-minute blocks", len(rows), len(out), BUCKET_MINUTES)
+    return len(rows), len(out)
+
+
+def _delete_range(c, start_ms, end_ms):
+    return c.execute("DELETE FROM block_data WHERE start_ms >= ? AND start_ms < ?", (start_ms, end_ms)).rowcount
+
+
+def _archive_month(month_start):
+    """Copy one month of blocks into its archive file, then drop it from the hot database."""
+    m_start, m_end = _ms(month_start), _ms(database.next_month(month_start))
+    rows = database.reader().execute(
+        "SELECT id, start, end, start_ms, end_ms, title_id, url_id FROM block_data "
+        "WHERE start_ms >= ? AND start_ms < ?",
+        (m_start, m_end),
+    ).fetchall()
+    if not rows:
+        return 0
+    path = database.archive_path(month_start)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    arch = sqlite3.connect(path)
+    try:
+        arch.execute(database.BLOCK_DATA_SCHEMA)
+        arch.execute("CREATE INDEX IF NOT EXISTS idx_blocks_start_ms ON block_data(start_ms)")
+        # INSERT OR REPLACE keeps a re-run after an interrupted archive idempotent
+        arch.executemany("INSERT OR REPLACE INTO block_data VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        arch.commit()
+    finally:
+        arch.close()
+    database.refresh_archives()
+    database.run_maintenance(_delete_range, m_start, m_end)
+    logger.info("Archived %d blocks of %s to %s", len(rows), f"{month_start:%Y-%m}", path)
+    return len(rows)
+
+
+def compact(now=None, stop=None):
+    """Run the retention job once. Returns counts of what was downsampled and archived.
+
+    `stop` (a threading.Event) is checked between months; once it is set the
+    remaining months are left for the next run.
+    """
+    now = now or datetime.now()
+    cutoff = datetime(now.year, now.month, now.day) - timedelta(days=RAW_RETENTION_DAYS)
+    removed, inserted = database.run_maintenance(_downsample, _ms(cutoff))
+
+    archived = 0
+    oldest = database.reader().execute("SELECT MIN(start_ms) FROM block_data").fetchone()[0]
+    if oldest is not None:
+        d = datetime.fromtimestamp(oldest / 1000)
+        month = datetime(d.year, d.month, 1)
+        while database.next_month(month) <= cutoff and not (stop and stop.is_set()):
+            archived += _archive_month(month)
+            month = database.next_month(month)
+    return {"downsampled": removed, "inserted": inserted, "archived": archived}
+
+
+def run_periodic(interval_hours=24, stop=None):
+    """Run the retention job now and then every `interval_hours` (blocking loop).
+
+    Returns once `stop` (a threading.Event) is set, after the month being
+    archived at that moment is finished.
+    """
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        try:
+            compact(stop=stop)
+        except Exception:
+            logger.exception("Retention job failed")
+        stop.wait(interval_hours * 3600)
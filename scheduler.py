@@ -0,0 +1,77 @@
+"""Drift-free periodic scheduler for the tracker loop.
+
+Ticks fire at fixed deadlines on the monotonic clock (start + n * period), so
+the time spent inside a tick does not stretch the period. While the user is
+idle the period backs off exponentially up to `max_interval`; the next input
+event (via `wake_event`) snaps it back to the base interval. Deadlines that
+pass while a tick overruns are skipped and counted in `missed` instead of
+silently shifting every later sample.
+"""
+import logging
+import threading
+import time
+
+from config import TRACK_INTERVAL_SECONDS, IDLE_MAX_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    def __init__(self, interval=TRACK_INTERVAL_SECONDS, max_interval=IDLE_MAX_INTERVAL_SECONDS,
+                 is_idle=None, wake_event=None, clock=time.monotonic, sleep=None):
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.is_idle = is_idle
+        self.wake_event = wake_event
+        self.clock = clock
+        self.period = interval
+        self.ticks = 0
+        self.missed = 0
+        self._stopped = threading.Event()
+        # Default sleep returns early on stop() so shutdown does not wait a full period
+        self.sleep = sleep or self._stopped.wait
+
+    def stop(self):
+        self._stopped.set()
+        if self.wake_event is not None:
+            self.wake_event.set()
+
+    def _wait(self, timeout):
+        """Sleep up to `timeout`; returns True if an input event cut an idle wait short."""
+        if self.wake_event is None or self.period <= self.interval:
+            self.sleep(timeout)
+            return False
+        self.wake_event.clear()
+        return self.wake_event.wait(timeout)
+
+    def run(self, tick, max_ticks=None):
+        """Call `tick()` at every deadline until `stop()` (or `max_ticks` ticks)."""
+        next_due = self.clock()
+        while not self._stopped.is_set():
+            now = self.clock()
+            if now < next_due:
+                if self._wait(next_due - now) and self.period > self.interval:
+                    logger.debug("Input while idle, back to %ss ticks", self.interval)
+                    self.period = self.interval
+                    next_due = self.clock()
+                continue
+
+            try:
+                tick()
+            except Exception:
+                logger.exception("Tracker tick failed")
+            self.ticks += 1
+            if max_ticks is not None and self.ticks >= max_ticks:
+                return
+
+            idle = bool(self.is_idle and self.is_idle())
+            self.period = min(self.period * 2, self.max_interval) if idle else self.interval
+            next_due += self.period
+            now = self.clock()
+            if now > next_due:
+                late = now - next_due
+                skipped = int(late // self.period) + 1
+                self.missed += skipped
+                next_due += skipped * self.period
+                logger.warning("Tracker tick overran: skipped %d deadline(s) (%.2fs late, period %ss)",
+                               skipped, late, self.period)
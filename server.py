@@ -0,0 +1,104 @@
+"""Single ASGI application: web UI, API and tab ingestion on one event loop.
+
+The lifespan starts the background work (input sampling, the window backend,
+the tracker loop and the daily retention job) and stops it again in order on
+shutdown: the tracker finishes its current tick and persists its open buckets,
+then the database writer flushes everything that is still queued.
+
+    uvicorn server:app --port 9432
+
+`create_app(background=False)` gives the same routes without background work.
+"""
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
+
+import database
+import input_tracker
+import live
+import retention
+import tabListener
+import tracker
+import webui
+import window_tracker
+from config import TRACK_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+RETENTION_INTERVAL_HOURS = 24
+
+
+# Only the tab ingestion routes answer cross-origin requests, and only from
+# extension pages without credentials. Everything else (history, search,
+# exports, admin) stays same-origin, so websites cannot read it.
+TAB_ROUTES = ("/tab", "/tabs/batch")
+EXTENSION_ORIGIN_REGEX = r"moz-extension://[0-9a-fA-F-]+"
+
+
+class _TabCORS:
+    """CORSMiddleware applied to TAB_ROUTES only."""
+
+    def __init__(self, app):
+        self.app = app
+        self.cors = CORSMiddleware(app, allow_origin_regex=EXTENSION_ORIGIN_REGEX,
+                                   allow_credentials=False, allow_methods=["POST"],
+                                   allow_headers=["Content-Type"])
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in TAB_ROUTES:
+            await self.cors(scope, receive, send)
+        else:
+            await self.app(scope, receive, send)
+
+
+def create_app(background=True):
+    """Build the app; `background=False` serves requests only (no tracker/retention)."""
+
+    @asynccontextmanager
+    async def lifespan(app):
+        tasks = []
+        scheduler = tracker.new_scheduler(TRACK_INTERVAL_SECONDS)
+        retention_stop = threading.Event()
+        database.subscribe(live.broadcaster.publish)
+        if background:
+            input_tracker.start()
+            window_tracker.start()
+            # Ticks block on the window backend, so the scheduler loop runs in
+            # one worker of the shared threadpool; the task owns its lifetime.
+            tasks.append(asyncio.create_task(
+                run_in_threadpool(tracker.run_periodic, scheduler_=scheduler), name="tracker"))
+            tasks.append(asyncio.create_task(
+                run_in_threadpool(retention.run_periodic, RETENTION_INTERVAL_HOURS, retention_stop), name="retention"))
+        try:
+            yield
+        finally:
+            # The tracker returns after its current tick, retention after the month
+            # it is archiving; both have to be done before the writer stops.
+            scheduler.stop()
+            retention_stop.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+            for task, result in zip(tasks, results):
+                if isinstance(result, Exception):
+                    logger.error("Background task %s failed: %r", task.get_name(), result)
+            if background:
+                input_tracker.stop()
+                window_tracker.stop()
+            await run_in_threadpool(database.close)
+            database.unsubscribe(live.broadcaster.publish)
+            live.broadcaster.close()
+
+    app = FastAPI(lifespan=lifespan)
+    app.add_middleware(_TabCORS)
+    app.mount('/static', StaticFiles(directory='static'), name='static')
+    app.include_router(webui.router)
+    app.include_router(tabListener.router)
+    return app
+
+
+app = create_app()
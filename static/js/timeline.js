@@ -1,8 +1,11 @@
 document.addEventListener('DOMContentLoaded', () => {
   try {
-    const events = window.EVENTS || [];
+    // Server-side layout: window bounds plus level-of-detail segments for a pixel height
+    let layout = window.LAYOUT || {winStart: null, winEnd: null, px: 0, events: 0, segments: []};
+    let pending = null;
     const day = window.DAY;
-    let focusMode = !!window.FOCUS;
+    const rangeMode = !!window.RANGE;
+    let focusMode = !rangeMode && !!window.FOCUS;
     const timeline = document.getElementById('timeline');
     const labels = document.getElementById('timeLabels');
     const eventsCountEl = document.getElementById('eventsCount');
@@ -14,6 +17,15 @@ document.addEventListener('DOMContentLoaded', () => {
 
     document.documentElement.style.setProperty('--timeline-height', (window.HEIGHT||1200) + 'px');
 
+    const QUARTER = 15 * 60 * 1000;
+    const HOUR = 60 * 60 * 1000;
+    const TWELVE_H = 12 * HOUR;
+    // day views are limited to 3000px; multi-day views scale on (layout.MAX_RANGE_HEIGHT_PX)
+    const MAX_HEIGHT = rangeMode ? 20000 : 3000;
+    const MIN_SEGMENT_PX = 2;
+    const LABEL_MIN_PX = 14;
+    const LABEL_SPACING_PX = 24;
+
 
     function showNotice(msg, success=true, timeout=3000) {
       if (!noticeArea) return;
@@ -25,8 +37,6 @@ document.addEventListener('DOMContentLoaded', () => {
       setTimeout(()=>{ if (noticeArea.contains(d)) noticeArea.removeChild(d); }, timeout);
     }
 
-    function timeToMs(t) { const v = new Date(t).getTime(); return isNaN(v) ? null : v; }
-
     function cssColorFor(str) {
       try {
         let h = 0;
@@ -58,202 +68,336 @@ document.addEventListener('DOMContentLoaded', () => {
       return raw;
     }
 
-    function render() {
-      const fullStart = new Date(day + 'T00:00:00').getTime();
-      const fullEnd = new Date(day + 'T23:59:59').getTime();
+    function loadLayout(px) {
+      // Segments are merged per pixel row on the server, so a new height needs a new layout
+      const url = rangeMode
+        ? '/api/layout?from=' + encodeURIComponent(layout.from) + '&to=' + encodeURIComponent(layout.to) + '&px=' + px
+        : '/api/layout?day=' + encodeURIComponent(day) + '&focus=' + (focusMode ? 1 : 0) + '&px=' + px;
+      if (pending === url) return;
+      pending = url;
+      fetch(url).then(r => r.json()).then(l => {
+        if (pending !== url) return;
+        pending = null;
+        layout = l;
+        indexSegments();
+        render();
+      }).catch(err => { pending = null; showNotice('Layout konnte nicht geladen werden', false); console.error(err); });
+    }
+
+    // While the height slider moves, redraw the current segments at once and
+    // fetch the layout for the new height only when it comes to rest
+    let layoutTimer = null;
+    function requestLayout(px) {
+      clearTimeout(layoutTimer);
+      layoutTimer = setTimeout(() => loadLayout(px), 150);
+    }
+
+    // Normalizing and coloring happen once per distinct title, not per segment and frame
+    const seen = {}; // map displayName -> color to ensure same color per program
+    const styles = new Map(); // raw title -> {name, color}
+    function styleFor(title) {
+      let st = styles.get(title);
+      if (!st) {
+        const name = normalizeTitle(title);
+        if (!seen[name]) seen[name] = cssColorFor(name);
+        st = {name, color: seen[name]};
+        styles.set(title, st);
+      }
+      return st;
+    }
+
+    function labelFor(seg) {
+      if (seg.label === undefined) {
+        const name = seg.title || styleFor(seg.title).name;
+        // Runs of sub-pixel events are merged into one "mixed activity" segment
+        seg.label = seg.mixed ? 'Gemischte Aktivität (' + seg.count + ' Einträge, überwiegend ' + name + ')' : name;
+      }
+      return seg.label;
+    }
+
+    // Segments (sorted by start) are drawn on one canvas that only covers the
+    // visible part of the timeline; block ids map to their single-block segment
+    // so live updates can patch them.
+    const canvas = document.createElement('canvas');
+    canvas.className = 'timeline-canvas';
+    canvas.setAttribute('role', 'img');
+    const ctx = canvas.getContext('2d');
+    const byId = new Map();
+    let maxSpanPct = 0; // longest segment, bounds the search for the first visible one
+    let timelineHeight = 0;
+    let frame = 0;
+    let hatch = null;
+
+    function indexSegments() {
+      byId.clear();
+      maxSpanPct = 0;
+      layout.segments.forEach(seg => {
+        if (seg.id != null) byId.set(seg.id, seg);
+        if (seg.heightPct > maxSpanPct) maxSpanPct = seg.heightPct;
+      });
+    }
+
+    function firstVisible(pct) {
+      // segments start in order, so nothing before (pct - longest segment) can reach pct
+      const target = pct - maxSpanPct;
+      const segs = layout.segments;
+      let lo = 0, hi = segs.length;
+      while (lo < hi) {
+        const mid = (lo + hi) >> 1;
+        if (segs[mid].topPct < target) lo = mid + 1; else hi = mid;
+      }
+      return lo;
+    }
+
+    function hatchPattern() {
+      if (!hatch) {
+        const tile = document.createElement('canvas');
+        tile.width = tile.height = 8;
+        const t = tile.getContext('2d');
+        t.strokeStyle = 'rgba(255,255,255,0.25)';
+        t.lineWidth = 3;
+        t.beginPath(); t.moveTo(0, 8); t.lineTo(8, 0); t.stroke();
+        hatch = ctx.createPattern(tile, 'repeat');
+      }
+      return hatch;
+    }
 
-      // Determine the visible window: if focusMode and there are events, reduce to min/max timestamps
-      let winStart = fullStart;
-      let winEnd = fullEnd;
-
-      // compute numeric starts/ends for events
-      const evBounds = events
-        .map(ev => {
-          let s = ev.start; let e = ev.end;
-          if (typeof s === 'number' && s < 1e12) s = s * 1000;
-          if (typeof e === 'number' && e < 1e12) e = e * 1000;
-          s = timeToMs(s); e = timeToMs(e);
-          return (isFinite(s) && isFinite(e)) ? {s,e} : null;
-        })
-        .filter(Boolean);
-
-      if (focusMode && evBounds.length > 0) {
-        let minS = Math.min(...evBounds.map(x => x.s));
-        let maxE = Math.max(...evBounds.map(x => x.e));
-        // add a small padding (5 minutes)
-        const pad = 5 * 60 * 1000;
-        winStart = Math.max(fullStart, minS - pad);
-        winEnd = Math.min(fullEnd, maxE + pad);
-        // ensure minimal visible span (15 minutes)
-        if (winEnd - winStart < 15 * 60 * 1000) {
-          const mid = Math.round((winStart + winEnd)/2);
-          winStart = mid - 7.5 * 60 * 1000;
-          winEnd = mid + 7.5 * 60 * 1000;
+    function scheduleDraw() {
+      if (!frame) frame = requestAnimationFrame(draw);
+    }
+
+    function draw() {
+      frame = 0;
+      if (!timelineHeight || layout.winStart == null) return;
+      const width = timeline.clientWidth;
+      const viewH = Math.max(1, Math.min(timelineHeight, window.innerHeight));
+      // keep the canvas over the visible slice of the timeline
+      const top = Math.max(0, Math.min(timelineHeight - viewH, -timeline.getBoundingClientRect().top));
+      const dpr = window.devicePixelRatio || 1;
+      if (canvas.width !== Math.round(width * dpr) || canvas.height !== Math.round(viewH * dpr)) {
+        canvas.width = Math.round(width * dpr);
+        canvas.height = Math.round(viewH * dpr);
+        canvas.style.height = viewH + 'px';
+      }
+      canvas.style.transform = 'translateY(' + top + 'px)';
+      ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      ctx.clearRect(0, 0, width, viewH);
+
+      const pxPerPct = timelineHeight / 100;
+      const topPct = top / pxPerPct;
+      const bottomPct = (top + viewH) / pxPerPct;
+      const x = 8, w = Math.max(0, width - 16);
+      ctx.font = '600 12px system-ui, -apple-system, Roboto, Arial, sans-serif';
+      ctx.textBaseline = 'middle';
+      const segs = layout.segments;
+      for (let i = firstVisible(topPct); i < segs.length; i++) {
+        const seg = segs[i];
+        if (seg.topPct > bottomPct) break;
+        if (seg.topPct + seg.heightPct < topPct) continue;
+        const y = seg.topPct * pxPerPct - top;
+        // Allow zero-length segments (browser-tab pings) to render as a thin visible block
+        const h = Math.max(MIN_SEGMENT_PX, seg.heightPct * pxPerPct);
+        ctx.globalAlpha = seg.mixed ? 0.8 : 0.95;
+        ctx.fillStyle = styleFor(seg.title).color;
+        ctx.fillRect(x, y, w, h);
+        if (seg.mixed) {
+          ctx.fillStyle = hatchPattern();
+          ctx.fillRect(x, y, w, h);
+        }
+        ctx.globalAlpha = 1;
+        if (h >= LABEL_MIN_PX && w > 16) {
+          // label in the visible middle of the block, clipped to it
+          const ty = (Math.max(y, 0) + Math.min(y + h, viewH)) / 2;
+          ctx.save();
+          ctx.beginPath();
+          ctx.rect(x + 8, y, w - 16, h);
+          ctx.clip();
+          ctx.fillStyle = '#fff';
+          ctx.fillText(labelFor(seg), x + 8, ty);
+          ctx.restore();
         }
-      } else if (focusMode) {
-        // no events, fall back to default 08:00-20:00 when focusing
-        winStart = new Date(day + 'T08:00:00').getTime();
-        winEnd = new Date(day + 'T20:00:00').getTime();
       }
+      drawGrid(top, viewH);
+    }
 
-      const winSpan = winEnd - winStart;
+    function drawGrid(top, viewH) {
+      // hour and quarter-hour lines over the events, one path per line style
+      const winStart = layout.winStart, span = layout.winEnd - layout.winStart;
+      const pxPerMs = timelineHeight / span;
+      const tFrom = winStart + top / pxPerMs, tTo = winStart + (top + viewH) / pxPerMs;
+      const quarters = QUARTER * pxPerMs >= 6;
+      const hours = new Path2D(), minor = new Path2D();
+      const width = timeline.clientWidth;
+      for (let t = Math.ceil(tFrom / QUARTER) * QUARTER; t <= tTo; t += QUARTER) {
+        const isHour = new Date(t).getMinutes() === 0;
+        if (!isHour && !quarters) continue;
+        const y = Math.round((t - winStart) * pxPerMs - top) + 0.5;
+        const path = isHour ? hours : minor;
+        path.moveTo(8, y);
+        path.lineTo(width - 8, y);
+      }
+      ctx.lineWidth = 1;
+      ctx.strokeStyle = 'rgba(0,0,0,0.12)';
+      ctx.stroke(minor);
+      ctx.strokeStyle = 'rgba(0,0,0,0.26)';
+      ctx.stroke(hours);
+    }
 
-      // scale the container height based on winSpan and user-selected base height
-      const baseHeight = parseInt(heightRange.value || window.HEIGHT || 1200, 10) || 1200;
-      // use 12 hours as a baseline (so default focus 08:00-20:00 equals baseHeight)
-      const twelveH = 12 * 60 * 60 * 1000;
-      let computedHeight = Math.round((winSpan / twelveH) * baseHeight);
-      // allow filling the viewport when in focus mode so the timeline can still take full screen
-      try { if (focusMode) computedHeight = Math.max(computedHeight, Math.round(window.innerHeight * 0.85)); } catch(e) {}
-      computedHeight = Math.max(300, Math.min(3000, computedHeight));
-      document.documentElement.style.setProperty('--timeline-height', computedHeight + 'px');
+    function segmentAt(clientY) {
+      const pct = (clientY - timeline.getBoundingClientRect().top) / timelineHeight * 100;
+      const minPct = MIN_SEGMENT_PX / timelineHeight * 100;
+      const segs = layout.segments;
+      let hit = null;
+      // the last match is the one drawn on top
+      for (let i = firstVisible(pct - minPct); i < segs.length && segs[i].topPct <= pct; i++) {
+        if (pct <= segs[i].topPct + Math.max(segs[i].heightPct, minPct)) hit = segs[i];
+      }
+      return hit;
+    }
 
-      // debug info in console
-      try { console.debug('Timeline render:', {day, focusMode, eventsCount: events.length, winStart: new Date(winStart).toISOString(), winEnd: new Date(winEnd).toISOString(), height: computedHeight}) } catch(e) {}
+    canvas.addEventListener('mousemove', e => {
+      const seg = segmentAt(e.clientY);
+      canvas.title = seg ? labelFor(seg) + '\n' + new Date(seg.start).toLocaleString() + ' - ' + new Date(seg.end).toLocaleString() : '';
+    });
+
+    function updateCount() {
+      const shown = layout.segments.length;
+      const text = layout.events + ' Einträge' + (shown !== layout.events ? ' (' + shown + ' Segmente)' : '');
+      canvas.setAttribute('aria-label', 'Timeline: ' + text);
+      if (eventsCountEl) eventsCountEl.innerText = text;
+    }
+
+    // Live updates: apply committed inserts/extensions of blocks without reloading the view
+    function applyDeltas(changes) {
+      let lo, hi;
+      if (rangeMode) {
+        lo = layout.winStart; hi = layout.winEnd;
+      } else {
+        // blocks belong to the day they start in
+        const d = new Date(day + 'T00:00:00');
+        lo = d.getTime();
+        hi = d.setDate(d.getDate() + 1);
+      }
+      const span = layout.winEnd - layout.winStart;
+      let reload = false, added = false;
+      changes.forEach(ch => {
+        if (ch.start < lo || ch.start >= hi) return;
+        let seg = byId.get(ch.id);
+        // outside the (focus) window, or an extension of a block that was merged into a mixed segment
+        if (ch.start < layout.winStart || ch.end > layout.winEnd || (!seg && ch.op !== 'insert')) { reload = true; return; }
+        if (!seg) {
+          seg = {id: ch.id, title: ch.title, count: 1, mixed: false};
+          const last = layout.segments[layout.segments.length - 1];
+          layout.segments.push(seg);
+          byId.set(ch.id, seg);
+          layout.events += 1;
+          if (last && last.start > ch.start) added = true;
+        }
+        seg.start = ch.start;
+        seg.end = ch.end;
+        seg.topPct = (ch.start - layout.winStart) / span * 100;
+        seg.heightPct = (ch.end - ch.start) / span * 100;
+        if (seg.heightPct > maxSpanPct) maxSpanPct = seg.heightPct;
+      });
+      if (added) layout.segments.sort((a, b) => a.topPct - b.topPct);
+      const empty = timeline.querySelector('.empty-state');
+      if (empty && layout.segments.length) empty.remove();
+      updateCount();
+      scheduleDraw();
+      if (reload) requestLayout(layout.px);
+    }
+
+    function connectLive() {
+      if (!window.EventSource) return;
+      const source = new EventSource('/api/live');
+      source.addEventListener('blocks', e => { try { applyDeltas(JSON.parse(e.data)); } catch (err) { console.error(err); } });
+      source.addEventListener('reset', () => loadLayout(layout.px));
+    }
 
-      // draw time labels: choose hour marks covering winStart..winEnd
+    function drawLabels(winStart, winEnd) {
+      // hour labels, thinned out so they stay at least LABEL_SPACING_PX apart
       labels.innerHTML = '';
+      const winSpan = winEnd - winStart;
+      const pxPerHour = HOUR / winSpan * timelineHeight;
+      const step = [1, 2, 3, 6, 12, 24].find(h => h * pxPerHour >= LABEL_SPACING_PX) || 24;
       const h0 = new Date(winStart);
       h0.setMinutes(0,0,0);
-      if (h0.getTime() > winStart) h0.setHours(h0.getHours() - 1);
-      for (let t = h0.getTime(); t <= winEnd + 1; t += 60 * 60 * 1000) {
-        if (t < winStart) continue;
-        const pct = (t - winStart) / winSpan * 100;
+      if (h0.getTime() < winStart) h0.setHours(h0.getHours() + 1);
+      const frag = document.createDocumentFragment();
+      for (const t = h0; t.getTime() <= winEnd + 1; t.setHours(t.getHours() + 1)) {
+        const hh = t.getHours();
+        if (hh % step !== 0) continue;
         const div = document.createElement('div');
         div.className = 'time-label';
-        div.style.top = pct + '%';
-        const hh = new Date(t).getHours().toString().padStart(2,'0');
-        div.innerText = hh + ':00';
-        labels.appendChild(div);
+        div.style.top = ((t.getTime() - winStart) / winSpan * 100) + '%';
+        // multi-day views name the day at midnight
+        div.innerText = rangeMode && hh === 0
+          ? t.getDate().toString().padStart(2,'0') + '.' + (t.getMonth() + 1).toString().padStart(2,'0') + '.'
+          : hh.toString().padStart(2,'0') + ':00';
+        frag.appendChild(div);
       }
+      labels.appendChild(frag);
+    }
 
-      // grid (hour + quarter-hour lines)
-      const grid = document.createElement('div');
-      grid.className = 'grid';
-      const fifteen = 15 * 60 * 1000;
-      const firstMark = Math.floor(winStart / fifteen) * fifteen;
-      for (let t = firstMark; t <= winEnd + 1; t += fifteen) {
-        if (t < winStart) continue;
-        const pct = (t - winStart) / winSpan * 100;
-        const line = document.createElement('div');
-        const dt = new Date(t);
-        if (dt.getMinutes() === 0) {
-          line.className = 'grid-line hour';
-        } else {
-          line.className = 'grid-line quarter';
-        }
-        line.style.top = pct + '%';
-        grid.appendChild(line);
-      }
+    function render() {
+      const fullStart = new Date(day + 'T00:00:00').getTime();
+      const fullEnd = new Date(day + 'T23:59:59').getTime();
+      const winStart = layout.winStart || fullStart;
+      const winEnd = layout.winEnd || fullEnd;
+      const winSpan = winEnd - winStart;
 
-      // clear timeline and append grid + events layer
-      timeline.innerHTML = '';
-      // append grid (recreate content)
-      timeline.appendChild(grid);
-
-      // ensure grid is visible above events (overlay) so thin lines are always visible
-      grid.style.zIndex = '3';
-      grid.style.display = 'block';
-      grid.style.width = '100%';
-
-      // create or reuse events layer (ensure it's always defined)
-      let eventsLayer = timeline.querySelector('.events-layer');
-      if (!eventsLayer) {
-        eventsLayer = document.createElement('div');
-        eventsLayer.className = 'events-layer';
-        timeline.appendChild(eventsLayer);
-      } else {
-        eventsLayer.innerHTML = '';
+      // scale the container height based on winSpan and user-selected base height
+      const baseHeight = parseInt(heightRange.value || window.HEIGHT || 1200, 10) || 1200;
+      // use 12 hours as a baseline (so default focus 08:00-20:00 equals baseHeight)
+      let computedHeight = Math.round((winSpan / TWELVE_H) * baseHeight);
+      // allow filling the viewport when in focus mode so the timeline can still take full screen
+      try { if (focusMode) computedHeight = Math.max(computedHeight, Math.round(window.innerHeight * 0.85)); } catch(e) {}
+      computedHeight = Math.max(300, Math.min(MAX_HEIGHT, computedHeight));
+      document.documentElement.style.setProperty('--timeline-height', computedHeight + 'px');
+      timelineHeight = computedHeight;
+      if (layout.px !== computedHeight || !!layout.focus !== focusMode) {
+        // keep showing the current layout (rescaled) until the matching one arrives
+        requestLayout(computedHeight);
       }
 
-      eventsLayer.style.position = 'absolute';
-      eventsLayer.style.left = '0';
-      eventsLayer.style.right = '0';
-      eventsLayer.style.top = '0';
-      eventsLayer.style.bottom = '0';
-      eventsLayer.style.zIndex = '2';
-
-      // render events with clamping and robustness
-      const seen = {}; // map displayName -> color to ensure same color per program
-
-      // track how many DOM events are appended
-      let appended = 0;
-      events.forEach(ev => {
-        let s_raw = ev.start;
-        let e_raw = ev.end;
-        if (typeof s_raw === 'number' && s_raw < 1e12) s_raw = s_raw * 1000;
-        if (typeof e_raw === 'number' && e_raw < 1e12) e_raw = e_raw * 1000;
-
-        const s = timeToMs(s_raw);
-        const e = timeToMs(e_raw);
-        if (!s || !e || !isFinite(s) || !isFinite(e)) return;
-
-        const start = Math.max(s, winStart);
-        const end = Math.min(e, winEnd);
-        // Allow zero-length events (end === start) to render as a tiny visible block
-        // (used for browser-tab events). Only skip when end < start due to clipping.
-        if (end < start) return;
-
-        let topPct = (start - winStart) / winSpan * 100;
-        let heightPct = (end - start) / winSpan * 100;
-        if (!isFinite(topPct) || isNaN(topPct)) return;
-        topPct = Math.max(0, Math.min(100, topPct));
-        heightPct = Math.max(0.5, Math.min(100 - topPct, heightPct));
-
-        // normalize display name and pick a consistent color
-        const displayName = normalizeTitle(ev.title);
-        if (!seen[displayName]) seen[displayName] = cssColorFor(displayName);
-        const color = seen[displayName];
-
-        const el = document.createElement('div');
-        el.className = 'event';
-        el.style.top = topPct + '%';
-        el.style.height = heightPct + '%';
-        el.style.background = color;
-        // show only the full title text (no duplicated meta line)
-        const titleSpan = document.createElement('span');
-        titleSpan.className = 'title';
-        titleSpan.textContent = ev.title || displayName;
-        el.appendChild(titleSpan);
-        // accessibility
-        el.setAttribute('aria-label', ev.title || displayName);
-        el.setAttribute('role', 'listitem');
-        el.setAttribute('tabindex', '0');
-        el.title = (ev.title || displayName) + '\n' + new Date(s).toLocaleString() + ' - ' + new Date(e).toLocaleString();
-        // keyboard: Enter/Space opens tooltip-like alert (simple accessible fallback)
-        el.addEventListener('keydown', (evk)=>{ if (evk.key === 'Enter' || evk.key === ' ') { evk.preventDefault(); alert(el.title); } });
-        eventsLayer.appendChild(el);
-        appended += 1;
-      });
+      // debug info in console
+      try { console.debug('Timeline render:', {day, rangeMode, focusMode, eventsCount: layout.events, segments: layout.segments.length, winStart: new Date(winStart).toISOString(), winEnd: new Date(winEnd).toISOString(), height: computedHeight}) } catch(e) {}
+
+      drawLabels(winStart, winEnd);
 
-      if (appended === 0) {
+      if (canvas.parentNode !== timeline) {
+        timeline.innerHTML = '';
+        timeline.appendChild(canvas);
+      }
+      const empty = timeline.querySelector('.empty-state');
+      if (layout.segments.length === 0 && !empty) {
         const note = document.createElement('div');
         note.className = 'empty-state';
         note.innerText = 'Keine sichtbaren Einträge im aktuellen Fokus.';
         timeline.appendChild(note);
+      } else if (layout.segments.length && empty) {
+        empty.remove();
       }
 
-      // update events counter UI
-      if (eventsCountEl) {
-        eventsCountEl.innerText = appended + ' Einträge';
-      }
-
-      // debug: counts
-      try { console.debug('grid-lines=', grid.querySelectorAll('.grid-line').length, 'events=', events.length, 'appended=', appended); } catch(e) {}
-
-      // no legend anymore - titles are shown inside blocks
+      updateCount();
+      scheduleDraw();
     }
 
     // wire up controls
     if (focusToggle) focusToggle.addEventListener('change', e => { focusMode = e.target.checked; render(); });
     if (toggleDay) toggleDay.addEventListener('click', () => { focusMode = !focusMode; if (focusToggle) focusToggle.checked = focusMode; render(); });
-    if (heightRange) heightRange.addEventListener('input', e => { document.documentElement.style.setProperty('--timeline-height', e.target.value + 'px'); render(); });
+    if (heightRange) heightRange.addEventListener('input', () => render());
+    // only the visible slice is drawn, so scrolling and resizing redraw (once per frame)
+    window.addEventListener('scroll', scheduleDraw, {passive: true});
+    window.addEventListener('resize', scheduleDraw);
     if (todayBtn) todayBtn.addEventListener('click', () => { window.location.href = '/timeline?day=' + new Date().toISOString().slice(0,10); });
 
 
 
     // initial
+    indexSegments();
     render();
+    connectLive();
   } catch (err) {
     console.error('Timeline init error', err);
     const t = document.getElementById('timeline');
@@ -1,64 +1,130 @@
-from fastapi import FastAPI, Request
-from fastapi.middleware.cors import CORSMiddleware
-import uvicorn
-from database import insert_tab_block
-from datetime import datetime
-from input_tracker import is_active
-
-# Try to import the window tracker helper to determine if Firefox is active.
-# If unavailable, we default to not storing incoming tabs (safer behavior).
-try:
-    from window_tracker import get_active_target
-except Exception:
-    get_active_target = None
-
-app = FastAPI()
-
-# Allow CORS for development (e.g. firefox extension origin). Adjust for production.
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Speichere die Tabs in einer globalen Liste (oder DB)
-active_tabs = {}
-
-@app.post("/tab")
-async def receive_tab(req: Request):
-    data = await req.json()
-    title = data.get("title")
-    url = data.get("url")
-    now = datetime.now()
+from fastapi import APIRouter, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional, Union
+from datetime import datetime, timedelta
+import clock
+from config import TAB_BATCH_MAX_EVENTS
+from ingest import tab_buffer, BufferFull
 
-    # Only store tab pings when Firefox is currently active. This avoids filling
-    # the buffer with tabs from other browsers or when the user is inactive.
-    is_firefox = False
+# Tab ingestion routes; mounted into the single app in server.py
+router = APIRouter()
+
+
+class TabEvent(BaseModel):
+    title: str = ""
+    url: str
+    # Epoch milliseconds (Date.now() in the extension) or ISO string; default: arrival time
+    ts: Optional[Union[float, datetime]] = None
+    # Whether the browser window had focus; None => use the foreground-window check
+    focused: Optional[bool] = None
+
+    @field_validator("ts")
+    @classmethod
+    def _representable(cls, ts):
+        # Epoch ms far outside the datetime range would fail later in _event_time
+        if isinstance(ts, float):
+            try:
+                datetime.fromtimestamp(ts / 1000)
+            except (OverflowError, ValueError, OSError):
+                raise ValueError("ts is not a valid epoch timestamp in milliseconds")
+        return ts
+
+
+class TabBatch(BaseModel):
+    events: List[TabEvent] = Field(default_factory=list, max_length=TAB_BATCH_MAX_EVENTS)
+
+
+async def _firefox_active() -> bool:
+    """Whether Firefox is the foreground app, without blocking the event loop.
+
+    Uses the window service's cached value; only if nothing is cached yet is
+    the (possibly slow) lookup run in the threadpool.
+    """
     try:
         # Import window_tracker at call-time to allow tests or runtime patching of
         # get_active_target to take effect (avoids stale bindings from module import).
         import window_tracker
-        aw = getattr(window_tracker, 'get_active_target', None)
-        if callable(aw):
-            aw = aw()
+        aw = window_tracker.get_cached_target()
+        if aw is None:
+            fn = getattr(window_tracker, 'get_active_target', None)
+            aw = await run_in_threadpool(fn) if callable(fn) else fn
         aw_str = str(aw).lower() if aw is not None else ''
-        is_firefox = ('firefox' in aw_str) or ('mozilla' in aw_str)
+        return ('firefox' in aw_str) or ('mozilla' in aw_str)
     except Exception:
-        is_firefox = False
+        return False
+
 
-    if not is_firefox:
+def _event_time(ts, now):
+    if ts is None:
+        return now
+    if isinstance(ts, datetime):
+        dt = ts.astimezone().replace(tzinfo=None) if ts.tzinfo else ts
+    else:
+        dt = datetime.fromtimestamp(ts / 1000)
+    # Clients with a skewed clock must not create blocks in the future
+    return min(dt, now + timedelta(seconds=5))
+
+
+def _busy():
+    # Backpressure: the tracker is behind; the extension keeps its events and retries
+    raise HTTPException(status_code=503, detail="tab buffer full", headers={"Retry-After": "5"})
+
+
+@router.post("/tab")
+async def receive_tab(req: Request):
+    # A JSON content type needs a CORS preflight, so websites cannot post here
+    # with a "simple" text/plain request
+    if req.headers.get("content-type", "").split(";")[0].strip().lower() != "application/json":
+        raise HTTPException(status_code=415, detail="expected application/json")
+    data = await req.json()
+    title = data.get("title")
+    url = data.get("url")
+    now = clock.now()
+
+    # Only store tab pings when Firefox is currently active. This avoids filling
+    # the buffer with tabs from other browsers or when the user is inactive.
+    if not await _firefox_active():
         return {"status": "ignored", "reason": "firefox_not_active"}
 
-    # Store tabs keyed by URL and record the timestamp. This avoids creating a new
-    # entry per incoming ping and lets the tracker deduplicate easily.
-    active_tabs[url] = {"title": title, "url": url, "ts": now}
+    # Queue the ping with its arrival time; the buffer keeps every event in order
+    # and the tracker credits each tab until the next event replaces it.
+    if not tab_buffer.put(url, title, now):
+        _busy()
 
     return {"status": "ok"}
 
-def run_listener():
-    uvicorn.run(app, host="127.0.0.1", port=5000)
 
-if __name__ == "__main__":
-    run_listener()
+@router.post("/tabs/batch")
+async def receive_tab_batch(batch: TabBatch):
+    """Accept many timestamped tab events at once (see friefoxPlugin/background.js).
+
+    Unflagged events are kept only while Firefox is the foreground app. Events
+    flagged `focused: false` mark that Firefox lost focus; they are queued as
+    markers that end the current tab's time. Every kept event is handed to the
+    tracker in timestamp order, repeated visits included; if the buffer is
+    full, the whole batch is refused with 503.
+    """
+    now = clock.now()
+    firefox = None
+    accepted = []
+    for ev in sorted(batch.events, key=lambda e: _event_time(e.ts, now)):
+        keep = ev.focused
+        if keep is None:
+            if firefox is None:
+                firefox = await _firefox_active()
+            keep = firefox
+        if keep or ev.focused is False:
+            accepted.append({"title": ev.title, "url": ev.url, "ts": _event_time(ev.ts, now),
+                             "focused": ev.focused is not False})
+    try:
+        tab_buffer.put_many(accepted)
+    except BufferFull:
+        _busy()
+    return {"status": "ok", "accepted": len(accepted), "ignored": len(batch.events) - len(accepted)}
+
+
+@router.get("/tabs/stats")
+def tab_stats():
+    """Fill level and accepted/rejected/dropped counters of the ingestion buffer."""
+    return tab_buffer.stats()
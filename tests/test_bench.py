@@ -0,0 +1,43 @@
+import unittest
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import bench
+
+
+class BenchTests(unittest.TestCase):
+    def test_workload_is_reproducible_and_shaped(self):
+        monday = datetime(2024, 3, 4)
+        work = list(bench.generate(monday, 7, titles=20, burst_size=5, seed=1))
+        self.assertEqual(work, list(bench.generate(monday, 7, titles=20, burst_size=5, seed=1)))
+        self.assertNotEqual(work, list(bench.generate(monday, 7, titles=20, burst_size=5, seed=2)))
+        # only weekdays, inside working hours, in time order
+        self.assertEqual({w[1].weekday() for w in work}, {0, 1, 2, 3, 4})
+        self.assertTrue(all(8 <= w[1].hour < 18 for w in work))
+        self.assertEqual([w[1] for w in work], sorted(w[1] for w in work))
+        blocks = [w for w in work if w[0] == 'block']
+        tabs = [w for w in work if w[0] == 'tab']
+        self.assertTrue(blocks and tabs)
+        self.assertTrue(all(b[2] - b[1] == timedelta(seconds=5) for b in blocks))
+        self.assertLessEqual(len({b[3] for b in blocks}), 20)
+
+    def test_check_thresholds_and_baseline(self):
+        metrics = {'day_query.p95_ms': 12.0, 'insert.writes_per_s': 8000.0, 'export.csv_rows_per_s': 50000.0}
+        self.assertEqual(bench.check(metrics, {'day_query.p95_ms': {'max': 20}, 'missing.metric': {'max': 1}}), [])
+        failures = bench.check(metrics, {'insert.writes_per_s': {'min': 10000}},
+                               baseline={'day_query.p95_ms': 8.0, 'export.csv_rows_per_s': 55000.0}, tolerance=0.2)
+        self.assertEqual(len(failures), 2)
+        self.assertTrue(failures[0].startswith('insert.writes_per_s'))
+        self.assertTrue(failures[1].startswith('day_query.p95_ms'))
+
+    def test_thresholds_file_is_valid(self):
+        with open(bench.THRESHOLDS_PATH, encoding='utf-8') as f:
+            thresholds = json.load(f)
+        self.assertTrue(all(set(limit) <= {'min', 'max'} for limit in thresholds.values()))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bucket import Bucket, BucketEngine, bucket_start
+
+
+class BucketTests(unittest.TestCase):
+    def test_winner_is_weighted_by_dwell(self):
+        b = Bucket(datetime(2024, 1, 1, 10, 0))
+        for _ in range(3):
+            b.add('ShortPings', 1)
+        b.add('LongStay', 5)
+        self.assertEqual(b.winner(), 'LongStay')
+        self.assertEqual(b.total(), 8)
+
+    def test_bucket_start_per_resolution(self):
+        now = datetime(2024, 1, 1, 10, 47, 30)
+        self.assertEqual(bucket_start(now, 1), datetime(2024, 1, 1, 10, 47))
+        self.assertEqual(bucket_start(now, 15), datetime(2024, 1, 1, 10, 45))
+        self.assertEqual(bucket_start(now, 60), datetime(2024, 1, 1, 10, 0))
+
+    def test_engine_closes_each_resolution_once(self):
+        closed = []
+        engine = BucketEngine(resolutions=(1, 5, 15, 60), on_close=closed.append)
+        t0 = datetime(2024, 1, 1, 9, 58)
+        for i in range(60):  # 5 minutes of 5-second samples
+            now = t0 + timedelta(seconds=5 * i)
+            engine.advance(now)
+            engine.add('Editor' if now.minute < 59 else 'Mail', 5)
+        engine.advance(t0 + timedelta(minutes=5))
+        by_res = {}
+        for b in closed:
+            by_res.setdefault(b.minutes, []).append((b.start.strftime('%H:%M'), b.winner(), b.counts[b.winner()]))
+        self.assertEqual(by_res[1], [('09:58', 'Editor', 60), ('09:59', 'Mail', 60), ('10:00', 'Editor', 60),
+                                     ('10:01', 'Editor', 60), ('10:02', 'Editor', 60)])
+        self.assertEqual(by_res[5], [('09:55', 'Editor', 60)])
+        self.assertEqual(by_res[15], [('09:45', 'Editor', 60)])
+        self.assertEqual(by_res[60], [('09:00', 'Editor', 60)])
+
+
+if __name__ == '__main__':
+    unittest.main()
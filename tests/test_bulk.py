@@ -0,0 +1,106 @@
+import unittest
+import tempfile
+import os
+import importlib
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+
+
+class BulkTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self._open_db('a.db')
+        import bulk
+        self.bulk = bulk
+        self.t0 = datetime(2024, 3, 5, 9, 0)
+
+    def _open_db(self, name):
+        config.DB_PATH = os.path.join(self.tmp.name, name)
+        import database
+        importlib.reload(database)
+        self.db = database
+
+    def tearDown(self):
+        self.db.close()
+        self.tmp.cleanup()
+
+    def _blocks(self):
+        day = datetime(2024, 3, 5)
+        return [(r[3], r[4], r[5]) for r in self.db.iter_blocks(day, day + timedelta(days=1))]
+
+    def _fill(self):
+        self.db.insert_block(self.t0, self.t0 + timedelta(minutes=30), 'Editor, "draft"')
+        self.db.insert_tab_block(self.t0 + timedelta(minutes=31), 'Docs', 'https://example.org/a')
+        self.db.insert_block(self.t0 + timedelta(minutes=40), self.t0 + timedelta(minutes=50), 'Terminal')
+        self.db.flush()
+
+    def test_npz_roundtrip_is_idempotent_and_updates_rollups(self):
+        self._fill()
+        expected = self._blocks()
+        path = os.path.join(self.tmp.name, 'out.npz')
+        self.assertEqual(self.bulk.export_file(self.t0, self.t0 + timedelta(hours=1), path), 3)
+
+        cols = self.bulk.columns(self.t0, self.t0 + timedelta(hours=1))
+        self.assertEqual(cols['start'].dtype.name, 'int64')
+        self.assertEqual(cols['url_dict'], ['https://example.org/a'])
+        self.assertEqual(cols['url'].tolist(), [-1, 0, -1])
+
+        self.db.close()
+        self._open_db('b.db')
+        self.assertEqual(self.bulk.import_file(path), 3)
+        self.assertEqual(self._blocks(), expected)
+        self.assertEqual(self.bulk.import_file(path), 0)
+        summary = dict(self.db.get_summary(datetime(2024, 3, 5), datetime(2024, 3, 6)))
+        self.assertEqual(summary['Editor, "draft"'], 30 * 60000)
+        self.assertEqual(summary['Terminal'], 10 * 60000)
+
+    def test_text_exports_import(self):
+        import exporter
+        self._fill()
+        expected = self._blocks()
+        rows = list(self.db.iter_blocks(self.t0, self.t0 + timedelta(hours=1)))
+        ics = os.path.join(self.tmp.name, 'out.ics')
+        with open(ics, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(exporter.stream_ics(rows))
+        # The CSV export of older versions did not quote titles
+        legacy = os.path.join(self.tmp.name, 'old.csv')
+        with open(legacy, 'w', encoding='utf-8') as f:
+            f.write('start,end,title\n')
+            f.write(f'{(self.t0 + timedelta(hours=2)).isoformat()},{(self.t0 + timedelta(hours=3)).isoformat()},Mail, Inbox\n')
+
+        self.db.close()
+        self._open_db('b.db')
+        self.assertEqual(self.bulk.import_file(ics), 3)
+        self.assertEqual(self._blocks(), expected)
+        self.assertEqual(self.bulk.import_file(legacy), 1)
+        self.assertEqual(self._blocks()[-1][0], 'Mail, Inbox')
+        with self.assertRaises(ValueError):
+            self.bulk.import_file('blocks.xml')
+
+    def test_backfill_does_not_split_the_live_block(self):
+        self.db.insert_block(self.t0, self.t0 + timedelta(seconds=5), 'Editor')
+        old = int(datetime(2023, 6, 1, 9, 0).timestamp() * 1000)
+        self.assertEqual(self.db.import_blocks([(old, old + 60000, 'Old', None)]), 1)
+        self.db.insert_block(self.t0 + timedelta(seconds=5), self.t0 + timedelta(seconds=10), 'Editor')
+        self.db.flush()
+        self.assertEqual(self._blocks(), [('Editor', int(self.t0.timestamp() * 1000),
+                                           int((self.t0 + timedelta(seconds=10)).timestamp() * 1000))])
+
+    def test_parquet_roundtrip(self):
+        if self.bulk.pa is None:
+            self.skipTest('pyarrow not installed')
+        self._fill()
+        expected = self._blocks()
+        path = os.path.join(self.tmp.name, 'out.parquet')
+        self.bulk.export_file(self.t0, self.t0 + timedelta(hours=1), path)
+        self.db.close()
+        self._open_db('b.db')
+        self.assertEqual(self.bulk.import_file(path), 3)
+        self.assertEqual(self._blocks(), expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -21,10 +21,13 @@ class DatabaseMergeTests(unittest.TestCase):
         self.db = database
 
     def tearDown(self):
-        try:
-            os.remove(self.db_path)
-        except Exception:
-            pass
+        import database
+        database.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
 
     def test_merge_adjacent_blocks(self):
         from datetime import datetime, timedelta
@@ -63,7 +66,169 @@ class DatabaseMergeTests(unittest.TestCase):
         rows = self._rows('TabTitle - http://example.com')
         self.assertEqual(len(rows), 1)
 
+    def test_day_query_uses_epoch_index(self):
+        from datetime import datetime, timedelta
+        day = datetime(2024, 3, 5, 23, 59, 58)
+        self.db.insert_block(day - timedelta(days=1), day - timedelta(days=1) + timedelta(seconds=1), 'Yesterday')
+        self.db.insert_block(day, day + timedelta(seconds=1), 'LateBlock')
+        self.db.insert_block(day + timedelta(seconds=10), day + timedelta(seconds=20), 'NextDay')
+        self.db.flush()
+        rows = self.db.get_blocks_for_day('2024-03-05')
+        self.assertEqual([r[3] for r in rows], ['LateBlock'])
+        plan = self.db.reader().execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM blocks WHERE start_ms >= 0 AND start_ms < 1"
+        ).fetchall()
+        self.assertIn('idx_blocks_start_ms', ' '.join(str(r[-1]) for r in plan))
+
+    def test_migration_backfills_legacy_rows(self):
+        import sqlite3
+        fd, legacy = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.addCleanup(os.remove, legacy)
+        con = sqlite3.connect(legacy)
+        con.execute("CREATE TABLE blocks (id INTEGER PRIMARY KEY, start TEXT, end TEXT, title TEXT)")
+        con.execute("INSERT INTO blocks (start, end, title) VALUES ('2023-01-02T10:00:00', '2023-01-02T10:05:00', 'Legacy')")
+        con.execute("INSERT INTO blocks (start, end, title) VALUES ('2023-01-02T11:00:00', '2023-01-02T11:00:00', 'Page - Wiki - https://w.test/a')")
+        con.commit()
+        con.close()
+        self.db.set_db_path(legacy)
+        rows = self.db.get_blocks_for_day('2023-01-02')
+        self.assertEqual([r[3] for r in rows], ['Legacy', 'Page - Wiki - https://w.test/a'])
+        self.assertEqual(
+            self.db.reader().execute("SELECT text FROM urls").fetchall(), [('https://w.test/a',)]
+        )
+        self.db.set_db_path(self.db_path)
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(legacy + suffix):
+                os.remove(legacy + suffix)
+
+    def test_titles_are_interned(self):
+        from datetime import datetime, timedelta
+        now = datetime.now()
+        gap = timedelta(seconds=60)
+        self.db.insert_tab_block(now, 'Docs', 'http://a.test')
+        self.db.insert_block(now + gap, now + 2 * gap, 'Editor')
+        self.db.insert_tab_block(now + 3 * gap, 'Docs', 'http://b.test')
+        self.db.insert_block(now + 4 * gap, now + 5 * gap, 'Editor')
+        self.db.flush()
+        cur = self.db.reader()
+        self.assertEqual(cur.execute("SELECT COUNT(*) FROM titles").fetchone()[0], 2)
+        self.assertEqual(cur.execute("SELECT COUNT(*) FROM urls").fetchone()[0], 2)
+        self.assertEqual(cur.execute("SELECT COUNT(DISTINCT title_id) FROM block_data").fetchone()[0], 2)
+        self.assertEqual(len(self._rows('Docs - http://b.test')), 1)
+
+    def test_tab_burst_commits_once(self):
+        from datetime import datetime, timedelta
+        self.db.flush()
+        before = self.db._writer.commits
+        now = datetime.now()
+        for i in range(50):
+            self.db.insert_tab_block(now + timedelta(seconds=i * 10), f'Burst{i}', f'http://burst.test/{i}')
+        self.db.flush()
+        self.assertEqual(self.db._writer.commits - before, 1)
+        self.assertEqual(len(self._rows('Burst')), 50)
+
+    def test_open_block_coalesced_in_memory(self):
+        from datetime import datetime, timedelta
+        now = datetime.now()
+        for i in range(10):
+            self.db.insert_block(now + timedelta(seconds=5 * i), now + timedelta(seconds=5 * i + 5), 'Coalesce')
+        # Wait until the writer processed the samples without forcing a checkpoint
+        self.db._writer.call(lambda c: None)
+        self.assertEqual(self._raw_count('Coalesce'), 0)
+        self.assertEqual(self.db._writer.coalescer.open.end, now + timedelta(seconds=50))
+
+        # A different title closes the open block, which is then persisted
+        self.db.insert_block(now + timedelta(seconds=60), now + timedelta(seconds=65), 'Other')
+        self.db._writer.call(lambda c: None)
+        self.assertEqual(self._raw_count('Coalesce'), 1)
+        rows = self._rows('Coalesce')
+        self.assertEqual(rows[0][2], (now + timedelta(seconds=50)).isoformat())
+
+    def test_reader_connections_per_thread(self):
+        import sqlite3
+        import threading
+        seen = []
+        t = threading.Thread(target=lambda: seen.append(self.db.reader()))
+        t.start()
+        t.join()
+        self.assertIsNot(seen[0], self.db.reader())
+        self.assertIs(self.db.reader(), self.db.reader())
+        with self.assertRaises(sqlite3.OperationalError):
+            self.db.reader().execute("DELETE FROM block_data")
+
+    def test_rollups_follow_inserts_and_merges(self):
+        from datetime import datetime, timedelta
+        t0 = datetime(2024, 5, 6, 9, 50)
+        # 20 minutes across the 10:00 boundary, written as a merged run of samples
+        for i in range(4):
+            self.db.insert_block(t0 + timedelta(minutes=5 * i), t0 + timedelta(minutes=5 * i + 5), 'Editor')
+        self.db.insert_block(t0 + timedelta(minutes=30), t0 + timedelta(minutes=40), 'Mail')
+        self.db.flush()
+        self.assertEqual(self.db.get_summary('2024-05-06', '2024-05-07'), [('Editor', 20 * 60000), ('Mail', 10 * 60000)])
+        hours = self.db.get_summary(t0.replace(minute=0), t0 + timedelta(hours=2), group='hour')
+        self.assertEqual([ms for _, ms in hours], [10 * 60000, 20 * 60000])
+
+        self.db.delete_until_first_title_contains('2024-05-06', 'mail')
+        self.assertEqual(self.db.get_summary('2024-05-06', '2024-05-07'), [('Mail', 10 * 60000)])
+
+    def test_search_titles_and_urls(self):
+        from datetime import datetime, timedelta
+        t0 = datetime(2024, 2, 1, 9, 0)
+        self.db.insert_block(t0, t0 + timedelta(minutes=5), 'Jira - TICKET-1234 Fix login')
+        self.db.insert_tab_block(t0 + timedelta(days=20), 'Review', 'https://git.test/pr/1234')
+        self.db.insert_block(t0 + timedelta(days=40), t0 + timedelta(days=40, minutes=5), 'Editor')
+        self.db.flush()
+        rows = self.db.search_blocks('1234')
+        self.assertEqual({r[3] for r in rows}, {'Jira - TICKET-1234 Fix login', 'Review - https://git.test/pr/1234'})
+        self.assertEqual(len(self.db.search_blocks('ticket', start='2024-02-01', end='2024-02-02')), 1)
+        self.assertEqual(self.db.search_blocks('ticket', start='2024-02-02'), [])
+        self.assertEqual(len(self.db.search_blocks('1234', limit=1, offset=1)), 1)
+        # Short queries fall back to a dictionary scan
+        self.assertEqual([r[3] for r in self.db.search_blocks('Ed')], ['Editor'])
+
+    def test_trim_until_first_match(self):
+        from datetime import datetime, timedelta
+        t0 = datetime(2024, 2, 1, 8, 0)
+        self.db.insert_block(t0, t0 + timedelta(minutes=5), 'Early')
+        self.db.insert_block(t0 + timedelta(minutes=10), t0 + timedelta(minutes=15), 'Mozilla Firefox')
+        self.db.insert_block(t0 + timedelta(minutes=20), t0 + timedelta(minutes=25), 'Late')
+        self.assertEqual(self.db.delete_until_first_title_contains('2024-02-01', 'firefox'), 1)
+        self.assertEqual([r[3] for r in self.db.get_blocks_for_day('2024-02-01')], ['Mozilla Firefox', 'Late'])
+        self.assertEqual(self.db.delete_until_first_title_contains('2024-02-01', 'nomatch'), 0)
+
+    def test_bucket_winners_roundtrip(self):
+        from datetime import datetime
+        t0 = datetime(2024, 4, 2, 10, 0)
+        self.db.insert_bucket(60, t0, 'Editor', 1800.0, 2400.0, (120, 30, 5000))
+        self.db.insert_bucket(15, t0, 'Mail', 600.0, 900.0)
+        self.db.flush()
+        self.assertEqual(self.db.get_buckets(60, '2024-04-02', '2024-04-03'),
+                         [(int(t0.timestamp() * 1000), 'Editor', 1800.0, 2400.0, 120, 30, 5000)])
+
+    def test_iter_blocks_keyset_pages(self):
+        from datetime import datetime, timedelta
+        t0 = datetime(2024, 5, 1, 23, 50)
+        for i in range(7):
+            t = t0 + timedelta(minutes=5 * i)
+            self.db.insert_block(t, t + timedelta(minutes=1), f'B{i}')
+        self.db.flush()
+        rows = list(self.db.iter_blocks('2024-05-01', '2024-05-03', chunk_size=2))
+        self.assertEqual([r[3] for r in rows], [f'B{i}' for i in range(7)])
+        # Resume after the third row, across the day boundary
+        rest = list(self.db.iter_blocks('2024-05-01', '2024-05-03', after=(rows[2][4], rows[2][0]), chunk_size=2))
+        self.assertEqual(rest, rows[3:])
+
+    def _raw_count(self, title):
+        import sqlite3
+        con = sqlite3.connect(self.db_path)
+        try:
+            return con.execute("SELECT COUNT(*) FROM blocks WHERE title = ?", (title,)).fetchone()[0]
+        finally:
+            con.close()
+
     def _rows(self, title_like):
+        self.db.flush()
         import sqlite3
         con = sqlite3.connect(self.db_path)
         cur = con.cursor()
@@ -0,0 +1,48 @@
+import unittest
+import csv
+import gzip
+import io
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import exporter
+
+
+def _row(block_id, title, start=datetime(2024, 6, 1, 10, 0), minutes=5):
+    s_ms = int(start.timestamp() * 1000)
+    e_ms = s_ms + minutes * 60000
+    return (block_id, start.isoformat(), datetime.fromtimestamp(e_ms / 1000).isoformat(), title, s_ms, e_ms)
+
+
+class ExporterTests(unittest.TestCase):
+    def test_csv_quotes_and_neutralizes_formulas(self):
+        rows = [_row(1, 'a, "b"\nc'), _row(2, '=HYPERLINK("x")'), _row(3, None)]
+        text = ''.join(exporter.stream_csv(rows))
+        parsed = list(csv.reader(io.StringIO(text)))
+        self.assertEqual(parsed[0], ['start', 'end', 'title'])
+        self.assertEqual([r[2] for r in parsed[1:]], ['a, "b"\nc', '\'=HYPERLINK("x")', ''])
+
+    def test_ics_escapes_and_folds(self):
+        title = 'Mail; Inbox, Ärger\\' + 'ü' * 60
+        text = ''.join(exporter.stream_ics([_row(7, title), (8, 'x', 'y', 'broken', None, None)]))
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\n') and text.endswith('END:VCALENDAR\r\n'))
+        self.assertEqual(text.count('BEGIN:VEVENT'), 1)
+        lines = text.split('\r\n')
+        self.assertTrue(all(len(line.encode('utf-8')) <= 75 for line in lines))
+        unfolded = text.replace('\r\n ', '')
+        self.assertIn('SUMMARY:Mail\\; Inbox\\, Ärger\\\\' + 'ü' * 60 + '\r\n', unfolded)
+        start = datetime(2024, 6, 1, 10, 0).astimezone(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self.assertIn('DTSTART:' + start + '\r\n', text)
+
+    def test_gzip_stream_and_chunking(self):
+        rows = [_row(i, f'T{i}') for i in range(exporter.LINES_PER_CHUNK * 2 + 1)]
+        chunks = list(exporter.stream_ndjson(rows))
+        self.assertEqual(len(chunks), 3)
+        data = b''.join(exporter.gzipped(iter(chunks)))
+        self.assertEqual(gzip.decompress(data).decode('utf-8'), ''.join(chunks))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import sys
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import TabBuffer, BufferFull
+
+
+class TabBufferTests(unittest.TestCase):
+    def setUp(self):
+        self.t0 = datetime(2024, 1, 1, 12, 0)
+
+    def test_every_event_kept_in_order_and_drain(self):
+        buf = TabBuffer(capacity=10)
+        # A -> B -> A: the repeat visit is not folded into the first one
+        buf.put('http://a', 'A', self.t0)
+        buf.put('http://b', 'B', self.t0 + timedelta(seconds=3))
+        buf.put('http://a', 'A', self.t0 + timedelta(seconds=5))
+        tabs = buf.drain()
+        self.assertEqual([(t['url'], t['ts'].second) for t in tabs],
+                         [('http://a', 0), ('http://b', 3), ('http://a', 5)])
+        self.assertEqual(len(buf), 0)
+        self.assertEqual(buf.drain(), [])
+
+    def test_reject_policy_refuses_whole_batch(self):
+        buf = TabBuffer(capacity=2, policy='reject')
+        buf.put('http://a', 'A', self.t0)
+        events = [{'title': t, 'url': 'http://' + t, 'ts': self.t0} for t in ('b', 'c')]
+        with self.assertRaises(BufferFull):
+            buf.put_many(events)
+        self.assertEqual([t['url'] for t in buf.snapshot()], ['http://a'])
+        self.assertEqual(buf.rejected, 2)
+        # Capacity counts events, also for a URL that is already buffered
+        self.assertTrue(buf.put('http://a', 'A2', self.t0 + timedelta(seconds=1)))
+        self.assertFalse(buf.put('http://a', 'A3', self.t0 + timedelta(seconds=2)))
+
+    def test_drop_oldest_policy_stays_bounded(self):
+        buf = TabBuffer(capacity=3, policy='drop_oldest')
+        for i in range(5):
+            buf.put('http://same', str(i), self.t0 + timedelta(seconds=i))
+        self.assertEqual([t['title'] for t in buf.drain()], ['2', '3', '4'])
+        self.assertEqual(buf.dropped, 2)
+
+    def test_concurrent_puts_are_not_lost_across_drains(self):
+        buf = TabBuffer(capacity=100000)
+        n, writers = 2000, 4
+        seen = []
+
+        def write(w):
+            for i in range(n):
+                buf.put(f'http://{w}/{i}', 't', self.t0)
+
+        threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        for t in threads:
+            t.start()
+        while any(t.is_alive() for t in threads):
+            seen.extend(buf.drain())
+        for t in threads:
+            t.join()
+        seen.extend(buf.drain())
+        self.assertEqual(len(seen), n * writers)
+        self.assertEqual(len({t['url'] for t in seen}), n * writers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from input_tracker import ActivitySampler
+
+
+class ActivitySamplerTests(unittest.TestCase):
+    def test_counters_fold_into_per_second_series(self):
+        s = ActivitySampler()
+        s.sample((0, 0), now=1000.2)
+        for _ in range(5):
+            s._on_press('a')
+        s._on_click(0, 0, 'left', True)
+        s._on_click(0, 0, 'left', False)
+        s.sample((30, 40), now=1001.2)
+        s.sample((30, 40), now=1002.2)
+        self.assertEqual(s.intensity(), [(1000, 0, 0, 0), (1001, 5, 1, 50), (1002, 0, 0, 0)])
+        self.assertEqual(s.totals(1001, 1003), (5, 1, 50))
+        self.assertEqual(s.last_input, 1001.2)
+        self.assertTrue(s.activity_event.is_set())
+
+    def test_idle_without_input(self):
+        s = ActivitySampler()
+        s.last_input = 0
+        s.sample((10, 10))
+        s.sample((10, 10))
+        self.assertFalse(s.is_active())
+        self.assertFalse(s.activity_event.is_set())
+
+
+if __name__ == '__main__':
+    unittest.main()
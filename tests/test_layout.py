@@ -0,0 +1,61 @@
+import unittest
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import layout
+
+
+def ms(dt):
+    return int(dt.timestamp() * 1000)
+
+
+class LayoutTests(unittest.TestCase):
+    def setUp(self):
+        self.t0 = datetime(2024, 3, 4, 9, 0)
+
+    def _arrays(self, spans):
+        return layout.EventArrays(range(1, len(spans) + 1), [ms(s) for s, _, _ in spans], [ms(e) for _, e, _ in spans], [t for _, _, t in spans])
+
+    def test_positions_match_window(self):
+        t0 = self.t0
+        arrays = self._arrays([(t0 + timedelta(hours=1), t0 + timedelta(hours=2), 'B'),
+                               (t0, t0 + timedelta(hours=1), 'A')])
+        win = layout.day_window(arrays, '2024-03-04', focus=True)
+        self.assertEqual(win, (ms(t0) - layout.FOCUS_PAD_MS, ms(t0 + timedelta(hours=2)) + layout.FOCUS_PAD_MS))
+        pos = layout.positions(arrays, *win)
+        self.assertEqual(pos['title'].tolist(), ['A', 'B'])
+        span = win[1] - win[0]
+        self.assertAlmostEqual(pos['topPct'][1], (ms(t0 + timedelta(hours=1)) - win[0]) / span * 100)
+        self.assertAlmostEqual(pos['heightPct'][0], 3600000 / span * 100)
+        self.assertEqual(layout.day_window(self._arrays([]), '2024-03-04', focus=True),
+                         (ms(datetime(2024, 3, 4, 8)), ms(datetime(2024, 3, 4, 20))))
+
+    def test_sub_pixel_runs_become_mixed_segments(self):
+        t0 = self.t0
+        spans = [(t0, t0 + timedelta(hours=1), 'Editor')]
+        # 600 events of 100 ms inside the next minute, alternating titles
+        for i in range(600):
+            s = t0 + timedelta(hours=1, milliseconds=100 * i)
+            spans.append((s, s + timedelta(milliseconds=100), 'Mail' if i % 3 else 'Chat'))
+        spans.append((t0 + timedelta(hours=2), t0 + timedelta(hours=3), 'Browser'))
+        arrays = self._arrays(spans)
+        win = (ms(t0), ms(t0 + timedelta(hours=12)))
+        segs = layout.segments(arrays, *win, height_px=720)  # one pixel per minute
+        self.assertEqual([s['title'] for s in segs], ['Editor', 'Mail', 'Browser'])
+        mixed = segs[1]
+        self.assertTrue(mixed['mixed'])
+        self.assertEqual(mixed['count'], 600)
+        self.assertEqual(mixed['start'], ms(t0 + timedelta(hours=1)))
+        self.assertEqual(mixed['end'], ms(t0 + timedelta(hours=1, minutes=1)))
+        self.assertFalse(segs[0]['mixed'])
+        self.assertEqual((segs[0]['id'], mixed['id']), (1, None))
+        # Payload is bounded by the pixel height, not the number of events
+        self.assertLessEqual(len(layout.segments(arrays, *win, height_px=10)), 10 + 2)
+        # With enough pixels every event stands on its own
+        self.assertEqual(len(layout.segments(arrays, *win, height_px=10 ** 7)), len(spans))
+
+
+if __name__ == '__main__':
+    unittest.main()
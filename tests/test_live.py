@@ -0,0 +1,87 @@
+import unittest
+import asyncio
+import tempfile
+import os
+import importlib
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+
+from live import Broadcaster, RESET
+
+
+class BlockChangeTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_path = path
+        config.DB_PATH = self.db_path
+        import database
+        importlib.reload(database)
+        self.db = database
+        self.published = []
+        self.db.subscribe(self.published.append)
+
+    def tearDown(self):
+        self.db.unsubscribe(self.published.append)
+        self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
+
+    def test_commit_publishes_insert_then_extend(self):
+        now = datetime.now().replace(microsecond=0)
+        self.db.insert_block(now, now + timedelta(seconds=10), 'LiveTest')
+        self.db.flush()
+        self.db.insert_block(now + timedelta(seconds=10), now + timedelta(seconds=20), 'LiveTest')
+        self.db.flush()
+        changes = [ch for batch in self.published for ch in batch]
+        self.assertEqual([ch['op'] for ch in changes], ['insert', 'extend'])
+        self.assertEqual(changes[0]['id'], changes[1]['id'])
+        self.assertEqual(changes[1]['end'], int((now + timedelta(seconds=20)).timestamp() * 1000))
+        self.assertEqual(changes[1]['title'], 'LiveTest')
+
+
+class BroadcasterTests(unittest.TestCase):
+    def test_fanout_reset_for_slow_client_and_close(self):
+        async def scenario():
+            b = Broadcaster(queue_size=2, heartbeat=60)
+            fast, slow = b.stream(), b.stream()
+            self.assertEqual(await fast.__anext__(), 'retry: 3000\n\n')
+            self.assertEqual(await slow.__anext__(), 'retry: 3000\n\n')
+            self.assertEqual(len(b), 2)
+
+            b.publish([{'op': 'insert', 'id': 1, 'start': 0, 'end': 1, 'title': 'A'}])
+            await asyncio.sleep(0)
+            msg = await fast.__anext__()
+            self.assertTrue(msg.startswith('event: blocks\n'))
+            self.assertEqual(json.loads(msg.split('data: ', 1)[1])[0]['id'], 1)
+
+            # The slow client never reads: its backlog overflows into one reset
+            for i in range(2, 5):
+                b.publish([{'op': 'extend', 'id': 1, 'start': 0, 'end': i, 'title': 'A'}])
+                await asyncio.sleep(0)
+                self.assertIn('"end": %d' % i, await fast.__anext__())
+            self.assertEqual(await slow.__anext__(), RESET)
+            self.assertIn('"end": 4', await slow.__anext__())
+
+            b.close()
+            await asyncio.sleep(0)
+            self.assertEqual([m async for m in fast], [])
+            self.assertEqual([m async for m in slow], [])
+            self.assertEqual(len(b), 0)
+
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(scenario())
+        finally:
+            loop.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
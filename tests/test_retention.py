@@ -0,0 +1,116 @@
+import unittest
+import tempfile
+import os
+import shutil
+import importlib
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+
+
+class RetentionTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_path = path
+        config.DB_PATH = self.db_path
+        import database
+        importlib.reload(database)
+        import retention
+        importlib.reload(retention)
+        self.db = database
+        self.retention = retention
+
+    def tearDown(self):
+        self.db.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
+        shutil.rmtree(self.db.archive_dir(), ignore_errors=True)
+
+    def test_compact_downsamples_and_archives(self):
+        from datetime import datetime, timedelta
+        old_day = datetime(2024, 1, 15, 9, 0)
+        # 30 minutes of alternating one-minute blocks plus tab pings
+        for i in range(30):
+            t = old_day + timedelta(minutes=i)
+            self.db.insert_block(t, t + timedelta(seconds=50), 'Editor' if i % 3 else 'Mail')
+            self.db.insert_tab_block(t + timedelta(seconds=55), 'Docs', 'http://docs.test')
+        recent = datetime(2024, 3, 10, 9, 0)
+        self.db.insert_block(recent, recent + timedelta(minutes=5), 'Recent')
+        self.db.flush()
+        before = self.db.get_summary('2024-01-15', '2024-01-16')
+
+        res = self.retention.compact(now=datetime(2024, 3, 12))
+        self.assertEqual(res['downsampled'], 60)
+        self.assertEqual(res['inserted'], 1)
+        self.assertEqual(res['archived'], 1)
+        self.assertTrue(os.path.exists(self.db.archive_path(datetime(2024, 1, 1))))
+
+        # Archived month is gone from the hot DB but still served by the API
+        hot = self.db.reader().execute("SELECT COUNT(*) FROM block_data").fetchone()[0]
+        self.assertEqual(hot, 1)
+        rows = self.db.get_blocks_for_day('2024-01-15')
+        self.assertEqual([r[3] for r in rows], ['Editor'])
+        self.assertEqual(rows[0][1], old_day.isoformat())
+        self.assertEqual([r[3] for r in self.db.get_blocks_between('2024-01-01', '2024-04-01')], ['Editor', 'Recent'])
+        self.assertEqual([r[3] for r in self.db.iter_blocks('2024-01-01', '2024-04-01', chunk_size=1)], ['Editor', 'Recent'])
+        # Rollups keep the raw totals
+        self.assertEqual(self.db.get_summary('2024-01-15', '2024-01-16'), before)
+
+        # Running again is a no-op
+        self.assertEqual(self.retention.compact(now=datetime(2024, 3, 12)), {'downsampled': 0, 'inserted': 0, 'archived': 0})
+
+    def test_compact_keeps_the_live_open_block(self):
+        from datetime import datetime, timedelta
+        old = datetime(2024, 2, 5, 9, 0)
+        for i in range(10):
+            t = old + timedelta(minutes=i)
+            self.db.insert_block(t, t + timedelta(seconds=50), 'Mail' if i % 2 else 'Chat')
+        live = datetime(2024, 3, 12, 10, 0)
+        self.db.insert_block(live, live + timedelta(seconds=5), 'Editor')
+        res = self.retention.compact(now=datetime(2024, 3, 12, 10, 0, 5))
+        self.assertGreater(res['inserted'], 0)
+        # Downsampled rows got higher ids, but the next sample still extends Editor
+        self.db.insert_block(live + timedelta(seconds=5), live + timedelta(seconds=10), 'Editor')
+        self.db.flush()
+        rows = self.db.get_blocks_for_day('2024-03-12')
+        self.assertEqual([(r[1], r[2], r[3]) for r in rows],
+                         [(live.isoformat(), (live + timedelta(seconds=10)).isoformat(), 'Editor')])
+
+    def test_search_covers_more_archives_than_can_be_attached(self):
+        from datetime import datetime, timedelta
+        months = [datetime(2023, m, 10, 9, 0) for m in range(1, 13)]
+        for t in months:
+            self.db.insert_block(t, t + timedelta(minutes=5), 'Ticket-42')
+        self.db.flush()
+        res = self.retention.compact(now=datetime(2024, 3, 12))
+        self.assertEqual(res['archived'], 12)
+        self.assertGreater(12, self.db._readers.MAX_ATTACHED)
+        rows = self.db.search_blocks('Ticket-42')
+        self.assertEqual(sorted(r[1] for r in rows), [t.isoformat() for t in months])
+        # Most recent first among equal scores, pages across archive groups
+        self.assertEqual(rows[0][1], months[-1].isoformat())
+        self.assertEqual([r[1] for r in self.db.search_blocks('Ticket-42', limit=3, offset=8)],
+                         [t.isoformat() for t in reversed(months[1:4])])
+
+    def test_stop_leaves_remaining_months_and_closed_writer_refuses_work(self):
+        import threading
+        from datetime import datetime, timedelta
+        t = datetime(2024, 1, 15, 9, 0)
+        self.db.insert_block(t, t + timedelta(minutes=5), 'Editor')
+        self.db.flush()
+        stop = threading.Event()
+        stop.set()
+        self.assertEqual(self.retention.compact(now=datetime(2024, 3, 12), stop=stop)['archived'], 0)
+        self.assertEqual(self.db.reader().execute("SELECT COUNT(*) FROM block_data").fetchone()[0], 1)
+        self.db.close()
+        with self.assertRaises(RuntimeError):
+            self.retention.compact(now=datetime(2024, 3, 12))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import threading
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scheduler import Scheduler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class SchedulerTests(unittest.TestCase):
+    def test_fixed_deadlines_do_not_drift(self):
+        clock = FakeClock()
+        fired = []
+
+        def tick():
+            fired.append(clock.now)
+            clock.now += 0.7  # processing time must not stretch the period
+
+        Scheduler(5, clock=clock, sleep=clock.sleep).run(tick, max_ticks=4)
+        self.assertEqual(fired, [1000.0, 1005.0, 1010.0, 1015.0])
+
+    def test_overrun_skips_and_counts_missed_ticks(self):
+        clock = FakeClock()
+        fired = []
+
+        def tick():
+            fired.append(clock.now)
+            if len(fired) == 2:
+                clock.now += 12  # blows through two deadlines
+
+        s = Scheduler(5, clock=clock, sleep=clock.sleep)
+        s.run(tick, max_ticks=3)
+        self.assertEqual(fired, [1000.0, 1005.0, 1020.0])
+        self.assertEqual(s.missed, 2)
+
+    def test_idle_backoff_and_snap_back_on_input(self):
+        clock = FakeClock()
+        fired = []
+        idle = [True]
+
+        class WakeEvent(threading.Event):
+            def wait(self, timeout=None):
+                # Input arrives 3s into the first long idle wait
+                if timeout > 10 and idle[0]:
+                    idle[0] = False
+                    clock.now += 3
+                    return True
+                clock.now += timeout
+                return False
+
+        s = Scheduler(5, max_interval=40, is_idle=lambda: idle[0], wake_event=WakeEvent(),
+                      clock=clock, sleep=clock.sleep)
+        s.run(lambda: fired.append(clock.now), max_ticks=5)
+        # period 10, then 20 (cut short by input after 3s), then back to 5
+        self.assertEqual(fired, [1000.0, 1010.0, 1013.0, 1018.0, 1023.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
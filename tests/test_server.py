@@ -0,0 +1,93 @@
+import unittest
+import tempfile
+import os
+import importlib
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+
+
+class ServerTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_path = path
+        config.DB_PATH = self.db_path
+        import database
+        importlib.reload(database)
+        import tabListener, tracker, webui, server
+        for mod in (tabListener, tracker, webui, server):
+            importlib.reload(mod)
+        self.database = database
+        self.tabListener = tabListener
+        self.tracker = tracker
+        self.server = server
+
+    def tearDown(self):
+        self.database.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
+
+    def test_one_app_serves_ui_and_tab_routes(self):
+        from fastapi.testclient import TestClient
+        with TestClient(self.server.create_app(background=False)) as client:
+            self.assertEqual(client.get('/health').json(), {'status': 'ok'})
+            res = client.post('/tabs/batch', json={'events': [
+                {'title': 'T', 'url': 'http://t.test', 'focused': True}]})
+            self.assertEqual(res.json()['accepted'], 1)
+            self.assertIn('http://t.test', [t['url'] for t in self.tabListener.tab_buffer.drain()])
+            self.assertEqual(client.post('/tabs/batch', json={'events': [{'title': 'no url'}]}).status_code, 422)
+            for ts in (1e20, -1e15):
+                res = client.post('/tabs/batch', json={'events': [{'url': 'http://t.test', 'ts': ts, 'focused': True}]})
+                self.assertEqual(res.status_code, 422)
+
+    def test_tab_requires_json_content_type(self):
+        from fastapi.testclient import TestClient
+        with TestClient(self.server.create_app(background=False)) as client:
+            res = client.post('/tab', content='{"title": "T", "url": "http://t.test"}',
+                              headers={'Content-Type': 'text/plain'})
+            self.assertEqual(res.status_code, 415)
+            self.assertEqual(len(self.tabListener.tab_buffer), 0)
+
+    def test_cors_only_for_extension_on_tab_routes(self):
+        from fastapi.testclient import TestClient
+        client = TestClient(self.server.create_app(background=False))
+        res = client.get('/api/search', params={'q': 'bank'}, headers={'Origin': 'https://evil.example'})
+        self.assertNotIn('access-control-allow-origin', res.headers)
+        res = client.options('/tabs/batch', headers={
+            'Origin': 'https://evil.example', 'Access-Control-Request-Method': 'POST'})
+        self.assertNotIn('access-control-allow-origin', res.headers)
+        origin = 'moz-extension://0d3f5a2c-1b2e-4c7a-9f00-123456789abc'
+        res = client.options('/tabs/batch', headers={
+            'Origin': origin, 'Access-Control-Request-Method': 'POST',
+            'Access-Control-Request-Headers': 'content-type'})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['access-control-allow-origin'], origin)
+        self.assertNotIn('access-control-allow-credentials', res.headers)
+
+    def test_shutdown_stops_tracker_and_flushes(self):
+        from fastapi.testclient import TestClient
+        from datetime import datetime, timedelta
+        start = datetime.now().replace(microsecond=0) - timedelta(minutes=5)
+        with TestClient(self.server.create_app()):
+            # Recent, so the retention run at startup leaves it alone
+            self.database.insert_block(start.isoformat(), (start + timedelta(minutes=5)).isoformat(), 'Editor')
+            import time
+            deadline = time.time() + 5
+            while (self.tracker.scheduler is None or not self.tracker.scheduler.ticks) and time.time() < deadline:
+                time.sleep(0.01)
+        # Lifespan shutdown returned: the tracker loop ended and the writer committed
+        self.assertTrue(self.tracker.scheduler._stopped.is_set())
+        import sqlite3
+        con = sqlite3.connect(self.db_path)
+        rows = con.execute("SELECT title FROM blocks").fetchall()
+        con.close()
+        self.assertIn(('Editor',), rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
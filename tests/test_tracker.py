@@ -16,28 +16,36 @@ class TrackerTabTests(unittest.TestCase):
         # reload modules to pick up new DB path
         import database
         importlib.reload(database)
-        # reload tabListener and tracker so active_tabs is fresh
+        # fresh ingestion buffer; reload tabListener and tracker so they use it
+        import ingest
+        importlib.reload(ingest)
         import tabListener
         importlib.reload(tabListener)
         import tracker
         importlib.reload(tracker)
         self.tabListener = tabListener
         self.tracker = tracker
+        self.buffer = ingest.tab_buffer
+
+    def _buffered(self):
+        return {t['url']: t for t in self.buffer.snapshot()}
 
     def tearDown(self):
-        try:
-            os.remove(self.db_path)
-        except Exception:
-            pass
+        import database
+        database.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
 
-    def test_tab_dedup_and_clear(self):
+    def test_tab_events_written_and_cleared(self):
         from datetime import datetime, timedelta
         now = datetime.now()
-        # Simulate multiple pings for the same URL (should keep only latest)
+        # Two visits of the same URL: both reach the tracker
         url = 'http://example.test'
-        self.tabListener.active_tabs[url] = {'title': 'DemoTab', 'url': url, 'ts': now - timedelta(seconds=30)}
-        # Second (later) ping should overwrite
-        self.tabListener.active_tabs[url] = {'title': 'DemoTab', 'url': url, 'ts': now}
+        self.buffer.put(url, 'DemoTab', now - timedelta(seconds=30))
+        self.buffer.put(url, 'DemoTab', now)
 
         # Ensure the active window appears to be Firefox so tracker processes tabs
         # Ensure tracker sees an active Firefox window by patching the function
@@ -46,19 +54,22 @@ class TrackerTabTests(unittest.TestCase):
         # Run processing
         self.tracker.process_tab_activity()
 
-        # Now query DB and ensure only one row exists for this tab title
+        # One (point) row per visit
+        import database
+        database.flush()
         import sqlite3
         con = sqlite3.connect(self.db_path)
         cur = con.cursor()
         rows = cur.execute("SELECT id,start,end,title FROM blocks WHERE title LIKE ?", (f"DemoTab%",)).fetchall()
-        self.assertEqual(len(rows), 1)
+        self.assertEqual(len(rows), 2)
 
-        # active_tabs should be cleared
-        self.assertEqual(len(self.tabListener.active_tabs), 0)
+        # the buffer should be drained
+        self.assertEqual(len(self.buffer), 0)
 
     def test_receive_tab_only_when_firefox_active(self):
         """The HTTP endpoint should only store a tab when Firefox is active."""
         class DummyReq:
+            headers = {'content-type': 'application/json'}
             def __init__(self, payload):
                 self._payload = payload
             async def json(self):
@@ -74,15 +85,108 @@ class TrackerTabTests(unittest.TestCase):
         import asyncio
         res = asyncio.get_event_loop().run_until_complete(self.tabListener.receive_tab(DummyReq(payload)))
         self.assertEqual(res.get('status'), 'ok')
-        self.assertIn(url, self.tabListener.active_tabs)
+        self.assertIn(url, self._buffered())
         # clear
-        self.tabListener.active_tabs.clear()
+        self.buffer.drain()
 
         # Case 2: not Firefox
         window_tracker.get_active_target = lambda: 'SomeOtherApp'
         res2 = asyncio.get_event_loop().run_until_complete(self.tabListener.receive_tab(DummyReq(payload)))
         self.assertEqual(res2.get('status'), 'ignored')
-        self.assertNotIn(url, self.tabListener.active_tabs)
+        self.assertNotIn(url, self._buffered())
+
+    def test_receive_tab_batch(self):
+        """Batched events use the cached foreground window and are queued in timestamp order."""
+        import asyncio
+        import window_tracker
+        from datetime import datetime
+        TabBatch = self.tabListener.TabBatch
+        window_tracker.set_backend(window_tracker.FakeBackend('Mozilla Firefox'))
+        window_tracker.service.get()
+        try:
+            ts = datetime(2024, 1, 1, 12, 0).timestamp() * 1000
+            batch = TabBatch(events=[
+                {'title': 'A', 'url': 'http://a.test', 'ts': ts + 2000},
+                {'title': 'A old', 'url': 'http://a.test', 'ts': ts},
+                {'title': 'B', 'url': 'http://b.test', 'ts': ts, 'focused': False},
+            ])
+            res = asyncio.get_event_loop().run_until_complete(self.tabListener.receive_tab_batch(batch))
+            self.assertEqual(res, {'status': 'ok', 'accepted': 3, 'ignored': 0})
+            queued = self.buffer.snapshot()
+            self.assertEqual([(e['title'], e['ts'].second, e['focused']) for e in queued],
+                             [('A old', 0, True), ('B', 0, False), ('A', 2, True)])
+
+            # Another app in the foreground: unflagged events are dropped
+            self.buffer.drain()
+            window_tracker.service.backend.set('Terminal')
+            res = asyncio.get_event_loop().run_until_complete(self.tabListener.receive_tab_batch(
+                TabBatch(events=[{'title': 'C', 'url': 'http://c.test'}])))
+            self.assertEqual(res['accepted'], 0)
+            self.assertEqual(len(self.buffer), 0)
+        finally:
+            window_tracker.set_backend(window_tracker.NullBackend())
+            window_tracker.service.value = None
+
+    def _at(self, when):
+        import clock
+        previous = clock.set_clock(clock.ManualClock(when))
+        self.addCleanup(clock.set_clock, previous)
+        self.tracker.last_sample = None
+        return clock.get()
+
+    def _queue(self, t0, events):
+        from datetime import timedelta
+        self.buffer.put_many([{'title': title, 'url': 'http://' + title, 'ts': t0 + timedelta(seconds=offset),
+                               'focused': focused} for offset, title, focused in events])
+
+    def test_tab_time_follows_event_timestamps(self):
+        """A -> B -> A within one batch: each tab gets the time until the next event."""
+        from datetime import datetime
+        t0 = datetime(2024, 3, 4, 10, 30, 0)
+        self._at(datetime(2024, 3, 4, 10, 30, 25))
+        self._queue(t0, ((0, 'A', True), (3, 'B', True), (5, 'A', True), (15, 'A', True), (18, 'A', False)))
+        # The batch arrives after Firefox lost focus; its tab time before this tick's interval still counts
+        self.tracker.get_active_target = lambda: 'Terminal'
+        self.tracker.process_tab_activity()
+        counts = self.tracker.buckets.current[1].counts
+        self.assertEqual((counts['A'], counts['B']), (3 + 10 + 3, 2))
+        # Focus marker: no tab in front any more
+        self.assertIsNone(self.tracker.current_tab)
+
+    def test_delayed_batch_is_credited_to_the_buckets_it_covers(self):
+        """Two hours of heartbeats in one tick fill each open bucket at most up to its length."""
+        from datetime import datetime
+        t0 = datetime(2024, 3, 4, 8, 30, 0)
+        self._at(datetime(2024, 3, 4, 10, 30, 5))
+        self._queue(t0, [(10 * i, 'Old', True) for i in range(720)])
+        self.tracker.get_active_target = lambda: 'Mozilla Firefox'
+        self.tracker.process_tab_activity()
+        for minutes, bucket in self.tracker.buckets.current.items():
+            self.assertLessEqual(bucket.total(), minutes * 60)
+        # Only the part of the backlog inside the open buckets counts (10:00-10:29:50;
+        # the last heartbeat's tab is still in front)
+        self.assertEqual(self.tracker.buckets.current[60].counts, {'Old': 29 * 60 + 50})
+        self.assertEqual(self.tracker.buckets.current[1].counts, {})
+
+    def test_other_window_ends_the_tab(self):
+        """Tab time stops when another app is in front, also for events that arrive later."""
+        from datetime import datetime
+        t0 = datetime(2024, 3, 4, 10, 30, 0)
+        c = self._at(t0)
+        self.tracker.get_active_target = lambda: 'Mozilla Firefox'
+        self._queue(t0, ((0, 'A', True),))
+        self.tracker.process_tab_activity()
+        c.advance(5)
+        self.tracker.get_active_target = lambda: 'Terminal'
+        self.tracker.process_tab_activity()
+        self.assertIsNone(self.tracker.current_tab)
+        # A late heartbeat from before the switch cannot claim the Terminal's time
+        self._queue(t0, ((4, 'A', True), (20, 'A', False)))
+        c.advance(5)
+        self.tracker.process_tab_activity()
+        counts = self.tracker.buckets.current[1].counts
+        self.assertNotIn('A', counts)
+        self.assertLessEqual(self.tracker.buckets.current[1].total(), 15)
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import tempfile
+import os
+import importlib
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import config
+
+
+class DayCacheTests(unittest.TestCase):
+    def setUp(self):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        self.db_path = path
+        config.DB_PATH = self.db_path
+        import database
+        importlib.reload(database)
+        import webui, server
+        importlib.reload(webui)
+        importlib.reload(server)
+        self.database = database
+        self.webui = webui
+        from fastapi.testclient import TestClient
+        self.client = TestClient(server.create_app(background=False))
+
+    def tearDown(self):
+        self.database.close()
+        for suffix in ('', '-wal', '-shm'):
+            try:
+                os.remove(self.db_path + suffix)
+            except Exception:
+                pass
+
+    def _insert(self, start, title):
+        self.database.insert_block(start.isoformat(), (start + timedelta(minutes=5)).isoformat(), title)
+        self.database.flush()
+
+    def test_etag_and_invalidation(self):
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        yesterday = today - timedelta(days=1)
+        y_str, t_str = yesterday.date().isoformat(), today.date().isoformat()
+        self._insert(yesterday + timedelta(hours=9), 'Old')
+        self._insert(today + timedelta(minutes=1), 'New')
+
+        res = self.client.get('/admin/events', params={'day': y_str})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([e['title'] for e in res.json()['events']], ['Old'])
+        etag = res.headers['etag']
+        res = self.client.get('/admin/events', params={'day': y_str}, headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.client.get('/timeline', params={'day': y_str}).status_code, 200)
+        pos = self.client.get('/admin/positions', params={'day': y_str})
+        self.assertEqual(pos.json()['positions'][0]['title'], 'Old')
+        self.assertEqual(self.client.get('/admin/positions', params={'day': y_str},
+                                         headers={'If-None-Match': pos.headers['etag']}).status_code, 304)
+
+        lay = self.client.get('/api/layout', params={'day': y_str, 'px': 600})
+        self.assertEqual([(s['title'], s['mixed']) for s in lay.json()['segments']], [('Old', False)])
+        self.assertEqual(self.client.get('/api/layout', params={'day': y_str, 'px': 600},
+                                         headers={'If-None-Match': lay.headers['etag']}).status_code, 304)
+        self.assertEqual(self.client.get('/api/layout', params={'day': 'gestern'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/layout', params={'from': t_str, 'to': y_str}).status_code, 400)
+
+        # A write to today leaves the finished day's entry alone
+        past = self.webui.day_events(y_str)
+        today_tag = self.webui.day_events(t_str).etag
+        self._insert(today + timedelta(minutes=30), 'Newer')
+        self.assertIs(self.webui.day_events(y_str), past)
+        self.assertNotEqual(self.webui.day_events(t_str).etag, today_tag)
+
+        # A late write into the finished day invalidates it
+        self._insert(yesterday + timedelta(hours=10), 'Late')
+        res = self.client.get('/admin/events', params={'day': y_str}, headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([e['title'] for e in res.json()['events']], ['Old', 'Late'])
+
+    def test_events_stream_with_cursor(self):
+        import json
+        t0 = datetime(2024, 6, 1, 22, 0)
+        for i in range(5):
+            self._insert(t0 + timedelta(hours=i), f'E{i}')
+        res = self.client.get('/api/events', params={'from': '2024-06-01', 'to': '2024-06-02', 'limit': 3})
+        self.assertEqual(res.headers['content-type'], 'application/x-ndjson')
+        page = [json.loads(line) for line in res.text.splitlines()]
+        self.assertEqual([e['title'] for e in page], ['E0', 'E1', 'E2'])
+        self.assertEqual(page[0]['start'], int(t0.timestamp() * 1000))
+        res = self.client.get('/api/events', params={'from': '2024-06-01', 'to': '2024-06-02', 'cursor': page[-1]['cursor']})
+        self.assertEqual([json.loads(line)['title'] for line in res.text.splitlines()], ['E3', 'E4'])
+        self.assertEqual(self.client.get('/api/events', params={'cursor': 'x'}).status_code, 400)
+
+    def test_export_streams_range(self):
+        import gzip
+        t0 = datetime(2024, 6, 1, 23, 0)
+        self._insert(t0, 'Late, night')
+        self._insert(t0 + timedelta(hours=2), 'Next day')
+        res = self.client.get('/export/csv', params={'from': '2024-06-01', 'to': '2024-06-02'})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('activity-2024-06-01_2024-06-02.csv', res.headers['content-disposition'])
+        self.assertEqual(res.text.splitlines()[1:], [f'{t0.isoformat()},{(t0 + timedelta(minutes=5)).isoformat()},"Late, night"',
+                                                     f'{(t0 + timedelta(hours=2)).isoformat()},{(t0 + timedelta(hours=2, minutes=5)).isoformat()},Next day'])
+        res = self.client.get('/export/ics', params={'from': '2024-06-02', 'gzip': 1})
+        self.assertEqual(res.headers['content-type'], 'application/gzip')
+        ics = gzip.decompress(res.content).decode('utf-8')
+        self.assertEqual(ics.count('BEGIN:VEVENT'), 1)
+        self.assertIn('SUMMARY:Next day', ics)
+        self.assertEqual(self.client.get('/export/xml').status_code, 400)
+
+    def test_range_timeline_embeds_range_layout(self):
+        import json
+        t0 = datetime(2024, 6, 3, 9, 0)
+        for i in range(7):
+            self._insert(t0 + timedelta(days=i), f'D{i}')
+        res = self.client.get('/timeline', params={'from': '2024-06-03', 'to': '2024-06-09'})
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('window.RANGE = true', res.text)
+        embedded = json.loads(res.text.split('window.LAYOUT = ', 1)[1].split(';\n', 1)[0])
+        self.assertEqual(embedded['events'], 7)
+        # a week keeps the per-hour scale of the day view instead of the 3000px day cap
+        self.assertEqual(embedded['px'], 14 * 1200)
+        again = self.client.get('/api/layout', params={'from': embedded['from'], 'to': embedded['to'], 'px': embedded['px']})
+        self.assertEqual(again.json()['segments'], embedded['segments'])
+        self.assertEqual(self.client.get('/timeline', params={'from': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/timeline', params={'day': 'gestern'}).status_code, 400)
+        res = self.client.get('/timeline', params={'from': '2024-06-09', 'to': '2024-06-03'})
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('2024-06-03', res.text)
+        err = self.client.get('/api/layout', params={'from': '2024-06-09', 'to': '2024-06-03'}).json()['error']
+        self.assertEqual(err, "'to' (2024-06-03) must be after 'from' (2024-06-09)")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from window_tracker import WindowService, FakeBackend
+
+
+class WindowServiceTests(unittest.TestCase):
+    def test_get_is_cached_within_ttl(self):
+        backend = FakeBackend('Editor')
+        svc = WindowService(backend, ttl=60)
+        self.assertEqual(svc.get(), 'Editor')
+        backend.value = 'Mail'  # changes without notification are only seen after the TTL
+        self.assertEqual(svc.get(), 'Editor')
+        self.assertEqual(backend.polls, 1)
+
+        svc.ttl = 0
+        self.assertEqual(svc.get(), 'Mail')
+        self.assertEqual(backend.polls, 2)
+
+    def test_push_updates_notify_listeners(self):
+        backend = FakeBackend()
+        svc = WindowService(backend, ttl=60)
+        svc.start()
+        seen = []
+        svc.subscribe(seen.append)
+        backend.set('Firefox')
+        backend.set('Firefox')
+        backend.set('Terminal')
+        self.assertEqual(seen, ['Firefox', 'Terminal'])
+        self.assertEqual(svc.peek(), 'Terminal')
+        self.assertEqual(svc.get(), 'Terminal')
+        self.assertEqual(backend.polls, 0)
+
+    def test_backend_starts_lazily(self):
+        started = []
+
+        class Recording(FakeBackend):
+            def start(self, on_change):
+                started.append(on_change)
+                super().start(on_change)
+
+        svc = WindowService(Recording('Editor'), ttl=60)
+        self.assertEqual(started, [])
+        self.assertEqual(svc.get(), 'Editor')
+        svc.get()
+        self.assertEqual(len(started), 1)
+        svc.stop()
+        self.assertFalse(svc.started)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,30 +1,85 @@
-from database import insert_tab_block, insert_block
-from datetime import datetime, timedelta
-from bucket import Bucket, bucket_start
-try:
-    from tabListener import active_tabs
-except Exception:
-    # tabListener (FastAPI) may not be available at import time in some contexts
-    active_tabs = {}
-from input_tracker import is_active
+from datetime import timedelta
+
+import clock
+from database import insert_tab_block, insert_block, insert_bucket
+from bucket import BucketEngine
+from ingest import tab_buffer
+from input_tracker import is_active, activity_event, sampler
 from window_tracker import get_active_target
-from config import TRACK_INTERVAL_SECONDS, BUCKET_MINUTES
-import time
+from config import TRACK_INTERVAL_SECONDS, BUCKET_MINUTES, TAB_SEND_INTERVAL_MS
+from scheduler import Scheduler
+
+# A sample stands for the time since the previous one, but never more than this
+# (longer gaps mean the tracker was idle/suspended, not that the window was used).
+MAX_DWELL_SECONDS = 2 * TRACK_INTERVAL_SECONDS
+# A tab counts as in front from its event until the next one, but never longer
+# than this (the extension repeats the current tab every TAB_SEND_INTERVAL_MS;
+# a longer silence means the browser was closed or lost focus unnoticed).
+MAX_TAB_SPAN_SECONDS = 3 * TAB_SEND_INTERVAL_MS / 1000
+
+
+def _persist_bucket(bucket):
+    # Verarbeite abgeschlossenes Bucket (speichern)
+    title = bucket.winner()
+    activity = sampler.totals(bucket.start.timestamp(), bucket.end.timestamp())
+    insert_bucket(bucket.minutes, bucket.start, title, bucket.counts[title], bucket.total(), activity)
+    if bucket.minutes == BUCKET_MINUTES:
+        insert_block(bucket.start.isoformat(), bucket.end.isoformat(), title)
+
+
+buckets = BucketEngine(on_close=_persist_bucket)
+last_sample = None
+# Latest focused tab event: that tab is in front since its 'ts'
+current_tab = None
+# End of the latest tick interval credited to a window; tab time before it
+# would count the same seconds twice
+window_credited_until = None
+
+
+def _credit_tab(tab, end, limit=None):
+    """Credit `tab` with [tab.ts, end], capped, not past `limit` and clipped to time no window got."""
+    start = tab["ts"]
+    end = min(end, start + timedelta(seconds=MAX_TAB_SPAN_SECONDS))
+    if limit is not None:
+        end = min(end, limit)
+    if window_credited_until is not None:
+        start = max(start, window_credited_until)
+    if end > start:
+        buckets.add_span(tab.get("title"), start, end)
+
+
+def _tab_event(tab, limit=None):
+    """Credit the tab in front with the time until `tab`'s event, then switch to it.
+
+    Events arrive in batches, so tab time is attributed from the event
+    timestamps (when the next event is known) to the buckets covering them,
+    not to the tick. An event flagged focused=False (Firefox lost focus) only
+    ends the current tab.
+    """
+    global current_tab
+    if current_tab is not None:
+        if tab["ts"] < current_tab["ts"]:
+            # Late, older event (e.g. a retried batch): it cannot move time back
+            return
+        _credit_tab(current_tab, tab["ts"], limit)
+    current_tab = None if tab.get("focused") is False else tab
+
+
+def _end_tab(end):
+    """Another window is in front since `end`: the current tab's time stops there."""
+    global current_tab
+    if current_tab is not None:
+        _credit_tab(current_tab, end)
+        current_tab = None
 
-current_bucket = None
 
 def process_tab_activity():
-    global current_bucket
-    now = datetime.now()
-    b_start = bucket_start(now)
-
-    if not current_bucket or current_bucket.start != b_start:
-        if current_bucket:
-            # Verarbeite vorheriges Bucket (speichern)
-            title = current_bucket.winner()
-            if title:
-                insert_block(current_bucket.start.isoformat(), (current_bucket.start + timedelta(minutes=BUCKET_MINUTES)).isoformat(), title)
-        current_bucket = Bucket(b_start)
+    global last_sample, window_credited_until
+    now = clock.now()
+    buckets.advance(now)
+    dwell = TRACK_INTERVAL_SECONDS if last_sample is None else (now - last_sample).total_seconds()
+    dwell = max(0.0, min(dwell, MAX_DWELL_SECONDS))
+    last_sample = now
 
     # Nur Tabs verwenden, wenn der aktive Prozess Firefox ist
     # Handle different return types defensively (string, None, even callables)
@@ -42,34 +97,64 @@ def process_tab_activity():
     active_window_str = str(active_window) if active_window is not None else ""
     is_firefox = ("firefox" in active_window_str.lower()) or ("mozilla" in active_window_str.lower())
 
-    if is_firefox and active_tabs:
-        # active_tabs is keyed by URL and stores the latest seen timestamp under 'ts'.
-        # Process the current snapshot (one entry per URL), then clear the store
-        # to avoid re-inserting the same entries on subsequent ticks.
-        for tab in list(active_tabs.values()):
-            title = tab.get("title")
-            url = tab.get("url")
-            ts = tab.get("ts") or datetime.now()
-            # Insert a tab block using the recorded timestamp
-            insert_tab_block(ts, title, url)
-            current_bucket.add(title)
-        # Clear processed entries
-        try:
-            active_tabs.clear()
-        except Exception:
-            for k in list(active_tabs.keys()):
-                active_tabs.pop(k, None)
-    else:
-        # Testen, ob eine Programmaktivität vorhanden ist und kein Firefox aktiv ist
-        if is_active():
-            title = active_window_str or get_active_target()
-            if title:
-                current_bucket.add(title)
-
-def run_periodic(interval_seconds=TRACK_INTERVAL_SECONDS):
-    while True:
-        process_tab_activity()
-        time.sleep(interval_seconds)
+    # Take every event queued since the last tick in one atomic swap (events
+    # arriving meanwhile stay for the next tick). Tab blocks are written with
+    # the events' own timestamps, and each tab is credited with the time until
+    # the following event (see _tab_event). With another window in front, tab
+    # time ends where this tick's interval starts.
+    limit = None if is_firefox else now - timedelta(seconds=dwell)
+    tabs = tab_buffer.drain()
+    for tab in tabs:
+        tab["ts"] = tab.get("ts") or now
+    tabs.sort(key=lambda tab: tab["ts"])
+    for tab in tabs:
+        if tab.get("focused") is not False:
+            insert_tab_block(tab["ts"], tab.get("title"), tab.get("url"))
+        _tab_event(tab, limit)
+    if limit is not None:
+        _end_tab(limit)
+
+    # While a tab is in front its time comes from the tab events, not from the window
+    tab_in_front = (is_firefox and current_tab is not None
+                    and (now - current_tab["ts"]).total_seconds() <= MAX_TAB_SPAN_SECONDS)
+    # Testen, ob eine Programmaktivität vorhanden ist (und kein Tab die Zeit bekommt)
+    if not tab_in_front and is_active():
+        title = active_window_str or get_active_target()
+        if title:
+            buckets.add(title, dwell)
+            window_credited_until = now
+
+scheduler = None
+
+def new_scheduler(interval_seconds=TRACK_INTERVAL_SECONDS):
+    """Scheduler for the tracker loop: fixed deadlines, backs off while idle, wakes on input.
+
+    On a virtual clock (clock.ManualClock) the scheduler sleeps by advancing it,
+    so the loop runs as fast as the ticks do.
+    """
+    c = clock.get()
+    if isinstance(c, clock.SystemClock):
+        return Scheduler(interval_seconds, is_idle=lambda: not is_active(), wake_event=activity_event)
+    return Scheduler(interval_seconds, is_idle=lambda: not is_active(), clock=c.monotonic, sleep=c.sleep)
+
+def run_periodic(interval_seconds=TRACK_INTERVAL_SECONDS, scheduler_=None):
+    """Run process_tab_activity on `scheduler_` (default: a new one) until stopped (blocking loop).
+
+    Returns after `stop()`; the open buckets are persisted on the way out.
+    """
+    global scheduler
+    scheduler = scheduler_ or new_scheduler(interval_seconds)
+    try:
+        scheduler.run(process_tab_activity)
+    finally:
+        buckets.close_all()
+
+def stop():
+    """Ask a running `run_periodic` loop to finish."""
+    if scheduler is not None:
+        scheduler.stop()
 
 if __name__ == "__main__":
+    import input_tracker
+    input_tracker.start()
     run_periodic()
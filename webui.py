@@ -1,23 +1,30 @@
-from fastapi import FastAPI, Query, Request
-from fastapi.staticfiles import StaticFiles
+from fastapi import APIRouter, Query, Request
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
-from exporter import export_ical, export_csv
-from database import get_blocks_for_day
-from datetime import date, datetime
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+import bulk
+import exporter
+from database import get_blocks_for_day, get_summary, search_blocks, get_buckets, blocks_version, iter_blocks
+from itertools import islice
+import layout
+import live
+from datetime import date, datetime, timedelta
+from collections import OrderedDict
+import hashlib
+import html
+import io
 import json
 import logging
+import threading
 
 logger = logging.getLogger(__name__)
 if not logging.getLogger().handlers:
     logging.basicConfig(level=logging.INFO)
 
-app = FastAPI()
-# serve static files and templates
-app.mount('/static', StaticFiles(directory='static'), name='static')
+# UI/API routes; mounted (together with /static) into the single app in server.py
+router = APIRouter()
 templates = Jinja2Templates(directory='templates')
 
-@app.get("/", response_class=HTMLResponse)
+@router.get("/", response_class=HTMLResponse)
 def ui():
     today = date.today().isoformat()
     blocks = get_blocks_for_day(today)
@@ -36,64 +43,173 @@ def ui():
     <a href="/export/csv">Export CSV</a>
     """
 
-@app.get("/export/ical")
-def do_ical():
-    export_ical()
-    return {"status": "ok"}
+@router.get("/export/{fmt}")
+def export(fmt: str, from_: str = Query(None, alias='from'), to: str = None, gzip: bool = False):
+    """Download the blocks of a range as csv, ics (alias ical), ndjson, npz or parquet.
+
+    Query params:
+    - from, to: range, same format as /api/summary (default today)
+    - gzip: 1 => send a .gz file, compressed while streaming (text formats)
+
+    Text formats are read in keyset pages while the file is sent (see
+    exporter.py); nothing is written to disk. npz/parquet are columnar
+    files for pandas/NumPy (see bulk.py), built in memory.
+    """
+    if fmt not in exporter.FORMATS and fmt not in bulk.FORMATS:
+        return JSONResponse({'error': f'unknown format {fmt!r}, expected one of '
+                                      f'{sorted(exporter.FORMATS) + sorted(bulk.FORMATS)}'}, status_code=400)
+    today = date.today().isoformat()
+    try:
+        start = _range_bound(from_ or today, False)
+        end = _range_bound(to or from_ or today, True)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    last = (end - timedelta(microseconds=1)).date()
+    filename = f"activity-{start.date().isoformat()}" + (f"_{last.isoformat()}" if last != start.date() else "")
+    if fmt in bulk.FORMATS:
+        buf = io.BytesIO()
+        try:
+            bulk.write(bulk.columns(start, end), fmt, buf)
+        except RuntimeError as e:
+            return JSONResponse({'error': str(e)}, status_code=501)
+        return Response(buf.getvalue(), media_type=bulk.FORMATS[fmt],
+                        headers={'Content-Disposition': f'attachment; filename="{filename}.{fmt}"'})
+    write, media_type, ext = exporter.FORMATS[fmt]
+    filename += f".{ext}"
+    body = write(iter_blocks(start, end))
+    if gzip:
+        body, media_type, filename = exporter.gzipped(body), 'application/gzip', filename + '.gz'
+    return StreamingResponse(body, media_type=media_type,
+                             headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+
+# --- Per-day event cache ------------------------------------------------------
+# Converted events and their JSON per day, reused until the blocks of that day
+# can have changed: entries for today are keyed by the data version, entries
+# built after the day ended by the past version (see database.blocks_version),
+# so finished days are served from memory until a late write reaches them.
+
+DAY_CACHE_SIZE = 400
+DEFAULT_TIMELINE_HEIGHT = 1200
+
+
+class _DayEntry:
+    __slots__ = ("version", "events", "json", "etag", "derived", "_arrays")
+
+    def __init__(self, version, events):
+        self.version = version
+        self.events = events
+        self.json = json.dumps(events)
+        self.etag = hashlib.blake2b(self.json.encode(), digest_size=12).hexdigest()
+        # Payloads computed from the events (positions, layouts), filled on demand
+        self.derived = {}
+        self._arrays = None
+
+    def arrays(self):
+        """The events as `layout.EventArrays`, converted once."""
+        if self._arrays is None:
+            self._arrays = layout.EventArrays.from_events(self.events)
+        return self._arrays
+
+
+_day_cache = OrderedDict()
+_day_cache_lock = threading.Lock()
+
+
+def _to_event(r):
+    """(id, start, end, title) row -> {"id", "start", "end", "title"} with epoch ms where parseable."""
+    # r[1] and r[2] are ISO timestamp strings from the DB. Convert to epoch ms on the
+    # server to avoid client-side parsing/timezone inconsistencies.
+    try:
+        s_dt = datetime.fromisoformat(str(r[1]).strip())
+        e_dt = datetime.fromisoformat(str(r[2]).strip())
+        return {"id": r[0], "start": int(s_dt.timestamp() * 1000), "end": int(e_dt.timestamp() * 1000), "title": r[3]}
+    except Exception:
+        # final fallback: pass raw strings (client will handle them)
+        return {"id": r[0], "start": r[1], "end": r[2], "title": r[3]}
+
+
+def day_events(day_str):
+    """Cached `_DayEntry` (events, JSON, ETag) for the local day `day_str` (YYYY-MM-DD)."""
+    data_version, past_version = blocks_version()
+    day_end = datetime.fromisoformat(day_str[:10]) + timedelta(days=1)
+    # Versions are read before querying, so a commit racing the query invalidates the entry
+    version = ("past", past_version) if datetime.now() >= day_end else ("live", data_version)
+    with _day_cache_lock:
+        entry = _day_cache.get(day_str)
+        if entry is not None and entry.version == version:
+            _day_cache.move_to_end(day_str)
+            return entry
+    entry = _DayEntry(version, [_to_event(r) for r in get_blocks_for_day(day_str)])
+    with _day_cache_lock:
+        _day_cache[day_str] = entry
+        _day_cache.move_to_end(day_str)
+        while len(_day_cache) > DAY_CACHE_SIZE:
+            _day_cache.popitem(last=False)
+    return entry
 
-@app.get("/export/csv")
-def do_csv():
-    export_csv()
-    return {"status": "ok"}
 
+def _etag(entry, *variant):
+    return '"%s"' % "-".join([entry.etag] + [str(v) for v in variant])
 
-@app.get("/timeline", response_class=HTMLResponse)
-def timeline(request: Request, day: str = None, focus: int = Query(1), height: int = Query(1200)):
+
+def _not_modified(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or ("W/" + etag) in tags
+
+
+@router.get("/timeline", response_class=HTMLResponse)
+def timeline(request: Request, day: str = None, from_: str = Query(None, alias='from'), to: str = None,
+             focus: int = Query(1), height: int = Query(DEFAULT_TIMELINE_HEIGHT)):
     """Show a vertical day timeline.
 
     Query params:
     - day: YYYY-MM-DD (default: today)
+    - from, to: instead of `day`, a multi-day range (as on /api/layout)
     - focus: 1 => focus on 08:00-20:00, 0 => show full day
-    - height: pixel height for timeline container (adjustable)
+    - height: pixel height per 12 hours (adjustable)
     """
-    day_str = day or date.today().isoformat()
     try:
-        rows = get_blocks_for_day(day_str)
-
-        # Convert to epoch milliseconds on the server to avoid client-side
-        # parsing/timezone inconsistencies. This makes top/height calculations
-        # precise and consistent across browsers.
-        events = []
-        for r in rows:
-            # r[1] and r[2] are ISO timestamp strings from the DB. Convert to epoch ms.
-            try:
-                s_dt = datetime.fromisoformat(r[1])
-                e_dt = datetime.fromisoformat(r[2])
-                events.append({
-                    "start": int(s_dt.timestamp() * 1000),
-                    "end": int(e_dt.timestamp() * 1000),
-                    "title": r[3],
-                })
-            except Exception:
-                # Fallback: if not ISO, try parsing with datetime.fromisoformat after trimming
-                try:
-                    s_dt = datetime.fromisoformat(str(r[1]).strip())
-                    e_dt = datetime.fromisoformat(str(r[2]).strip())
-                    events.append({"start": int(s_dt.timestamp() * 1000), "end": int(e_dt.timestamp() * 1000), "title": r[3]})
-                except Exception:
-                    # final fallback: pass raw strings (client will handle them)
-                    events.append({"start": r[1], "end": r[2], "title": r[3]})
-
-        events_json = json.dumps(events)
-        logger.info("Serving timeline for %s with %d events", day_str, len(events))
-        return templates.TemplateResponse("timeline.html", {"request": request, "events_json": events_json, "day": day_str, "focus": bool(focus), "height": int(height)})
+        day_str, start, end = _view_bounds(day, from_, to)
+    except ValueError as e:
+        return HTMLResponse(content=f"<html><body><h2>Ungültiger Zeitraum</h2><pre>{html.escape(str(e))}</pre></body></html>", status_code=400)
+    if start is not None:
+        return _range_timeline(request, start, end, int(height))
+    try:
+        entry = day_events(day_str)
+        etag = _etag(entry, focus, height)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+        # Embed the level-of-detail layout instead of every event; the page
+        # fetches /api/layout again when its pixel height differs.
+        arrays = entry.arrays()
+        win_start, win_end = layout.day_window(arrays, day_str, focus)
+        px = layout.timeline_height(win_start, win_end, int(height))
+        layout_json = json.dumps(_derived(entry, ('layout', bool(focus), px), lambda: _layout(day_str, entry, focus, px)))
+        logger.info("Serving timeline for %s with %d events", day_str, len(entry.events))
+        resp = templates.TemplateResponse(request, "timeline.html", {"layout_json": layout_json, "day": day_str, "focus": bool(focus), "height": int(height)})
+        resp.headers["ETag"] = etag
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
     except Exception as e:
         logger.exception("Error rendering timeline for %s", day_str)
         # return a minimal safe page instead of allowing a crash
         return HTMLResponse(content=f"<html><body><h2>Fehler beim Laden der Timeline</h2><pre>{str(e)}</pre></body></html>", status_code=500)
 
 
-@app.post("/admin/trim_until")
+def _range_timeline(request, start, end, height):
+    layout_json = json.dumps(_range_layout(start, end, None, height))
+    heading = f"{start.date().isoformat()} – {(end - timedelta(microseconds=1)).date().isoformat()}"
+    return templates.TemplateResponse(request, "timeline.html", {
+        "layout_json": layout_json, "day": start.date().isoformat(), "heading": heading,
+        "export_to": (end - timedelta(microseconds=1)).date().isoformat(),
+        "range": True, "focus": False, "height": height})
+
+
+@router.post("/admin/trim_until")
 def admin_trim_until(substring: str = "firefox", day: str = None):
     """Delete all blocks for the given day that occur before the first block
     whose title contains `substring` (case-insensitive). Defaults to today and
@@ -104,87 +220,271 @@ def admin_trim_until(substring: str = "firefox", day: str = None):
     return {"deleted": deleted}
 
 
-@app.get('/health')
+@router.post("/admin/compact")
+def admin_compact():
+    """Run the retention job now: downsample blocks older than RAW_RETENTION_DAYS
+    and archive finished months. Returns the affected row counts."""
+    import retention
+    return retention.compact()
+
+
+@router.get('/health')
 def health():
     """Simple health-check endpoint for monitoring (returns 200 OK)."""
     return {"status": "ok"}
 
 
-@app.get('/admin/events')
-def admin_events(day: str = None):
+@router.get('/admin/events')
+def admin_events(request: Request, day: str = None):
     """Return processed events as JSON (epoch ms) for the given day. Useful for curl-based debugging."""
     day_str = day or date.today().isoformat()
     try:
-        rows = get_blocks_for_day(day_str)
-        events = []
-        for r in rows:
-            try:
-                s_dt = datetime.fromisoformat(r[1])
-                e_dt = datetime.fromisoformat(r[2])
-                events.append({
-                    'start': int(s_dt.timestamp() * 1000),
-                    'end': int(e_dt.timestamp() * 1000),
-                    'title': r[3],
-                })
-            except Exception:
-                try:
-                    s_dt = datetime.fromisoformat(str(r[1]).strip())
-                    e_dt = datetime.fromisoformat(str(r[2]).strip())
-                    events.append({'start': int(s_dt.timestamp() * 1000), 'end': int(e_dt.timestamp() * 1000), 'title': r[3]})
-                except Exception:
-                    events.append({'start': r[1], 'end': r[2], 'title': r[3]})
-        return {'day': day_str, 'events': events}
+        entry = day_events(day_str)
+        etag = _etag(entry)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+        body = '{"day": %s, "events": %s}' % (json.dumps(day_str), entry.json)
+        return Response(content=body, media_type='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
     except Exception as e:
         logger.exception('admin_events failed for %s', day_str)
         return {'error': str(e)}
 
 
-@app.get('/admin/positions')
-def admin_positions(day: str = None, focus: int = Query(1)):
+@router.get('/admin/positions')
+def admin_positions(request: Request, day: str = None, focus: int = Query(1)):
     """Return computed top/height (percent) per event for debugging in curl tests."""
     day_str = day or date.today().isoformat()
     try:
-        resp = admin_events(day=day_str)
-        if 'events' not in resp:
-            return {'error': 'no events', 'raw': resp}
-        events = resp['events']
-        # compute numeric bounds
-        nums = []
-        for ev in events:
-            s = ev['start'] if isinstance(ev['start'], int) else None
-            e = ev['end'] if isinstance(ev['end'], int) else None
-            if s is None or e is None:
-                try:
-                    s = int(datetime.fromisoformat(str(ev['start'])).timestamp() * 1000)
-                    e = int(datetime.fromisoformat(str(ev['end'])).timestamp() * 1000)
-                except Exception:
-                    s = None; e = None
-            if s and e:
-                nums.append((s,e,ev['title']))
-        if focus and nums:
-            minS = min(s for s,e,_ in nums)
-            maxE = max(e for _,e,_ in nums)
-            pad = 5 * 60 * 1000
-            winStart = max(int(datetime.fromisoformat(day_str + 'T00:00:00').timestamp() * 1000), minS - pad)
-            winEnd = min(int(datetime.fromisoformat(day_str + 'T23:59:59').timestamp() * 1000), maxE + pad)
-        elif focus:
-            winStart = int(datetime.fromisoformat(day_str + 'T08:00:00').timestamp() * 1000)
-            winEnd = int(datetime.fromisoformat(day_str + 'T20:00:00').timestamp() * 1000)
-        else:
-            winStart = int(datetime.fromisoformat(day_str + 'T00:00:00').timestamp() * 1000)
-            winEnd = int(datetime.fromisoformat(day_str + 'T23:59:59').timestamp() * 1000)
-        winSpan = winEnd - winStart
-        out = []
-        for s,e,title in nums:
-            if e <= winStart or s >= winEnd:
-                continue
-            start = max(s, winStart)
-            end = min(e, winEnd)
-            topPct = (start - winStart) / winSpan * 100
-            heightPct = (end - start) / winSpan * 100
-            out.append({'title': title, 'start': start, 'end': end, 'topPct': topPct, 'heightPct': heightPct})
-        return {'day': day_str, 'winStart': winStart, 'winEnd': winEnd, 'positions': out}
+        entry = day_events(day_str)
+        etag = _etag(entry, focus)
+        if _not_modified(request, etag):
+            return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+        positions = _derived(entry, ('positions', bool(focus)), lambda: _positions(day_str, entry, focus))
+        return JSONResponse(positions, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
     except Exception as e:
         logger.exception('admin_positions failed for %s', day_str)
         return {'error': str(e)}
 
+
+def _positions(day_str, entry, focus):
+    """Window bounds and top/height (percent) per event, as served by /admin/positions."""
+    arrays = entry.arrays()
+    winStart, winEnd = layout.day_window(arrays, day_str, focus)
+    pos = layout.positions(arrays, winStart, winEnd)
+    out = [{'title': t, 'start': a, 'end': b, 'topPct': tp, 'heightPct': hp}
+           for t, a, b, tp, hp in zip(pos['title'].tolist(), pos['start'].tolist(), pos['end'].tolist(),
+                                      pos['topPct'].tolist(), pos['heightPct'].tolist())]
+    return {'day': day_str, 'winStart': winStart, 'winEnd': winEnd, 'positions': out}
+
+
+def _layout(day_str, entry, focus, px):
+    """Level-of-detail layout of a day for a timeline `px` pixels tall (default: base height)."""
+    arrays = entry.arrays()
+    winStart, winEnd = layout.day_window(arrays, day_str, focus)
+    px = px or layout.timeline_height(winStart, winEnd, DEFAULT_TIMELINE_HEIGHT)
+    return {'day': day_str, 'focus': bool(focus), 'winStart': winStart, 'winEnd': winEnd, 'px': px, 'events': len(entry.events),
+            'segments': layout.segments(arrays, winStart, winEnd, px)}
+
+
+def _range_layout(start, end, px, base_height):
+    """Layout of an arbitrary [start, end) range; the window is the range itself."""
+    arrays = layout.EventArrays.from_rows(iter_blocks(start, end))
+    winStart, winEnd = int(start.timestamp() * 1000), int(end.timestamp() * 1000)
+    px = px or layout.timeline_height(winStart, winEnd, base_height, layout.MAX_RANGE_HEIGHT_PX)
+    return {'from': start.isoformat(), 'to': end.isoformat(), 'winStart': winStart, 'winEnd': winEnd,
+            'px': px, 'events': len(arrays), 'segments': layout.segments(arrays, winStart, winEnd, px)}
+
+
+def _derived(entry, key, build):
+    value = entry.derived.get(key)
+    if value is None:
+        value = entry.derived[key] = build()
+    return value
+
+
+@router.get('/api/layout')
+def api_layout(request: Request, day: str = None, from_: str = Query(None, alias='from'), to: str = None,
+               focus: int = Query(1), px: int = Query(None, ge=50, le=20000)):
+    """Timeline layout with level-of-detail aggregation (see layout.py).
+
+    Query params:
+    - day: YYYY-MM-DD (default: today), window as on /timeline (`focus`)
+    - from, to: instead of `day`, a range (same format as /api/summary); the window is the range
+    - px: pixel height the segments are computed for (default: the timeline height for the window)
+
+    Events shorter than a pixel are merged into segments per pixel row
+    (`mixed` if several titles were merged), so the payload grows with `px`,
+    not with the number of events.
+    """
+    try:
+        day_str, start, end = _view_bounds(day, from_, to)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    if start is not None:
+        return _range_layout(start, end, px, DEFAULT_TIMELINE_HEIGHT)
+    entry = day_events(day_str)
+    etag = _etag(entry, focus, px)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    payload = _derived(entry, ('layout', bool(focus), px), lambda: _layout(day_str, entry, focus, px))
+    return JSONResponse(payload, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+
+
+def app_name(title):
+    """Program/source name for a title (mirrors normalizeTitle in timeline.js)."""
+    if not title:
+        return ''
+    lower = title.lower()
+    if 'firefox' in lower or 'mozilla' in lower or '://' in title:
+        return 'Firefox'
+    for sep in ('—', ' - '):
+        if sep in title:
+            return title.split(sep, 1)[0].strip()
+    return title
+
+
+def _range_bound(value: str, is_end: bool):
+    """Parse a from/to query value. Plain dates are whole days (`to` inclusive)."""
+    if len(value) == 10:
+        d = datetime.fromisoformat(value)
+        return d + timedelta(days=1) if is_end else d
+    return datetime.fromisoformat(value)
+
+
+def _view_bounds(day, from_, to):
+    """What /timeline and /api/layout show: (day_str, None, None) for a day
+    (default today) or (None, start, end) for a from/to range.
+
+    Raises ValueError for an invalid day or bound and for an empty range.
+    """
+    if from_ or to:
+        start = _range_bound(from_ or to, False)
+        end = _range_bound(to or from_, True)
+        if end <= start:
+            raise ValueError(f"'to' ({to}) must be after 'from' ({from_})")
+        return None, start, end
+    return (date.fromisoformat(day).isoformat() if day else date.today().isoformat()), None, None
+
+
+@router.get('/api/summary')
+def api_summary(from_: str = Query(None, alias='from'), to: str = None, group: str = Query('title')):
+    """Time spent per title/app/day/hour in a range, answered from the rollup tables.
+
+    Query params:
+    - from, to: YYYY-MM-DD (whole days, `to` inclusive) or ISO datetimes (`to` exclusive); default today
+    - group: title | app | day | hour
+    """
+    today = date.today().isoformat()
+    try:
+        start = _range_bound(from_ or today, False)
+        end = _range_bound(to or from_ or today, True)
+        rows = get_summary(start, end, 'title' if group == 'app' else group)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    if group == 'app':
+        totals = {}
+        for title, ms in rows:
+            name = app_name(title)
+            totals[name] = totals.get(name, 0) + ms
+        rows = sorted(totals.items(), key=lambda x: x[1], reverse=True)
+    items = [{'key': k, 'seconds': ms / 1000} for k, ms in rows]
+    return {
+        'from': start.isoformat(),
+        'to': end.isoformat(),
+        'group': group,
+        'total_seconds': sum(i['seconds'] for i in items),
+        'items': items,
+    }
+
+
+@router.get('/api/search')
+def api_search(q: str, from_: str = Query(None, alias='from'), to: str = None,
+               limit: int = Query(50, ge=1, le=500), offset: int = Query(0, ge=0)):
+    """Search block titles and URLs across all history (FTS5 trigram index).
+
+    Query params:
+    - q: substring to look for (case-insensitive)
+    - from, to: optional range, same format as /api/summary
+    - limit, offset: pagination; results are ranked best match first, then newest first
+    """
+    try:
+        start = _range_bound(from_, False) if from_ else None
+        end = _range_bound(to, True) if to else None
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    rows = search_blocks(q, start, end, limit=limit, offset=offset)
+    results = [{'id': r[0], 'start': r[1], 'end': r[2], 'title': r[3], 'score': r[4]} for r in rows]
+    return {
+        'q': q,
+        'limit': limit,
+        'offset': offset,
+        'next_offset': offset + limit if len(results) == limit else None,
+        'results': results,
+    }
+
+
+@router.get('/api/buckets')
+def api_buckets(minutes: int = Query(60), from_: str = Query(None, alias='from'), to: str = None):
+    """Precomputed bucket winners for one resolution (see config.BUCKET_RESOLUTIONS).
+
+    Query params:
+    - minutes: bucket size, e.g. 1, 5, 15 or 60
+    - from, to: range, same format as /api/summary (default today)
+    """
+    today = date.today().isoformat()
+    try:
+        start = _range_bound(from_ or today, False)
+        end = _range_bound(to or from_ or today, True)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    rows = get_buckets(minutes, start, end)
+    return {
+        'minutes': minutes,
+        'buckets': [{'start': r[0], 'title': r[1], 'seconds': r[2], 'total_seconds': r[3],
+                     'keys': r[4], 'clicks': r[5], 'movement': r[6]} for r in rows],
+    }
+
+
+def _parse_cursor(cursor: str):
+    """'<start_ms>:<id>' (the `cursor` of a streamed event) -> keyset tuple."""
+    ms, _, block_id = cursor.partition(':')
+    return int(ms), int(block_id)
+
+
+@router.get('/api/events')
+def api_events(from_: str = Query(None, alias='from'), to: str = None, cursor: str = None,
+               limit: int = Query(None, ge=1)):
+    """Stream blocks in a range as NDJSON, one event per line, ordered by (start, id).
+
+    Query params:
+    - from, to: range, same format as /api/summary (default today)
+    - cursor: continue after this event (the `cursor` field of the last line received)
+    - limit: at most this many events; without it the whole range is streamed
+
+    Each line is {"id", "start", "end" (epoch ms), "title", "cursor"}. Rows are
+    read in keyset pages while the response is sent, so memory use does not
+    grow with the range and the first lines go out right away.
+    """
+    today = date.today().isoformat()
+    try:
+        start = _range_bound(from_ or today, False)
+        end = _range_bound(to or from_ or today, True)
+        after = _parse_cursor(cursor) if cursor else None
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+    rows = iter_blocks(start, end, after=after)
+    if limit is not None:
+        rows = islice(rows, limit)
+    return StreamingResponse(exporter.stream_ndjson(rows), media_type='application/x-ndjson')
+
+
+@router.get('/api/live')
+def api_live():
+    """Server-Sent Events with committed block changes (see live.py).
+
+    `blocks` events carry a JSON list of {"op": "insert" | "extend", "id",
+    "start", "end" (epoch ms), "title"}; `reset` means "reload everything"
+    (after maintenance jobs or when the client fell behind).
+    """
+    return StreamingResponse(live.broadcaster.stream(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
@@ -1,5 +1,12 @@
 import platform
 import subprocess
+import threading
+import logging
+
+import clock
+from config import WINDOW_CACHE_TTL_SECONDS, WINDOW_HELPER_POLL_SECONDS
+
+logger = logging.getLogger(__name__)
 
 # Try to import pygetwindow, but be tolerant if it's not available on some systems
 try:
@@ -16,16 +23,26 @@ def _osascript(cmd: str):
         return None
 
 
-def get_active_target():
-    """Return a human-readable active window or application name, or None.
+# --- Backends ---------------------------------------------------------------
+# A backend answers `poll()` with a human-readable active window/app name or None.
+# Push backends (the macOS helper) call `on_change` themselves when the
+# foreground window changes; their poll() only returns the last known value.
 
-    Strategy:
-    - Try pygetwindow's getActiveWindow() and return its title if available.
-    - On macOS, fall back to `osascript` to query the frontmost application and window title.
-    - Return None if nothing could be determined.
-    """
-    # Try pygetwindow first
-    if gw is not None:
+class NullBackend:
+    def start(self, on_change):
+        pass
+
+    def stop(self):
+        pass
+
+    def poll(self):
+        return None
+
+
+class PyGetWindowBackend(NullBackend):
+    """pygetwindow's getActiveWindow() (Windows, macOS with pyobjc)."""
+
+    def poll(self):
         try:
             win = gw.getActiveWindow()
             if win:
@@ -33,11 +50,14 @@ def get_active_target():
                 if title and title.strip():
                     return title.strip()
         except Exception:
-            # Fall through to platform-specific fallback
             pass
+        return None
 
-    # macOS fallback using AppleScript (osascript)
-    if platform.system() == "Darwin":
+
+class OsaScriptBackend(NullBackend):
+    """One-shot AppleScript queries (two osascript processes per poll)."""
+
+    def poll(self):
         app = _osascript('tell application "System Events" to get name of first process whose frontmost is true')
         if app:
             # Try to get the front window title for that app
@@ -45,6 +65,226 @@ def get_active_target():
             if window:
                 return f"{app} - {window}"
             return app
+        return None
+
+
+# JXA loop run by one long-lived osascript process; prints "App - Window" on change.
+_HELPER_SCRIPT = """
+ObjC.import('Foundation');
+var se = Application('System Events');
+var out = $.NSFileHandle.fileHandleWithStandardOutput;
+var last = null;
+while (true) {
+  var line = '';
+  try {
+    var p = se.processes.whose({frontmost: true})[0];
+    line = p.name();
+    try { var w = p.windows[0].name(); if (w) { line = line + ' - ' + w; } } catch (e) {}
+  } catch (e) {}
+  line = line.replace(/[\\r\\n]+/g, ' ');
+  if (line !== last) {
+    out.writeData($(line + '\\n').dataUsingEncoding($.NSUTF8StringEncoding));
+    last = line;
+  }
+  delay(%s);
+}
+"""
+
+
+class OsaScriptHelperBackend(NullBackend):
+    """macOS: a single persistent osascript helper that reports foreground changes.
+
+    Replaces a fork/exec per poll with one long-lived process. If the helper
+    dies it is restarted; until it is up again, polls fall back to one-shot
+    osascript calls.
+    """
+
+    def __init__(self, poll_seconds=WINDOW_HELPER_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self.proc = None
+        self.value = None
+        self.on_change = None
+        self._fallback = OsaScriptBackend()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self, on_change):
+        self.on_change = on_change
+        self._thread = threading.Thread(target=self._run, name="window-helper", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self.proc and self.proc.poll() is None:
+            self.proc.terminate()
+
+    def poll(self):
+        if self.proc is not None and self.proc.poll() is None:
+            return self.value
+        return self._fallback.poll()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.proc = subprocess.Popen(
+                    ["osascript", "-l", "JavaScript", "-e", _HELPER_SCRIPT % self.poll_seconds],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                )
+                for line in self.proc.stdout:
+                    self.value = line.strip() or None
+                    if self.on_change:
+                        self.on_change(self.value)
+            except Exception:
+                logger.exception("Window helper failed")
+            if not self._stopped.is_set():
+                logger.warning("Window helper exited, restarting")
+                self._stopped.wait(5)
+
+
+class FakeBackend(NullBackend):
+    """Backend for tests: the active window is whatever was last `set()`."""
+
+    def __init__(self, value=None):
+        self.value = value
+        self.polls = 0
+        self.on_change = None
+
+    def start(self, on_change):
+        self.on_change = on_change
+
+    def set(self, value):
+        self.value = value
+        if self.on_change:
+            self.on_change(value)
+
+    def poll(self):
+        self.polls += 1
+        return self.value
+
+
+def default_backend():
+    if platform.system() == "Darwin":
+        return OsaScriptHelperBackend()
+    if gw is not None:
+        return PyGetWindowBackend()
+    # Other platforms: no backend yet (could add more if needed)
+    return NullBackend()
+
+
+# --- Shared service ---------------------------------------------------------
+
+class WindowService:
+    """Caches the active window for all threads and notifies on changes.
+
+    `get()` polls the backend at most once per `ttl` seconds (callers in
+    between share the cached value); `peek()` never polls and is safe to call
+    from an event loop. Listeners registered with `subscribe()` are called
+    with the new value whenever it changes.
+
+    Nothing runs on construction: the backend (the platform default unless one
+    is given) is started by `start()` or on the first `get()`, so importing
+    this module never spawns helper threads or processes.
+    """
+
+    def __init__(self, backend=None, ttl=WINDOW_CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self.value = None
+        self.updated = None
+        self.listeners = []
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._start_lock = threading.Lock()
+        self.backend = backend
+        self.started = False
+
+    def start(self):
+        """Start the backend if it is not running yet."""
+        with self._start_lock:
+            if self.started:
+                return
+            if self.backend is None:
+                self.backend = default_backend()
+            self.backend.start(self._update)
+            self.started = True
+
+    def stop(self):
+        with self._start_lock:
+            if self.started:
+                self.started = False
+                self.backend.stop()
+
+    def set_backend(self, backend):
+        """Swap the backend and start it; None goes back to the lazily started default."""
+        self.stop()
+        self.backend = backend
+        self.updated = None
+        if backend is not None:
+            self.start()
+
+    def subscribe(self, fn):
+        self.listeners.append(fn)
+
+    def get(self):
+        if not self.started:
+            self.start()
+        with self._lock:
+            now = clock.monotonic()
+            if self.updated is None or now - self.updated >= self.ttl:
+                self._update(self.backend.poll(), now)
+            return self.value
+
+    def peek(self):
+        return self.value
+
+    def wait_for_change(self, timeout=None):
+        """Block until the active window changes (or timeout); returns the current value."""
+        with self._changed:
+            self._changed.wait(timeout)
+        return self.value
+
+    def _update(self, value, now=None):
+        self.updated = now or clock.monotonic()
+        if value == self.value:
+            return
+        self.value = value
+        with self._changed:
+            self._changed.notify_all()
+        for fn in list(self.listeners):
+            try:
+                fn(value)
+            except Exception:
+                logger.exception("Window change listener failed")
+
+
+service = WindowService()
+
+
+def get_active_target():
+    """Return a human-readable active window or application name, or None.
+
+    Served from the shared `service` cache; the backend is asked at most once
+    per WINDOW_CACHE_TTL_SECONDS:
+    - pygetwindow's getActiveWindow() where available,
+    - on macOS a persistent osascript helper (one-shot osascript as fallback),
+    - None if nothing could be determined.
+    """
+    return service.get()
+
+
+def get_cached_target():
+    """Last known active window without ever touching the backend (non-blocking)."""
+    return service.peek()
+
+
+def set_backend(backend):
+    """Swap the backend of the shared service (e.g. FakeBackend in tests)."""
+    service.set_backend(backend)
+
+
+def start():
+    """Start the shared service's backend now instead of on the first lookup."""
+    service.start()
+
 
-    # Other platforms: return None (could add more fallbacks if needed)
-    return None
+def stop():
+    service.stop()